@@ -22,11 +22,7 @@ SELECT
   `Team B Defender Score`     AS team_b_defender,
   `Team B Overtime Score`     AS team_b_ot,
   `Duration`    AS duration_raw,
-  CASE
-    WHEN `Duration` LIKE '%:%:%'
-      THEN TIME_TO_SEC(STR_TO_DATE(`Duration`, '%H:%i:%s'))
-    ELSE TIME_TO_SEC(STR_TO_DATE(`Duration`, '%i:%s'))
-  END AS duration_sec,
+  TIME_TO_SEC(`Duration`) AS duration_sec,  -- `Duration` is TIME since src/importer.py
   CASE
     WHEN `Team A Score` > `Team B Score` THEN `Team A`
     WHEN `Team B Score` > `Team A Score` THEN `Team B`
@@ -60,10 +56,18 @@ SELECT
   map, match_id, game_id
 FROM tournaments_stages_matches_games_ids;
 
+/* ---------------------------------------------------------
+   0b) Materialized copies of the views: typed, indexed, with the derived
+       columns (duration_sec, winner_team, score_diff, team_a_win / team_b_win)
+       stored. Created and refreshed per changed tournament by
+         python src/cli.py mviews
+       The queries below read them instead of the views.
+--------------------------------------------------------- */
+
 /* ---------------------------------------------------------
    1) Basic SELECT + LIMIT
 --------------------------------------------------------- */
-SELECT * FROM v_maps LIMIT 10;
+SELECT * FROM mv_maps LIMIT 10;
 
 /* ---------------------------------------------------------
    2) WHERE + ORDER BY: top-10 longest maps
@@ -71,7 +75,7 @@ SELECT * FROM v_maps LIMIT 10;
 SELECT tournament, match_name, map,
        ROUND(duration_sec/60, 1) AS duration_min,
        winner_team, score_diff
-FROM v_maps
+FROM mv_maps
 WHERE map <> 'All Maps'
 ORDER BY duration_sec DESC
 LIMIT 10;
@@ -81,9 +85,9 @@ LIMIT 10;
 --------------------------------------------------------- */
 SELECT team, SUM(cnt) AS maps_total
 FROM (
-  SELECT team_a AS team, COUNT(*) AS cnt FROM v_maps GROUP BY team_a
+  SELECT team_a AS team, COUNT(*) AS cnt FROM mv_maps GROUP BY team_a
   UNION ALL
-  SELECT team_b AS team, COUNT(*) AS cnt FROM v_maps GROUP BY team_b
+  SELECT team_b AS team, COUNT(*) AS cnt FROM mv_maps GROUP BY team_b
 ) t
 GROUP BY team
 ORDER BY maps_total DESC
@@ -95,8 +99,8 @@ LIMIT 15;
 SELECT
   m.tournament, m.stage, m.match_type, m.match_name, m.map,
   g.match_id, g.game_id, m.winner_team, m.score_diff
-FROM v_maps m
-JOIN v_games g
+FROM mv_maps m
+JOIN mv_games g
   ON g.tournament = m.tournament
  AND g.stage      = m.stage
  AND g.match_type = m.match_type
@@ -110,7 +114,7 @@ LIMIT 12;
 SELECT m.map, m.match_name,
        tA.team_id AS team_a_id,
        tB.team_id AS team_b_id
-FROM v_maps m
+FROM mv_maps m
 LEFT JOIN teams_ids tA ON tA.team = m.team_a
 LEFT JOIN teams_ids tB ON tB.team = m.team_b
 LIMIT 12;
@@ -119,7 +123,7 @@ LIMIT 12;
    6) Aggregation on kills: top-15 by kill difference
 --------------------------------------------------------- */
 SELECT player, SUM(difference) AS total_diff
-FROM v_kills
+FROM mv_kills
 GROUP BY player
 ORDER BY total_diff DESC
 LIMIT 15;
@@ -131,7 +135,7 @@ SELECT player,
        SUM(player_kills) AS kills,
        SUM(enemy_kills)  AS deaths,
        ROUND(SUM(player_kills) / NULLIF(SUM(enemy_kills),0), 2) AS kd
-FROM v_kills
+FROM mv_kills
 GROUP BY player
 HAVING SUM(player_kills) >= 50
 ORDER BY kd DESC, kills DESC
@@ -142,7 +146,7 @@ LIMIT 15;
 --------------------------------------------------------- */
 SELECT player, enemy,
        SUM(difference) AS diff_vs_enemy
-FROM v_kills
+FROM mv_kills
 GROUP BY player, enemy
 HAVING SUM(difference) >= 10
 ORDER BY diff_vs_enemy DESC
@@ -152,7 +156,7 @@ LIMIT 15;
    9) Stage breakdown: number of maps per stage
 --------------------------------------------------------- */
 SELECT tournament, stage, COUNT(*) AS maps_cnt
-FROM v_maps
+FROM mv_maps
 GROUP BY tournament, stage
 ORDER BY tournament,
          FIELD(stage, 'Swiss Stage','Play-In','Quarterfinals','Semifinals','Final','Grand Final'),
@@ -162,13 +166,11 @@ ORDER BY tournament,
    10) Map winrates for teams
 --------------------------------------------------------- */
 WITH all_maps AS (
-  SELECT map, team_a AS team,
-         CASE WHEN team_a_score > team_b_score THEN 1 ELSE 0 END AS win
-  FROM v_maps
+  SELECT map, team_a AS team, team_a_win AS win
+  FROM mv_maps
   UNION ALL
-  SELECT map, team_b AS team,
-         CASE WHEN team_b_score > team_a_score THEN 1 ELSE 0 END AS win
-  FROM v_maps
+  SELECT map, team_b AS team, team_b_win AS win
+  FROM mv_maps
 )
 SELECT map, team,
        COUNT(*) AS games,
@@ -1,128 +1,260 @@
+from __future__ import annotations
+
 import sys
 import os
+import time
+import threading
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import pandas as pd
-import matplotlib.pyplot as plt
-import sqlalchemy
-import plotly.express as px
-from openpyxl import load_workbook
-from openpyxl.formatting.rule import ColorScaleRule
-from db_config import DB_URL
-
-
-
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from typing import TYPE_CHECKING
+import profiler
+# pandas, matplotlib, plotly, openpyxl и sqlalchemy импортируются внутри функций:
+# --help, --list и --dry-run не должны их загружать
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+
+
+# подключение к БД создаётся при первом запросе, чтобы импорт не требовал настроек MySQL
+_engine = None
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        import sqlalchemy
+        from db_config import DB_URL
+        _engine = sqlalchemy.create_engine(DB_URL)
+    return _engine
+
+def __getattr__(name):
+    # совместимость: analytics.engine
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(name)
+
+# локальный снапшот (Parquet + DuckDB) вместо MySQL, см. src/snapshot.py
+_snapshot = None
+
+def use_snapshot(snapshot_dir: str = "snapshots"):
+    """Переключить run_query на локальный снапшот"""
+    global _snapshot, _players_stats
+    from snapshot import connect
+    _snapshot = connect(snapshot_dir)
+    _players_stats = None
+
+# дисковый кэш результатов запросов, см. src/qcache.py
+_cache = None
+
+def use_cache(refresh: bool = False, **kwargs):
+    """Включить кэш результатов (вызывать после use_snapshot, если он нужен)"""
+    global _cache
+    import qcache
+    if _snapshot is not None:
+        source = "snapshot:" + os.path.abspath(_snapshot.snapshot_dir)
+    else:
+        import sqlalchemy
+        from db_config import DB_URL
+        source = sqlalchemy.engine.make_url(DB_URL).render_as_string(hide_password=True)
+    _cache = qcache.QueryCache(source, refresh=refresh, **kwargs)
+
+def _table_versions(tables):
+    import qcache
+    if _snapshot is not None:
+        return qcache.snapshot_versions(_snapshot.snapshot_dir, tables)
+    raw = get_engine().raw_connection()
+    try:
+        return qcache.mysql_versions(raw, tables)
+    finally:
+        raw.close()
+
+def _execute(sql: str, params=None) -> pd.DataFrame:
+    if _snapshot is not None:
+        with profiler.phase("execute"):
+            cur = _snapshot.execute(sql, params)
+        with profiler.phase("fetch"):
+            df = cur.df()
+        profiler.record_result(df)
+        return df
+    import pandas as pd
+    with profiler.phase("connect"):
+        conn = get_engine().connect()
+    with conn:
+        # статистика сервера (performance_schema) по DB-API соединению этой же сессии
+        before = profiler.server_stats(conn.connection)
+        with profiler.phase("query"):
+            df = pd.read_sql(sql, conn, params=tuple(params) if params else None)
+        profiler.record_server(before, profiler.server_stats(conn.connection))
+    profiler.record_result(df)
+    return df
+
+def run_query(sql: str, params=None) -> pd.DataFrame:
+    """Выполнить SQL-запрос (параметры — %s) и вернуть DataFrame"""
+    if _cache is not None:
+        missed = []
+
+        def run():
+            missed.append(True)
+            return _execute(sql, params)
+
+        df = _cache.fetch(sql, params, run, _table_versions)
+        profiler.record(cache="miss" if missed else "hit")
+        if not missed:
+            profiler.record_result(df)
+        return df
+    return _execute(sql, params)
+
+def query_chunks(sql: str, chunk_rows: int = 50_000):
+    """Результат запроса порциями DataFrame, не загружая его целиком (мимо кэша)"""
+    import pandas as pd
+    if _snapshot is not None:
+        cur = _snapshot.execute(sql)
+        columns = [d[0] for d in cur.description]
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield pd.DataFrame(rows, columns=columns)
+        cur.close()
+        return
+    # stream_results: серверный курсор (pymysql SSCursor) вместо буфера на клиенте
+    with get_engine().connect().execution_options(stream_results=True) as conn:
+        yield from pd.read_sql(sql, conn, chunksize=chunk_rows)
+
+
+# ---------------- ДАННЫЕ ИГРОКОВ ---------------- #
+# players_stats JOIN teams_ids JOIN players_ids читается один раз за запуск: графики по игрокам
+# считают свои агрегаты из этой общей таблицы (имена — Categorical, метрики — узкие int, см. encoded.py)
+
+SQL_PLAYERS_STATS = """
+    SELECT p.Player, t.Team, p.Tournament, p.Rating, p.Kills, p.`Rounds Played`
+    FROM players_stats p
+    JOIN teams_ids t ON p.Teams = t.Team
+    JOIN players_ids pi ON p.Player = pi.Player;
+    """
 
-# подключение к БД
-engine = sqlalchemy.create_engine(DB_URL)
+_players_stats = None
+_players_stats_lock = threading.Lock()
 
-def run_query(sql: str) -> pd.DataFrame:
-    """Выполнить SQL-запрос и вернуть DataFrame"""
-    return pd.read_sql(sql, engine)
+def players_stats(refresh: bool = False) -> pd.DataFrame:
+    """Общая таблица статистики игроков (запрос выполняется один раз, дальше — из памяти)"""
+    global _players_stats
+    with _players_stats_lock:
+        if _players_stats is None or refresh:
+            import encoded
+            with profiler.item("players_stats", "data"):
+                _players_stats = encoded.encode_frame(run_query(SQL_PLAYERS_STATS))
+        return _players_stats
 
 
 # ---------------- ГРАФИКИ ---------------- #
-
-def pie_players_by_team():
-    sql = """
-    SELECT t.Team AS team_name, COUNT(p.Player) AS num_players
-    FROM players_stats p
-    JOIN teams_ids t ON p.Teams = t.Team
-    JOIN players_ids pi ON p.Player = pi.Player
-    GROUP BY t.Team;
-    """
-    df = run_query(sql)
-    df.set_index("team_name")["num_players"].plot.pie(autopct="%1.1f%%")
-    plt.title("Распределение игроков по командам")
-    plt.ylabel("")
-    plt.savefig("charts/pie_players_by_team.png")
-    plt.close()
+# Каждый график = SQL + функция рисования на переданной оси (без глобального состояния pyplot),
+# поэтому данные можно получать параллельно, а рисовать в отдельных процессах (render_all).
+# Графики по игрокам вместо своего SQL считают данные из players_stats() (функции data_*);
+# им можно передать эту таблицу (stats=...), например из ноутбука, тогда БД не нужна.
+
+def data_pie_players_by_team(stats) -> pd.DataFrame:
+    df = stats.groupby("Team", observed=True)["Player"].count()
+    return df.rename("num_players").rename_axis("team_name").reset_index()
+
+def draw_pie_players_by_team(df, ax):
+    df.set_index("team_name")["num_players"].plot.pie(autopct="%1.1f%%", ax=ax)
+    ax.set_title("Распределение игроков по командам")
+    ax.set_ylabel("")
+
+def pie_players_by_team(stats=None):
+    df = chart_data("pie_players_by_team", stats)
+    save_chart("pie_players_by_team", df)
     print(f"[OK] Pie chart saved ({len(df)} rows)")
+    return df
+
+
+def data_bar_avg_rating_by_team(stats) -> pd.DataFrame:
+    import engine
+    # ROUND(AVG(...), 2) как в SQL: половины от нуля, а не к чётному (Series.round)
+    df = engine._round(stats.groupby("Team", observed=True)["Rating"].mean(), 2)
+    df = df.rename("avg_rating").rename_axis("team_name").reset_index()
+    return df.sort_values("avg_rating", ascending=False, kind="mergesort").reset_index(drop=True)
+
+def draw_bar_avg_rating_by_team(df, ax):
+    df.plot(kind="bar", x="team_name", y="avg_rating", legend=False, ax=ax)
+    ax.set_title("Средний рейтинг игроков по командам")
+    ax.set_xlabel("Команды")
+    ax.set_ylabel("Средний рейтинг")
+    ax.figure.tight_layout()
+
+def bar_avg_rating_by_team(stats=None):
+    df = chart_data("bar_avg_rating_by_team", stats)
+    save_chart("bar_avg_rating_by_team", df)
+    print(f"[OK] Bar chart saved ({len(df)} rows)")
+    return df
 
 
-def bar_avg_rating_by_team():
-    sql = """
-    SELECT t.Team AS team_name, ROUND(AVG(p.Rating), 2) AS avg_rating
-    FROM players_stats p
-    JOIN teams_ids t ON p.Teams = t.Team
-    JOIN players_ids pi ON p.Player = pi.Player
-    GROUP BY t.Team
-    ORDER BY avg_rating DESC;
-    """
-    df = run_query(sql)
-    df.plot(kind="bar", x="team_name", y="avg_rating", legend=False)
-    plt.title("Средний рейтинг игроков по командам")
-    plt.xlabel("Команды")
-    plt.ylabel("Средний рейтинг")
-    plt.tight_layout()
-    plt.savefig("charts/bar_avg_rating_by_team.png")
-    plt.close()
-    print(f"[OK] Bar chart saved ({len(df)} rows)")
+def data_hbar_top_kills(stats) -> pd.DataFrame:
+    df = stats.groupby(["Player", "Team"], observed=True)["Kills"].sum(min_count=1).rename("total_kills").reset_index()
+    df = df.sort_values("total_kills", ascending=False, kind="mergesort").head(10)
+    return df[["Player", "total_kills", "Team"]].reset_index(drop=True)
 
+def draw_hbar_top_kills(df, ax):
+    df.plot(kind="barh", x="Player", y="total_kills", legend=False, ax=ax)
+    ax.set_title("Топ-10 игроков по убийствам")
+    ax.set_xlabel("Убийства")
+    ax.set_ylabel("Игрок")
+    ax.figure.tight_layout()
 
-def hbar_top_kills():
-    sql = """
-    SELECT p.Player, SUM(p.Kills) AS total_kills, t.Team
-    FROM players_stats p
-    JOIN teams_ids t ON p.Teams = t.Team
-    JOIN players_ids pi ON p.Player = pi.Player
-    GROUP BY p.Player, t.Team
-    ORDER BY total_kills DESC
-    LIMIT 10;
-    """
-    df = run_query(sql)
-    df.plot(kind="barh", x="Player", y="total_kills", legend=False)
-    plt.title("Топ-10 игроков по убийствам")
-    plt.xlabel("Убийства")
-    plt.ylabel("Игрок")
-    plt.tight_layout()
-    plt.savefig("charts/hbar_top_kills.png")
-    plt.close()
+def hbar_top_kills(stats=None):
+    df = chart_data("hbar_top_kills", stats)
+    save_chart("hbar_top_kills", df)
     print(f"[OK] Horizontal bar chart saved ({len(df)} rows)")
+    return df
 
 
-def line_maps_played():
-    sql = """
-    SELECT p.Tournament, t.Team, COUNT(p.`Rounds Played`) AS maps_played
-    FROM players_stats p
-    JOIN teams_ids t ON p.Teams = t.Team
-    JOIN players_ids pi ON p.Player = pi.Player
-    GROUP BY p.Tournament, t.Team
-    ORDER BY p.Tournament
-    limit 10;
-    """
-    df = run_query(sql)
+def data_line_maps_played(stats) -> pd.DataFrame:
+    # COUNT(`Rounds Played`): строки с непустым числом раундов; NULL-турнир — своя группа, как в GROUP BY
+    df = stats.groupby(["Tournament", "Team"], observed=True, dropna=False)["Rounds Played"].count()
+    df = df.rename("maps_played").reset_index()
+    # ORDER BY Tournament: NULL первым, как в MySQL
+    return df.sort_values("Tournament", na_position="first", kind="mergesort").head(10).reset_index(drop=True)
+
+def draw_line_maps_played(df, ax):
     pivot = df.pivot(index="Tournament", columns="Team", values="maps_played").fillna(0)
-    pivot.plot(kind="line", marker="o")
-    plt.title("Карты, сыгранные командами по турнирам")
-    plt.xlabel("Турнир")
-    plt.ylabel("Количество карт")
-    plt.legend(title="Команды", bbox_to_anchor=(1.05, 1), loc="upper left")
-    plt.tight_layout()
-    plt.savefig("charts/line_maps_played.png")
-    plt.close()
+    pivot.plot(kind="line", marker="o", ax=ax)
+    ax.set_title("Карты, сыгранные командами по турнирам")
+    ax.set_xlabel("Турнир")
+    ax.set_ylabel("Количество карт")
+    ax.legend(title="Команды", bbox_to_anchor=(1.05, 1), loc="upper left")
+    ax.figure.tight_layout()
+
+def line_maps_played(stats=None):
+    df = chart_data("line_maps_played", stats)
+    save_chart("line_maps_played", df)
     print(f"[OK] Line chart saved ({len(df)} rows)")
+    return df
 
 
-def bar_maps_played():
-    sql = """
+SQL_BAR_MAPS_PLAYED = """
     SELECT Map, COUNT(*) AS times_played
     FROM maps_played
     GROUP BY Map
     ORDER BY times_played DESC
     limit 10;
     """
-    df = run_query(sql)
-    df.plot(kind="bar", x="Map", y="times_played", legend=False)
-    plt.title("Популярность карт (по количеству игр)")
-    plt.xlabel("Карта")
-    plt.ylabel("Количество игр")
-    plt.tight_layout()
-    plt.savefig("charts/bar_maps_played.png")
-    plt.close()
+
+def draw_bar_maps_played(df, ax):
+    df.plot(kind="bar", x="Map", y="times_played", legend=False, ax=ax)
+    ax.set_title("Популярность карт (по количеству игр)")
+    ax.set_xlabel("Карта")
+    ax.set_ylabel("Количество игр")
+    ax.figure.tight_layout()
+
+def bar_maps_played():
+    df = run_query(SQL_BAR_MAPS_PLAYED)
+    save_chart("bar_maps_played", df)
     print(f"[OK] Maps played chart saved ({len(df)} rows)")
-    
-def scatter_kd_vs_acs():
-    sql = """
+    return df
+
+
+SQL_SCATTER_KD_VS_ACS = """
     SELECT p.Player,
            p.`Average Combat Score` AS acs,
            p.Kills,
@@ -130,106 +262,309 @@ def scatter_kd_vs_acs():
     FROM players_stats p
     limit 10;
         """
-    df = run_query(sql)
 
+def draw_scatter_kd_vs_acs(df, ax):
     # считаем K/D (делим на 1, чтобы избежать деления на ноль)
-    df["kd_ratio"] = df["Kills"] / df["Deaths"].replace(0, 1)
-
-    df.plot.scatter(x="acs", y="kd_ratio")
-    plt.title("Зависимость K/D и Average Combat Score (ACS)")
-    plt.xlabel("Average Combat Score")
-    plt.ylabel("K/D ratio")
-    plt.tight_layout()
-    plt.savefig("charts/scatter_kd_vs_acs.png")
-    plt.close()
-    print(f"[OK] Scatter plot KD vs ACS saved ({len(df)} rows)")
+    df = df.assign(kd_ratio=df["Kills"] / df["Deaths"].replace(0, 1))
+
+    df.plot.scatter(x="acs", y="kd_ratio", ax=ax)
+    ax.set_title("Зависимость K/D и Average Combat Score (ACS)")
+    ax.set_xlabel("Average Combat Score")
+    ax.set_ylabel("K/D ratio")
+    ax.figure.tight_layout()
 
+def scatter_kd_vs_acs():
+    df = run_query(SQL_SCATTER_KD_VS_ACS)
+    save_chart("scatter_kd_vs_acs", df)
+    print(f"[OK] Scatter plot KD vs ACS saved ({len(df)} rows)")
+    return df
 
 
-def hist_multikills():
-    sql = """
+SQL_HIST_MULTIKILLS = """
     SELECT Player,
-           COALESCE(`2k`,0) + COALESCE(CAST(`3k` AS SIGNED),0) +
-           COALESCE(CAST(`4k` AS SIGNED),0) + COALESCE(CAST(`5k` AS SIGNED),0) AS multikills
+           COALESCE(`2k`,0) + COALESCE(`3k`,0) +
+           COALESCE(`4k`,0) + COALESCE(`5k`,0) AS multikills
     FROM kills_stats;
     """
-    df = run_query(sql)
-    df["multikills"].plot.hist(bins=20)
-    plt.title("Распределение мультикиллов у игроков")
-    plt.xlabel("Количество мультикиллов")
-    plt.ylabel("Частота игроков")
-    plt.tight_layout()
-    plt.savefig("charts/hist_multikills.png")
-    plt.close()
-    print(f"[OK] Histogram Multikills saved ({len(df)} rows)")
 
+def draw_hist_multikills(df, ax):
+    df["multikills"].plot.hist(bins=20, ax=ax)
+    ax.set_title("Распределение мультикиллов у игроков")
+    ax.set_xlabel("Количество мультикиллов")
+    ax.set_ylabel("Частота игроков")
+    ax.figure.tight_layout()
 
+def hist_multikills():
+    df = run_query(SQL_HIST_MULTIKILLS)
+    save_chart("hist_multikills", df)
+    print(f"[OK] Histogram Multikills saved ({len(df)} rows)")
+    return df
 
-def bar_agents_pick_rate():
-    sql = """
-    SELECT Agent, AVG(CAST(`Pick Rate` AS DECIMAL(5,2))) AS avg_pick_rate
+
+SQL_BAR_AGENTS_PICK_RATE = """
+    SELECT Agent, AVG(`Pick Rate`) AS avg_pick_rate
     FROM agents_pick_rates
     GROUP BY Agent
     ORDER BY avg_pick_rate DESC;
     """
-    df = run_query(sql)
-    df.plot(kind="bar", x="Agent", y="avg_pick_rate", legend=False)
-    plt.title("Популярность агентов (средний Pick Rate)")
-    plt.xlabel("Агент")
-    plt.ylabel("Средний Pick Rate (%)")
-    plt.tight_layout()
-    plt.savefig("charts/bar_agents_pick_rate.png")
-    plt.close()
+
+def draw_bar_agents_pick_rate(df, ax):
+    df.plot(kind="bar", x="Agent", y="avg_pick_rate", legend=False, ax=ax)
+    ax.set_title("Популярность агентов (средний Pick Rate)")
+    ax.set_xlabel("Агент")
+    ax.set_ylabel("Средний Pick Rate (%)")
+    ax.figure.tight_layout()
+
+def bar_agents_pick_rate():
+    df = run_query(SQL_BAR_AGENTS_PICK_RATE)
+    save_chart("bar_agents_pick_rate", df)
     print(f"[OK] Agent pick rate chart saved ({len(df)} rows)")
-    
-    
-def line_agents_by_stage():
-    sql = """
-    SELECT Stage, Agent, AVG(CAST(`Pick Rate` AS DECIMAL(5,2))) AS avg_pick_rate
+    return df
+
+
+SQL_LINE_AGENTS_BY_STAGE = """
+    SELECT Stage, Agent, AVG(`Pick Rate`) AS avg_pick_rate
     FROM agents_pick_rates
     GROUP BY Stage, Agent
     ORDER BY Stage;
     """
-    df = run_query(sql)
+
+def draw_line_agents_by_stage(df, ax):
     pivot = df.pivot(index="Stage", columns="Agent", values="avg_pick_rate").fillna(0)
-    pivot.plot(kind="line", marker="o")
-    plt.title("Популярность агентов по стадиям турниров")
-    plt.xlabel("Стадия")
-    plt.ylabel("Средний Pick Rate (%)")
-    plt.legend(title="Агент", bbox_to_anchor=(1.05, 1), loc="upper left")
-    plt.tight_layout()
-    plt.savefig("charts/line_agents_by_stage.png")
-    plt.close()
-    print(f"[OK] Line chart saved ({len(df)} rows)")
+    pivot.plot(kind="line", marker="o", ax=ax)
+    ax.set_title("Популярность агентов по стадиям турниров")
+    ax.set_xlabel("Стадия")
+    ax.set_ylabel("Средний Pick Rate (%)")
+    ax.legend(title="Агент", bbox_to_anchor=(1.05, 1), loc="upper left")
+    ax.figure.tight_layout()
 
+def line_agents_by_stage():
+    df = run_query(SQL_LINE_AGENTS_BY_STAGE)
+    save_chart("line_agents_by_stage", df)
+    print(f"[OK] Line chart saved ({len(df)} rows)")
+    return df
+
+
+# графики в порядке запуска: имя -> (SQL, функция рисования)
+CHART_SPECS = {
+    "pie_players_by_team": (SQL_PLAYERS_STATS, draw_pie_players_by_team),
+    "bar_avg_rating_by_team": (SQL_PLAYERS_STATS, draw_bar_avg_rating_by_team),
+    "hbar_top_kills": (SQL_PLAYERS_STATS, draw_hbar_top_kills),
+    "line_maps_played": (SQL_PLAYERS_STATS, draw_line_maps_played),
+    "bar_maps_played": (SQL_BAR_MAPS_PLAYED, draw_bar_maps_played),
+    "bar_agents_pick_rate": (SQL_BAR_AGENTS_PICK_RATE, draw_bar_agents_pick_rate),
+    "line_agents_by_stage": (SQL_LINE_AGENTS_BY_STAGE, draw_line_agents_by_stage),
+    "hist_multikills": (SQL_HIST_MULTIKILLS, draw_hist_multikills),
+    "scatter_kd_vs_acs": (SQL_SCATTER_KD_VS_ACS, draw_scatter_kd_vs_acs),
+}
+CHARTS = list(CHART_SPECS)
+
+# графики из общей таблицы players_stats(): имя -> агрегат
+STATS_CHARTS = {
+    "pie_players_by_team": data_pie_players_by_team,
+    "bar_avg_rating_by_team": data_bar_avg_rating_by_team,
+    "hbar_top_kills": data_hbar_top_kills,
+    "line_maps_played": data_line_maps_played,
+}
 
+def chart_data(name: str, stats=None) -> pd.DataFrame:
+    """Данные графика: агрегат общей таблицы игроков (stats или players_stats()) либо свой SQL"""
+    if name in STATS_CHARTS:
+        return STATS_CHARTS[name](players_stats() if stats is None else stats)
+    return run_query(CHART_SPECS[name][0])
+
+def save_chart(name: str, df, out_dir: str = "charts") -> str:
+    """Нарисовать график на отдельной Figure (Agg, без pyplot) и атомарно записать PNG"""
+    from matplotlib.figure import Figure
+
+    with profiler.phase("render"):
+        fig = Figure()
+        ax = fig.subplots()
+        CHART_SPECS[name][1](df, ax)
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, f"{name}.png")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        fig.savefig(tmp, format="png")
+        os.replace(tmp, path)
+    return path
+
+
+# ---------------- RENDER ALL ---------------- #
+
+def _warm_up_rendering():
+    # импорт pandas.plotting/matplotlib и загрузка шрифтов один раз в родителе:
+    # процессы пула наследуют их при fork, а не платят за них в каждом графике
+    import io
+    import matplotlib
+    matplotlib.use("Agg")
+    import pandas as pd
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    pd.Series([0, 1]).plot(ax=fig.subplots(), title="warm-up")
+    fig.savefig(io.BytesIO(), format="png")
+
+def _render_chart(name: str, df, out_dir: str) -> float:
+    t0 = time.perf_counter()
+    save_chart(name, df, out_dir)
+    return time.perf_counter() - t0
+
+def render_all(charts=None, out_dir: str = "charts", jobs: int = None) -> "pd.DataFrame":
+    """Все графики: запросы выполняются параллельно в потоках, каждый готовый результат сразу
+    рисуется в пуле процессов. Общее время ~ самый медленный график, а не сумма.
+    Возвращает таблицу времени по графикам (fetch_s, render_s, done_s от старта)."""
+    import pandas as pd
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+    charts = list(charts or CHARTS)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(charts)))
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    timings = {name: {"chart": name} for name in charts}
+
+    def fetch(name):
+        t0 = time.perf_counter()
+        with profiler.item(name, "chart"):
+            df = chart_data(name)
+        timings[name]["rows"] = len(df)
+        timings[name]["fetch_s"] = round(time.perf_counter() - t0, 3)
+        return name, df
+
+    # процессы запускаются до потоков запросов (fork без чужих потоков)
+    _warm_up_rendering()
+    with ProcessPoolExecutor(max_workers=jobs) as procs:
+        procs.submit(time.sleep, 0).result()
+        with ThreadPoolExecutor(max_workers=len(charts)) as threads:
+            rendering = {}
+            for fut in as_completed([threads.submit(fetch, name) for name in charts]):
+                name, df = fut.result()
+                rendering[procs.submit(_render_chart, name, df, out_dir)] = name
+            for fut in as_completed(rendering):
+                name = rendering[fut]
+                render_s = fut.result()
+                # рисование идёт в процессе пула: его время добавляется к графику здесь
+                profiler.add_phase(name, "render", render_s, "chart")
+                timings[name]["render_s"] = round(render_s, 3)
+                timings[name]["done_s"] = round(time.perf_counter() - start, 3)
+                print(f"[OK] {name}: {timings[name]['rows']} rows, fetch {timings[name]['fetch_s']}s, "
+                      f"render {timings[name]['render_s']}s")
+
+    report = pd.DataFrame([timings[name] for name in charts])
+    print(f"[OK] {len(charts)} charts in {time.perf_counter() - start:.2f}s "
+          f"(sum of fetch+render {report['fetch_s'].sum() + report['render_s'].sum():.2f}s)")
+    return report
 
 
 # ---------------- EXCEL EXPORT ---------------- #
 
-def export_to_excel(dfs: dict, filename: str):
-    filepath = f"exports/{filename}"
-    with pd.ExcelWriter(filepath, engine="openpyxl") as writer:
-        for sheet, df in dfs.items():
-            df.to_excel(writer, sheet_name=sheet, index=False)
-
-    wb = load_workbook(filepath)
-    for sheet in wb.sheetnames:
-        ws = wb[sheet]
-        ws.freeze_panes = "B2"
-
+# строк на листе Excel, включая заголовок
+EXCEL_MAX_ROWS = 1_048_576
+
+def _excel_frames(source, chunk_rows: int):
+    """DataFrame, итерируемое DataFrame-ов (query_chunks) или путь к файлу выгрузки main.py"""
+    import pandas as pd
+    if isinstance(source, pd.DataFrame):
+        yield source
+    elif isinstance(source, (str, os.PathLike)):
+        if str(source).endswith(".csv"):
+            yield from pd.read_csv(source, chunksize=chunk_rows)
+        else:
+            # parquet / feather (main.py --format): уже типизированы, читаются целиком
+            import manifest
+            yield manifest.read(str(source))
+    else:
+        yield from source
+
+def _excel_sheet_name(name: str, part: int) -> str:
+    # не больше 31 символа; продолжения листа: "name (2)", "name (3)", ...
+    if part == 1:
+        return name[:31]
+    suffix = f" ({part})"
+    return name[:31 - len(suffix)] + suffix
+
+def export_to_excel(dfs: dict, filename: str, out_dir: str = "exports", chunk_rows: int = 50_000):
+    """Потоковая выгрузка в Excel за один проход (openpyxl write-only, память не растёт с объёмом).
+
+    dfs: имя листа -> DataFrame, итерируемое DataFrame-ов или путь к CSV.
+    Лист, не помещающийся в EXCEL_MAX_ROWS, продолжается на листах "имя (2)", "имя (3)"...
+    """
+    import pandas as pd
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.formatting.rule import ColorScaleRule
+    from openpyxl.utils import get_column_letter
+
+    os.makedirs(out_dir, exist_ok=True)
+    filepath = os.path.join(out_dir, filename)
+    wb = Workbook(write_only=True)
+    sheets = 0
+    total = 0
+
+    def open_sheet(name, columns):
+        ws = wb.create_sheet(name)
+        ws.freeze_panes = "B2"  # до первой строки: в write-only режиме вид листа пишется сразу
+        header = []
+        for col in columns:
+            cell = WriteOnlyCell(ws, value=str(col))
+            cell.font = Font(bold=True)
+            header.append(cell)
+        ws.append(header)
+        return ws
+
+    def close_sheet(ws, n_cols, n_rows):
+        if n_rows == 0:
+            return
+        last = f"{get_column_letter(n_cols)}{n_rows + 1}"
         # градиент для числовых колонок
         rule = ColorScaleRule(start_type="min", start_color="FFAA0000",
                               mid_type="percentile", mid_value=50, mid_color="FFFFFF00",
                               end_type="max", end_color="FF00AA00")
-        max_row = ws.max_row
-        max_col = ws.max_column
-        ws.conditional_formatting.add(f"A2:{chr(64+max_col)}{max_row}", rule)
-
-        ws.auto_filter.ref = ws.dimensions
-
-    wb.save(filepath)
-    print(f"[OK] Created {filename}, {len(dfs)} sheets, {sum(len(df) for df in dfs.values())} rows")
+        ws.conditional_formatting.add(f"A2:{last}", rule)
+        ws.auto_filter.ref = f"A1:{last}"
+
+    for sheet, source in dfs.items():
+        part, ws, rows, columns = 0, None, 0, None
+        for chunk in _excel_frames(source, chunk_rows):
+            if ws is None:
+                columns = list(chunk.columns)
+                part = 1
+                ws = open_sheet(_excel_sheet_name(sheet, part), columns)
+            # NaN/NaT -> пустая ячейка (openpyxl записал бы nan и сломал файл)
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                if rows == EXCEL_MAX_ROWS - 1:
+                    close_sheet(ws, len(columns), rows)
+                    total += rows
+                    part += 1
+                    ws, rows = open_sheet(_excel_sheet_name(sheet, part), columns), 0
+                ws.append(row)
+                rows += 1
+        if ws is None:
+            # пустой источник: лист только с заголовком, если колонки известны
+            if isinstance(source, pd.DataFrame):
+                open_sheet(_excel_sheet_name(sheet, 1), list(source.columns))
+                sheets += 1
+            continue
+        close_sheet(ws, len(columns), rows)
+        total += rows
+        sheets += part
+
+    tmp = filepath + ".tmp"
+    wb.save(tmp)
+    os.replace(tmp, filepath)
+    print(f"[OK] Created {filename}, {sheets} sheets, {total} rows")
+    return filepath
+
+def export_outputs_to_excel(outputs_dir: str, filename: str = None, out_dir: str = "exports"):
+    """Все отчёты из каталога выгрузки main.py (outputs/<timestamp>; CSV, Parquet или Feather)
+    -> одна книга, лист на отчёт"""
+    import manifest
+    extensions = tuple(manifest.EXTENSIONS.values())
+    names = sorted(f for f in os.listdir(outputs_dir) if f.endswith(extensions))
+    dfs = {os.path.splitext(name)[0]: os.path.join(outputs_dir, name) for name in names}
+    filename = filename or f"reports_{os.path.basename(os.path.normpath(outputs_dir))}.xlsx"
+    return export_to_excel(dfs, filename, out_dir)
 
 
 # ---------------- PLOTLY TIME SLIDER ---------------- #
@@ -243,9 +578,10 @@ ROLES = {
 
 
 def plotly_time_slider():
+    import plotly.express as px
     sql = """
     SELECT Tournament, Stage, Agent,
-           AVG(CAST(`Pick Rate` AS DECIMAL(6,2))) AS avg_pick_rate
+           AVG(`Pick Rate`) AS avg_pick_rate
     FROM agents_pick_rates
     GROUP BY Tournament, Stage, Agent
     ORDER BY Tournament, Stage;
@@ -267,33 +603,106 @@ def plotly_time_slider():
         title="Популярность агентов по стадиям (слайдер по годам)"
     )
 
-    fig.show()  # просто открывается в браузере
+    fig.show()  # просто открывается в браузере; для сервера без браузера — src/dashboard.py
 
     
 
 
 # ---------------- MAIN ---------------- #
 
-if __name__ == "__main__":
-    pie_players_by_team()
-    bar_avg_rating_by_team()
-    hbar_top_kills()
-    line_maps_played()
-    bar_maps_played()
-    bar_agents_pick_rate()
-    line_agents_by_stage()
-    hist_multikills()
-    scatter_kd_vs_acs()
-    
-    
-    
-    # пример экспорта
-    df1 = run_query("SELECT * FROM players_stats LIMIT 100;")
-    df2 = run_query("SELECT * FROM kills_stats LIMIT 100;")
-    export_to_excel({"Players": df1, "Kills": df2}, "valorant_report.xlsx")
-
-    # интерактивный график (показывается в браузере)
-    plotly_time_slider()  # можно указать роль или None
-
-
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Графики и Excel-отчёт по Valorant")
+    parser.add_argument("--backend", choices=["mysql", "snapshot"], default="mysql",
+                        help="snapshot: читать локальные Parquet-файлы вместо MySQL")
+    parser.add_argument("--snapshot-dir", default="snapshots")
+    parser.add_argument("--no-cache", action="store_true", help="не использовать кэш результатов")
+    parser.add_argument("--refresh", action="store_true", help="перезапросить данные и обновить кэш")
+    parser.add_argument("--charts", default=",".join(CHARTS), help="графики через запятую (по умолчанию все)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="процессов для рисования (render_all); 1 = по очереди в этом процессе")
+    parser.add_argument("--no-excel", action="store_true", help="не выгружать Excel")
+    parser.add_argument("--excel-from", default=None,
+                        help="каталог выгрузки main.py (outputs/<timestamp>): все CSV в одну книгу exports/")
+    parser.add_argument("--no-slider", action="store_true",
+                        help="не собирать дашборд со слайдером по годам (dashboard/index.html)")
+    parser.add_argument("--list", action="store_true", help="показать список графиков и выйти")
+    parser.add_argument("--dry-run", action="store_true", help="показать, что будет построено, и выйти")
+    parser.add_argument("--profile", action="store_true",
+                        help="время по фазам (подключение/запрос/рисование/запись), строки, размер результата и "
+                             "статистика сервера для каждого графика; charts/profile_<время>.json и сводка")
+    parser.add_argument("--profile-explain", action="store_true",
+                        help="вместе с --profile: сохранить EXPLAIN ANALYZE запроса каждого графика (запрос выполняется ещё раз)")
+    cli = parser.parse_args(argv)
+    cli.charts = [c.strip() for c in cli.charts.split(",") if c.strip()]
+    unknown = [c for c in cli.charts if c not in CHARTS]
+    if unknown:
+        parser.error(f"неизвестные графики: {', '.join(unknown)}")
+    return cli
+
+def main(argv=None) -> int:
+    cli = parse_args(argv)
+    if cli.list:
+        for name in CHARTS:
+            print(f"{name:<24} charts/{name}.png")
+        return 0
+    if cli.dry_run:
+        print(f"backend: {cli.backend}" + (f" ({cli.snapshot_dir})" if cli.backend == "snapshot" else "")
+              + f", jobs: {cli.jobs}")
+        for name in cli.charts:
+            print(f"  {name:<24} -> charts/{name}.png")
+        if not cli.no_excel:
+            print("  export_to_excel          -> exports/valorant_report.xlsx")
+        if cli.excel_from:
+            print(f"  export_outputs_to_excel  {cli.excel_from} -> exports/")
+        if not cli.no_slider:
+            print("  dashboard                -> dashboard/index.html")
+        return 0
+
+    if cli.backend == "snapshot":
+        use_snapshot(cli.snapshot_dir)
+    if not cli.no_cache:
+        use_cache(refresh=cli.refresh)
+    prof = profiler.enable("analytics") if cli.profile or cli.profile_explain else None
+
+    if cli.jobs > 1:
+        render_all(cli.charts, jobs=cli.jobs)
+    else:
+        for name in cli.charts:
+            with profiler.item(name, "chart"):
+                globals()[name]()
+
+    if not cli.no_excel:
+        # полный сезон, потоково
+        with profiler.item("valorant_report.xlsx", "export"):
+            export_to_excel({
+                "Players": query_chunks("SELECT * FROM players_stats;"),
+                "Kills": query_chunks("SELECT * FROM kills_stats;"),
+            }, "valorant_report.xlsx")
+    if cli.excel_from:
+        with profiler.item("excel_from", "export"):
+            export_outputs_to_excel(cli.excel_from)
+
+    if not cli.no_slider:
+        # слайдер по годам: статическая страница вместо fig.show(), пересобираются только изменённые кадры
+        import dashboard
+        with profiler.item("dashboard", "dashboard"):
+            dashboard.build_dashboard(backend="snapshot" if _snapshot is not None else "mysql")
+
+    if prof is not None:
+        if cli.profile_explain:
+            conn = _snapshot if _snapshot is not None else get_engine().raw_connection()
+            # общий запрос графиков по игрокам — один план
+            queries = {}
+            for name in cli.charts:
+                queries.setdefault(CHART_SPECS[name][0], "players_stats" if name in STATS_CHARTS else name)
+            profiler.explain_all(prof, conn, [(name, sql, None) for sql, name in queries.items()])
+            if conn is not _snapshot:
+                conn.close()
+        os.makedirs("charts", exist_ok=True)
+        profiler.report(prof, os.path.join("charts", f"profile_{time.strftime('%Y%m%d_%H%M%S')}.json"))
+    return 0
 
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark every main.py report and analytics.py chart on synthetic data at several scales.
+
+Runs against the snapshot backend (Parquet + DuckDB) as a local database stand-in, records
+wall time, rows returned and peak Python heap (tracemalloc; DuckDB's native buffers are not
+included) per item and scale, and writes a long results table plus a wall-time comparison.
+With --baseline, items slower than the previous run by more than --tolerance fail the run.
+"""
+
+import os
+import time
+import argparse
+import tracemalloc
+import datetime as dt
+from contextlib import contextmanager, redirect_stdout
+from typing import Callable, List, Optional, Sequence
+
+import pandas as pd
+
+import engine
+import reports
+import snapshot
+import synth
+
+def measure(fn: Callable) -> dict:
+    # timed run first, then a traced run for the heap peak (tracemalloc slows pandas down a lot)
+    t0 = time.perf_counter()
+    result = fn()
+    wall = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if isinstance(result, dict):
+        rows = sum(len(df) for df in result.values())
+    else:
+        rows = len(result) if result is not None else None
+    return {"wall_s": round(wall, 4), "rows": rows, "peak_mb": round(peak / 2**20, 2)}
+
+@contextmanager
+def _cwd(path: str):
+    prev = os.getcwd()
+    os.makedirs(os.path.join(path, "charts"), exist_ok=True)
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(prev)
+
+def bench_scale(data_dir: str, work_dir: str, scale: int, min_matches: int, top_n: int,
+                with_charts: bool = True) -> List[dict]:
+    from main import run_query
+
+    results = []
+    conn = snapshot.connect(data_dir)
+
+    values = reports.knobs(min_matches, top_n)
+    for name, report in reports.REPORTS.items():
+        params = reports.bind(report, values)
+        results.append({"scale": scale, "kind": "report", "item": name,
+                        **measure(lambda: run_query(conn, report.sql, params))})
+
+    results.append({"scale": scale, "kind": "engine", "item": "base_scan",
+                    **measure(lambda: run_query(conn, engine.BASE_SQL))})
+    base = run_query(conn, engine.BASE_SQL)
+    results.append({"scale": scale, "kind": "engine", "item": "build_all",
+                    **measure(lambda: engine.build_reports(base, engine.REPORTS, min_matches, top_n))})
+    conn.close()
+
+    if with_charts:
+        import matplotlib
+        matplotlib.use("Agg")
+        import analytics
+
+        analytics.use_snapshot(os.path.abspath(data_dir))
+        with _cwd(work_dir), open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            for chart in analytics.CHARTS:
+                results.append({"scale": scale, "kind": "chart", "item": chart,
+                                **measure(getattr(analytics, chart))})
+    return results
+
+def compare(results: pd.DataFrame, baseline: pd.DataFrame, tolerance: float) -> pd.DataFrame:
+    keys = ["scale", "kind", "item"]
+    merged = results.merge(baseline[keys + ["wall_s"]], on=keys, how="left", suffixes=("", "_baseline"))
+    merged["ratio"] = (merged["wall_s"] / merged["wall_s_baseline"]).round(2)
+    merged["regression"] = merged["ratio"] > 1 + tolerance
+    return merged
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    p = argparse.ArgumentParser(description="Benchmark reports and charts on synthetic data")
+    p.add_argument("--scales", default="1,10,100", help="Comma-separated scale factors (x one season)")
+    p.add_argument("--data-dir", default=os.path.join("bench", "data"), help="Where synthetic snapshots are cached")
+    p.add_argument("--outdir", default="bench", help="Root directory for results")
+    p.add_argument("--min-matches", type=int, default=2)
+    p.add_argument("--top-n", type=int, default=20)
+    p.add_argument("--no-charts", action="store_true", help="Only benchmark main.py reports")
+    p.add_argument("--baseline", default=None, help="Previous results.csv to compare against")
+    p.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    scales = [int(x) for x in args.scales.split(",") if x.strip()]
+    out_root = os.path.join(args.outdir, dt.datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(out_root, exist_ok=True)
+
+    results: List[dict] = []
+    for scale in scales:
+        data_dir = os.path.join(args.data_dir, f"synth_{scale}x")
+        if not os.path.exists(os.path.join(data_dir, "kills.parquet")):
+            print(f"[gen] scale {scale}x -> {data_dir}")
+            synth.generate(data_dir, scale)
+        print(f"[bench] scale {scale}x")
+        results += bench_scale(data_dir, out_root, scale, args.min_matches, args.top_n, not args.no_charts)
+
+    df = pd.DataFrame(results)
+    df.to_csv(os.path.join(out_root, "results.csv"), index=False, encoding="utf-8")
+
+    table = df.pivot_table(index=["kind", "item"], columns="scale", values="wall_s", sort=False)
+    table.columns = [f"{c}x_wall_s" for c in table.columns]
+    table.to_csv(os.path.join(out_root, "comparison.csv"), encoding="utf-8")
+    print(table.to_string())
+
+    status = 0
+    if args.baseline:
+        cmp = compare(df, pd.read_csv(args.baseline), args.tolerance)
+        cmp.to_csv(os.path.join(out_root, "vs_baseline.csv"), index=False, encoding="utf-8")
+        slow = cmp[cmp["regression"]]
+        if not slow.empty:
+            print("\n[regressions]")
+            print(slow[["scale", "kind", "item", "wall_s_baseline", "wall_s", "ratio"]].to_string(index=False))
+            status = 1
+    print(f"\nDone. Results saved to: {out_root}")
+    return status
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single entry point for every tool in src/: `python src/cli.py <command> [args...]`.
+
+Only the selected command's module is imported, and its arguments are passed through to
+that module's main(). `report` and `charts` answer --list / --dry-run without loading
+pandas, matplotlib or a database driver, so cron wrappers and shell completion stay fast.
+"""
+
+import sys
+import importlib
+from typing import Optional, Sequence
+
+# command -> (module in src/, summary)
+COMMANDS = {
+    "report": ("main", "SQL reports to CSV (--list, --dry-run)"),
+    "latest": ("manifest", "Path of the newest finished output of a report (runs.jsonl)"),
+    "serve": ("server", "Serve the reports as JSON from in-memory aggregates"),
+    "charts": ("analytics", "Matplotlib charts, Excel export, plotly slider (--list, --dry-run)"),
+    "import": ("importer", "Load CSV files into MySQL with ingest-time typing"),
+    "shards": ("shards", "Refresh the per-tournament partial aggregates (--engine shards)"),
+    "sketches": ("sketches", "Error and time of sketched vs exact matches_played (--approx-matches)"),
+    "rollups": ("rollups", "Refresh the incremental rollup tables"),
+    "mviews": ("mviews", "Materialize v_maps / v_kills / v_games into typed tables"),
+    "ratings": ("ratings", "Team Elo ratings overall and per map (incremental checkpoints)"),
+    "h2h": ("h2h", "Head-to-head matrix: nemesis, victims, X vs Y (memory-mapped)"),
+    "consistency": ("consistency", "Kills consistency from streaming moments (merge, rolling window)"),
+    "snapshot": ("snapshot", "Dump tables to a local Parquet snapshot"),
+    "indexes": ("indexes", "Create report-matched indexes, compare EXPLAIN ANALYZE"),
+    "synth": ("synth", "Generate a synthetic snapshot"),
+    "bench": ("bench", "Benchmark reports and charts on synthetic data"),
+    "dashboard": ("dashboard", "Build the static agent pick-rate dashboard (incremental)"),
+}
+
+# shorthand command -> command + preset arguments
+ALIASES = {
+    "render-all": ["charts", "--no-excel", "--no-slider"],
+}
+
+def usage() -> str:
+    lines = ["usage: cli.py <command> [args...]   (cli.py <command> --help for its options)", "", "commands:"]
+    lines += [f"  {name:<12} {summary}" for name, (_, summary) in COMMANDS.items()]
+    lines += [f"  {name:<12} = {' '.join(args)}" for name, args in ALIASES.items()]
+    return "\n".join(lines)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0
+    if argv[0] == "--list":
+        print("\n".join([*COMMANDS, *ALIASES]))
+        return 0
+    if argv[0] in ALIASES:
+        argv = ALIASES[argv[0]] + argv[1:]
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"unknown command {command!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+    module = importlib.import_module(COMMANDS[command][0])
+    return module.main(rest) or 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kill-consistency statistics from streaming moments instead of AVG/STDDEV_SAMP over history.
+
+Each (scope, key, player) keeps count, mean and M2 (sum of squared deviations) in
+`rollup_player_moments`, maintained by rollups.refresh_rollups. Accumulators of several
+tournaments or maps merge exactly (Chan), so e.g. a season is the merge of its tournaments;
+adding or removing a value is an O(1) Welford update. Rolling windows (last N matches per player) slide a Moments
+over the per-match totals in `rollup_player_match`, never touching `kills`.
+"""
+
+from __future__ import annotations
+
+import os
+import math
+import argparse
+import datetime as dt
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# ---------- Moments ----------
+
+class Moments:
+    """Count, mean and M2 of a stream of values (Welford); add/remove/merge are O(1)."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.n, self.mean, self.m2 = int(n), float(mean), float(m2)
+
+    @classmethod
+    def of(cls, values: Iterable[float]) -> "Moments":
+        m = cls()
+        for x in values:
+            m.add(x)
+        return m
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x: float) -> None:
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        self.n -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.n
+        self.m2 = max(self.m2 - delta * (x - self.mean), 0.0)
+
+    def merge(self, other: "Moments") -> None:
+        # Chan et al.: exact for any split of the stream
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+
+    def subtract(self, other: "Moments") -> None:
+        # inverse of merge: the moments of this stream without `other`'s values
+        if other.n == 0:
+            return
+        n = self.n - other.n
+        if n <= 0:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        mean = (self.n * self.mean - other.n * other.mean) / n
+        delta = other.mean - mean
+        self.m2 = max(self.m2 - other.m2 - delta * delta * n * other.n / self.n, 0.0)
+        self.mean, self.n = mean, n
+
+    def std(self) -> Optional[float]:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None
+
+    def cv(self) -> Optional[float]:
+        std = self.std()
+        return None if std is None or self.mean == 0 else std / self.mean
+
+class Rolling:
+    """Moments of the last `window` values."""
+
+    __slots__ = ("window", "values", "moments")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: Deque[float] = deque()
+        self.moments = Moments()
+
+    def push(self, x: float) -> None:
+        self.values.append(x)
+        self.moments.add(x)
+        if len(self.values) > self.window:
+            self.moments.remove(self.values.popleft())
+
+# ---------- Store ----------
+
+SQL_STORE = """
+    SELECT scope_key, player, n, mean, m2
+    FROM rollup_player_moments
+    WHERE scope = %s
+"""
+
+# per-match totals in the order matches were applied; match ids break ties within one refresh
+SQL_MATCH_SERIES = """
+    SELECT p.player, p.kills
+    FROM rollup_player_match p
+    JOIN (
+      SELECT match_name, MIN(applied_at) AS applied_at
+      FROM rollup_watermark
+      GROUP BY match_name
+    ) w ON w.match_name = p.match_name
+    {ids_join}
+    WHERE p.match_name <> ''
+    ORDER BY w.applied_at, {ids_order}p.match_name
+"""
+
+SQL_IDS_JOIN = """
+    LEFT JOIN (
+      SELECT match_name, MIN(match_id) AS match_id
+      FROM tournaments_stages_matches_games_ids
+      GROUP BY match_name
+    ) ids ON ids.match_name = p.match_name
+"""
+
+def load_moments(conn, scope: str) -> pd.DataFrame:
+    from main import run_query
+
+    return run_query(conn, SQL_STORE, (scope,))
+
+def merge_moments(df: pd.DataFrame, by: Sequence[str] = ("player",)) -> pd.DataFrame:
+    """Merge (n, mean, m2) rows per `by` group: the moments of the union of their samples."""
+    keys = list(by)
+    df = df.assign(nx=df["n"] * df["mean"])
+    g = df.groupby(keys, sort=False)
+    mean = g["nx"].transform("sum") / g["n"].transform("sum")
+    # m2 = sum(m2_i) + sum(n_i * (mean_i - mean)^2), with the merged mean broadcast back to the rows
+    rows = df[keys + ["n", "nx"]].assign(m2=df["m2"] + df["n"] * (df["mean"] - mean) ** 2)
+    out = rows.groupby(keys, sort=False)[["n", "nx", "m2"]].sum().reset_index()
+    out["mean"] = out["nx"] / out["n"]
+    return out[keys + ["n", "mean", "m2"]]
+
+def rolling_moments(rows: Iterable[Tuple[str, float]], window: int) -> Dict[str, Moments]:
+    """Moments of each player's last `window` values from (player, value) rows in time order."""
+    state: Dict[str, Rolling] = {}
+    for player, x in rows:
+        r = state.get(player)
+        if r is None:
+            r = state[player] = Rolling(window)
+        r.push(float(x))
+    return {player: r.moments for player, r in state.items()}
+
+def load_rolling(conn, window: int) -> pd.DataFrame:
+    import pandas as pd
+
+    cur = conn.cursor()
+    cur.execute("SHOW TABLES LIKE 'tournaments_stages_matches_games_ids'")
+    has_ids = cur.fetchone() is not None
+    cur.close()
+    sql = SQL_MATCH_SERIES.format(ids_join=SQL_IDS_JOIN if has_ids else "",
+                                  ids_order="ids.match_id, " if has_ids else "")
+    cur = conn.cursor()
+    cur.execute(sql)
+    moments = rolling_moments(cur, window)
+    cur.close()
+    return pd.DataFrame(
+        [(player, m.n, m.mean, m.m2) for player, m in moments.items()],
+        columns=["player", "n", "mean", "m2"],
+    )
+
+def consistency_table(df: pd.DataFrame, by: Sequence[str] = ("player",)) -> pd.DataFrame:
+    """Same columns and rounding as the SQL consistency report."""
+    import numpy as np
+    from engine import _round
+
+    out = df[list(by)].copy()
+    out["matches_played"] = df["n"].astype("int64")
+    out["avg_kills"] = _round(df["mean"], 2)
+    std = np.sqrt(df["m2"].clip(lower=0) / (df["n"] - 1)).where(df["n"] > 1)
+    out["std_kills"] = _round(std, 2)
+    out["coeff_var"] = _round((out["std_kills"] / out["avg_kills"]).where(out["avg_kills"] != 0), 3)
+    return out
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    from main import add_db_args
+
+    p = argparse.ArgumentParser(description="Consistency (kills CV) from the streaming moments store")
+    add_db_args(p)
+    p.add_argument("--scope", choices=["all", "tournament", "map"], default="all",
+                   help="tournament/map: one ranking per tournament or map")
+    p.add_argument("--key", default=None,
+                   help="Regex over tournament/map names: merge the matching ones into one ranking (e.g. a season)")
+    p.add_argument("--window", type=int, default=None, help="Rolling consistency over each player's last N matches")
+    p.add_argument("--refresh-rollups", action="store_true", help="Fold newly imported matches in first")
+    p.add_argument("--min-matches", type=int, default=2)
+    p.add_argument("--top-n", type=int, default=20)
+    p.add_argument("--outdir", default="outputs")
+    args = p.parse_args(argv)
+    if args.window is not None and (args.window < 2 or args.scope != "all" or args.key):
+        p.error("--window needs N >= 2 and --scope all without --key")
+    return args
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from main import open_conn, show_df, write_df
+    import rollups
+
+    args = parse_args(argv)
+    conn = open_conn(args)
+    if args.refresh_rollups:
+        print(f"[rollups] {rollups.refresh_rollups(conn)} new, changed or removed matches applied")
+
+    if args.window:
+        df, by, name = load_rolling(conn, args.window), ["player"], f"consistency_last{args.window}"
+    else:
+        df = load_moments(conn, args.scope)
+        if args.scope == "all":
+            by, name = ["player"], "consistency"
+        elif args.key:
+            # e.g. --scope tournament --key 2023: one ranking over that season's tournaments
+            df = merge_moments(df[df["scope_key"].str.contains(args.key, regex=True)], by=["player"])
+            by, name = ["player"], f"consistency_{args.scope}_merged"
+        else:
+            by, name = ["scope_key", "player"], f"consistency_{args.scope}"
+    conn.close()
+
+    table = consistency_table(df, by)
+    table = table[table["matches_played"] >= args.min_matches]
+    groups = by[:-1]
+    table = table.sort_values(groups + ["coeff_var", "avg_kills"], ascending=[True] * len(groups) + [True, False],
+                              na_position="first", kind="mergesort")
+    if groups:
+        table = table.groupby(groups, sort=False).head(args.top_n)
+        table = table.rename(columns={"scope_key": "tournament" if args.scope == "tournament" else "map_name"})
+    else:
+        table = table.head(args.top_n)
+
+    out_root = os.path.join(args.outdir, dt.datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(out_root, exist_ok=True)
+    show_df(table, name, write_df(table, out_root, name))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
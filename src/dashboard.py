@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agent pick-rate dashboard: a static, self-contained HTML page (plus the JSON bundle it embeds)
+replacing analytics.plotly_time_slider's fig.show(), so it can be built on a headless server.
+
+Frames are pre-aggregated per year (tournament x stage x agent) and stored dictionary-encoded:
+tournaments, stages and agents are index arrays into shared lists, pick rates are integers in
+1/100 of a percent. The page decodes them into one trace per role (analytics.ROLES) per frame.
+
+Rebuilds are incremental: a per-tournament fingerprint of `agents_pick_rates` (row count and
+a per-row content checksum) is kept in the bundle, and only the years containing a changed, new or removed
+tournament are re-queried. Dictionaries are append-only, so untouched frames stay valid.
+"""
+
+import os
+import re
+import json
+import argparse
+import datetime as dt
+from typing import Dict, List, Optional, Sequence
+
+import analytics
+
+DEFAULT_DIR = "dashboard"
+BUNDLE = "agents.json"
+PAGE = "index.html"
+SCALE = 100  # pick rate stored as int(rate * SCALE)
+NO_YEAR = "n/a"
+OTHER_ROLE = "Other"
+
+SQL_FINGERPRINTS = """
+    SELECT Tournament,
+           COUNT(*) AS n,
+           SUM({checksum}) AS checksum
+    FROM agents_pick_rates
+    GROUP BY Tournament
+    """
+
+# order-independent sum of per-row hashes: catches edits that keep the row count (a relabelled stage)
+CHECKSUM = {
+    "mysql": "CRC32(JSON_ARRAY(Stage, Agent, `Pick Rate`))",
+    "snapshot": "hash(Stage, Agent, `Pick Rate`) % 4294967296",
+}
+
+SQL_FRAMES = """
+    SELECT Tournament, Stage, Agent, AVG(`Pick Rate`) AS avg_pick_rate
+    FROM agents_pick_rates
+    {where}
+    GROUP BY Tournament, Stage, Agent
+    """
+
+# ---------- Bundle ----------
+
+def year_of(tournament: str) -> str:
+    m = re.search(r"(\d{4})", tournament or "")
+    return m.group(1) if m else NO_YEAR
+
+def _fingerprint(row) -> str:
+    return f"{int(row.n)}|{int(row.checksum or 0)}"
+
+def _index(values: List[str], lookup: Dict[str, int], value: str) -> int:
+    if value not in lookup:
+        lookup[value] = len(values)
+        values.append(value)
+    return lookup[value]
+
+def empty_bundle() -> dict:
+    return {
+        "version": 1, "scale": SCALE, "title": "Популярность агентов по стадиям (слайдер по годам)",
+        "tournaments": [], "stages": [], "agents": [], "frames": {}, "sources": {},
+    }
+
+def load_bundle(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, BUNDLE), encoding="utf-8") as f:
+            bundle = json.load(f)
+        return bundle if bundle.get("version") == 1 else empty_bundle()
+    except (OSError, ValueError):
+        return empty_bundle()
+
+def _roles(bundle: dict) -> None:
+    # roles are derived, not incremental: recomputed for the current agent list
+    names = list(analytics.ROLES) + [OTHER_ROLE]
+    role_of = {agent.lower(): i for i, agents in enumerate(analytics.ROLES.values()) for agent in agents}
+    bundle["role_names"] = names
+    bundle["agent_role"] = [role_of.get(a.lower(), len(names) - 1) for a in bundle["agents"]]
+
+def update_bundle(bundle: dict, full: bool = False, backend: str = "mysql") -> List[str]:
+    """Re-query the frames whose source rows changed; returns the rebuilt years."""
+    fp = analytics.run_query(SQL_FINGERPRINTS.replace("{checksum}", CHECKSUM[backend]))
+    current = {str(row.Tournament): _fingerprint(row) for row in fp.itertuples(index=False)}
+    previous = {} if full else bundle["sources"]
+    if full:
+        bundle.update({k: v for k, v in empty_bundle().items() if k in ("tournaments", "stages", "agents", "frames")})
+
+    changed = {t for t in current.keys() | previous.keys() if current.get(t) != previous.get(t)}
+    years = sorted({year_of(t) for t in changed})
+    if not years:
+        return []
+    frame_tournaments = [t for t in current if year_of(t) in years]
+
+    if not frame_tournaments:
+        df = None
+    elif len(frame_tournaments) == len(current):
+        df = analytics.run_query(SQL_FRAMES.format(where=""))
+    else:
+        marks = ", ".join(["%s"] * len(frame_tournaments))
+        df = analytics.run_query(SQL_FRAMES.format(where=f"WHERE Tournament IN ({marks})"), frame_tournaments)
+
+    lookups = {key: {v: i for i, v in enumerate(bundle[key])} for key in ("tournaments", "stages", "agents")}
+    frames = {year: {"tournament": [], "stage": [], "agent": [], "rate": []} for year in years}
+    if df is not None:
+        df = df.sort_values(["Tournament", "Stage", "Agent"], kind="mergesort")
+        for row in df.itertuples(index=False):
+            if row.avg_pick_rate is None or row.avg_pick_rate != row.avg_pick_rate:  # NULL / NaN
+                continue
+            frame = frames[year_of(str(row.Tournament))]
+            frame["tournament"].append(_index(bundle["tournaments"], lookups["tournaments"], str(row.Tournament)))
+            frame["stage"].append(_index(bundle["stages"], lookups["stages"], str(row.Stage)))
+            frame["agent"].append(_index(bundle["agents"], lookups["agents"], str(row.Agent)))
+            frame["rate"].append(int(round(float(row.avg_pick_rate) * SCALE)))
+
+    for year, frame in frames.items():
+        if frame["rate"]:
+            bundle["frames"][year] = frame
+        else:
+            bundle["frames"].pop(year, None)
+    bundle["sources"] = current
+    _roles(bundle)
+    bundle["max_rate"] = max((max(f["rate"]) for f in bundle["frames"].values() if f["rate"]), default=0) / SCALE
+    bundle["built_at"] = dt.datetime.now().isoformat(timespec="seconds")
+    return years
+
+# ---------- Page ----------
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+__PLOTLYJS__
+</head>
+<body style="margin:0;font-family:sans-serif">
+<div id="chart" style="width:100%;height:96vh"></div>
+<script type="application/json" id="bundle">__BUNDLE__</script>
+<script>
+const B = JSON.parse(document.getElementById("bundle").textContent);
+const years = Object.keys(B.frames).sort();
+const sizeref = Math.max(B.max_rate, 1) / 900;
+
+function traces(year) {
+  const f = B.frames[year];
+  const parts = B.role_names.map(() => ({x: [], y: [], text: []}));
+  for (let i = 0; i < f.rate.length; i++) {
+    const p = parts[B.agent_role[f.agent[i]]];
+    p.x.push(B.stages[f.stage[i]]);
+    p.y.push(f.rate[i] / B.scale);
+    p.text.push(B.agents[f.agent[i]] + " - " + B.tournaments[f.tournament[i]]);
+  }
+  return parts.map((p, r) => ({
+    type: "scatter", mode: "markers", name: B.role_names[r], x: p.x, y: p.y, text: p.text,
+    hovertemplate: "%{text}<br>%{x}: %{y:.2f}%<extra>" + B.role_names[r] + "</extra>",
+    marker: {size: p.y, sizemode: "area", sizeref: sizeref, sizemin: 3},
+  }));
+}
+
+const frames = years.map(y => ({name: y, data: traces(y)}));
+const animate = y => [[y], {mode: "immediate", frame: {duration: 400, redraw: false}, transition: {duration: 300}}];
+const layout = {
+  title: B.title,
+  xaxis: {title: "Stage", type: "category", categoryorder: "category ascending"},
+  yaxis: {title: "Pick Rate (%)", range: [0, B.max_rate * 1.1]},
+  sliders: [{currentvalue: {prefix: "Year: "}, steps: years.map(y => ({label: y, method: "animate", args: animate(y)}))}],
+  updatemenus: [{type: "buttons", showactive: false, x: 0, y: -0.12, xanchor: "right", buttons: [
+    {label: "Play", method: "animate", args: [null, {fromcurrent: true, frame: {duration: 800, redraw: false}}]},
+    {label: "Pause", method: "animate", args: [[null], {mode: "immediate"}]},
+  ]}],
+};
+if (frames.length) {
+  Plotly.newPlot("chart", frames[0].data, layout).then(() => Plotly.addFrames("chart", frames));
+}
+</script>
+</body>
+</html>
+"""
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def render_page(bundle: dict, plotlyjs: str = "inline") -> str:
+    if plotlyjs == "inline":
+        from plotly.offline import get_plotlyjs
+        script = f"<script>{get_plotlyjs()}</script>"
+    else:
+        script = '<script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>'
+    payload = json.dumps(bundle, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+    return (PAGE_TEMPLATE.replace("__TITLE__", bundle["title"])
+            .replace("__PLOTLYJS__", script)
+            .replace("__BUNDLE__", payload))
+
+def build_dashboard(out_dir: str = DEFAULT_DIR, full: bool = False, plotlyjs: str = "inline",
+                    backend: str = "mysql") -> str:
+    """Update <out_dir>/agents.json and <out_dir>/index.html; returns the page path."""
+    os.makedirs(out_dir, exist_ok=True)
+    bundle = load_bundle(out_dir)
+    years = update_bundle(bundle, full=full, backend=backend)
+    page = os.path.join(out_dir, PAGE)
+    if years or not os.path.exists(page):
+        _write_atomic(os.path.join(out_dir, BUNDLE), json.dumps(bundle, ensure_ascii=False, separators=(",", ":")))
+        _write_atomic(page, render_page(bundle, plotlyjs))
+    rows = sum(len(f["rate"]) for f in bundle["frames"].values())
+    print(f"[OK] Dashboard: {len(bundle['frames'])} frames, {rows} points, "
+          f"rebuilt: {', '.join(years) if years else 'nothing changed'} -> {page}")
+    return page
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    p = argparse.ArgumentParser(description="Build the static agent pick-rate dashboard (incremental)")
+    p.add_argument("--backend", choices=["mysql", "snapshot"], default="mysql")
+    p.add_argument("--snapshot-dir", default="snapshots")
+    p.add_argument("--no-cache", action="store_true", help="Always query the database")
+    p.add_argument("--out-dir", default=DEFAULT_DIR)
+    p.add_argument("--full", action="store_true", help="Rebuild every frame")
+    p.add_argument("--plotlyjs", choices=["inline", "cdn"], default="inline",
+                   help="inline: fully offline page (~4 MB); cdn: load plotly.js from the CDN")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.backend == "snapshot":
+        analytics.use_snapshot(args.snapshot_dir)
+    if not args.no_cache:
+        analytics.use_cache()
+    build_dashboard(args.out_dir, full=args.full, plotlyjs=args.plotlyjs, backend=args.backend)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
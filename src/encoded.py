@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dictionary-encoded loader for `kills` and `players_stats`: name columns become ordered
+Categoricals (int codes + one copy of each name) and integral metrics int32 unless they need
+int64, so a full history takes a fraction of the memory of object columns and groups faster.
+
+Player, team, tournament, stage, match and map dictionaries are seeded from `players_ids`,
+`teams_ids` and `tournaments_stages_matches_games_ids`; names missing there are appended as
+they are met. Rows are read in chunks and encoded immediately, so the per-row Python strings
+of one chunk are the most that is ever alive. Categories are sorted, so sorting or taking
+MAX() of a column orders by name as before; to_csv / to_json write the names back.
+Group with observed=True, as engine.py does.
+"""
+
+from __future__ import annotations
+
+import time
+import argparse
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CHUNK_ROWS = 100_000
+
+# dictionary -> names known from the id tables
+SEEDS = {
+    "player": "SELECT DISTINCT `Player` FROM players_ids WHERE `Player` IS NOT NULL",
+    "team": "SELECT DISTINCT `Team` FROM teams_ids WHERE `Team` IS NOT NULL",
+    "tournament": "SELECT DISTINCT tournament FROM tournaments_stages_matches_games_ids WHERE tournament IS NOT NULL",
+    "stage": "SELECT DISTINCT stage FROM tournaments_stages_matches_games_ids WHERE stage IS NOT NULL",
+    "match": "SELECT DISTINCT match_name FROM tournaments_stages_matches_games_ids WHERE match_name IS NOT NULL",
+    "map": "SELECT DISTINCT map FROM tournaments_stages_matches_games_ids WHERE map IS NOT NULL",
+}
+
+# table -> column -> shared dictionary; other text columns get a dictionary of their own
+COLUMNS = {
+    "kills": {
+        "Tournament": "tournament", "Stage": "stage", "Match Name": "match", "Map": "map",
+        "Player Team": "team", "Player": "player", "Enemy Team": "team", "Enemy": "player",
+    },
+    "players_stats": {
+        "Tournament": "tournament", "Stage": "stage", "Player": "player", "Teams": "team",
+    },
+}
+
+# ---------- Dictionaries ----------
+
+class Dictionary:
+    """Name -> code, growing as new names are met; codes are final only via categorical()."""
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: List[str] = []
+        self.lookup: Dict[str, int] = {}
+        self.add(names)
+
+    def add(self, names: Iterable[str]) -> None:
+        for name in names:
+            if name not in self.lookup:
+                self.lookup[name] = len(self.names)
+                self.names.append(name)
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        """int32 codes, -1 for NULL."""
+        import pandas as pd
+
+        # hash each row once (factorize), then look up only the distinct names
+        local, uniques = pd.factorize(values, use_na_sentinel=True)
+        uniques = [str(v) for v in uniques]
+        self.add(uniques)
+        table = np.array([self.lookup[v] for v in uniques] + [-1], dtype=np.int32)
+        return table[local]
+
+    def categorical(self, codes: np.ndarray) -> pd.Categorical:
+        import pandas as pd
+
+        names = np.array(self.names, dtype=object)
+        order = np.argsort(names, kind="stable")
+        remap = np.empty(len(order), dtype=np.int32)
+        remap[order] = np.arange(len(order), dtype=np.int32)
+        codes = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+        return pd.Categorical.from_codes(codes, categories=pd.Index(names[order], dtype=object), ordered=True)
+
+def load_dictionaries(conn, names: Optional[Iterable[str]] = None) -> Dict[str, Dictionary]:
+    """Seed the shared dictionaries; a missing id table leaves its dictionary empty."""
+    from main import run_query
+
+    dicts = {}
+    for name in names or SEEDS:
+        try:
+            seed = run_query(conn, SEEDS[name]).iloc[:, 0]
+        except Exception as e:
+            print(f"[encoded] no seed for {name!r}: {e}")
+            seed = ()
+        dicts[name] = Dictionary(str(v) for v in seed)
+    return dicts
+
+# ---------- Columns ----------
+
+def narrow(values: pd.Series) -> pd.Series:
+    """int32, or int64 if needed, for integral values (nullable IntNN when NULLs are present).
+
+    Not narrower: metrics go through elementwise arithmetic, and int8/int16 wrap silently.
+    """
+    import pandas as pd
+
+    if values.dtype == object:
+        values = pd.to_numeric(values)
+    if values.dtype.kind == "f":
+        finite = values.dropna()
+        if len(finite) == 0 or not np.array_equal(finite, np.floor(finite)):
+            return values
+    elif values.dtype.kind not in "iu":
+        return values
+    lo, hi = (values.min(), values.max()) if values.notna().any() else (0, 0)
+    for bits in (32, 64):
+        info = np.iinfo(f"int{bits}")
+        if info.min <= lo and hi <= info.max:
+            break
+    if values.isna().any():
+        return values.astype(f"Int{bits}")
+    return values.astype(f"int{bits}")
+
+def _is_text(values: pd.Series) -> bool:
+    import pandas as pd
+
+    return values.dtype != object and pd.api.types.is_string_dtype(values) or (
+        values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty")
+    )
+
+def encode_frame(df: pd.DataFrame, columns: Optional[Dict[str, str]] = None,
+                 dicts: Optional[Dict[str, Dictionary]] = None) -> pd.DataFrame:
+    """Encode text columns of an in-memory frame (shared dictionaries where `columns` maps them).
+
+    Only integer-typed metric columns are narrowed, so floats and decimals print as before.
+    """
+    import pandas as pd
+
+    columns, dicts = columns or {}, dicts if dicts is not None else {}
+    out = {}
+    for col in df.columns:
+        values = df[col]
+        if _is_text(values):
+            d = dicts.setdefault(columns.get(col, col), Dictionary())
+            out[col] = d.categorical(d.encode(values))
+        elif values.dtype.kind in "iu":
+            out[col] = narrow(values)
+        else:
+            out[col] = values
+    return pd.DataFrame(out, index=df.index)
+
+# ---------- Loader ----------
+
+def read_encoded(conn, sql: str, columns: Dict[str, str], dicts: Dict[str, Dictionary],
+                 chunk_rows: int = CHUNK_ROWS) -> pd.DataFrame:
+    """Run `sql` and encode chunk by chunk: text -> dictionary codes, numbers -> narrow ints."""
+    import pandas as pd
+    from main import iter_chunks
+
+    def dictionary(col: str) -> Dictionary:
+        return dicts.setdefault(columns.get(col, col), Dictionary())
+
+    parts: Dict[str, list] = {}
+    text: Dict[str, bool] = {}
+    for chunk in iter_chunks(conn, sql, chunk_rows=chunk_rows):
+        for col in chunk.columns:
+            values = chunk[col]
+            if col not in text:
+                if col not in columns and values.isna().all():
+                    # all NULL so far: the first value decides what the column is
+                    parts.setdefault(col, []).append(values)
+                    continue
+                # numbers stay numbers, anything else is a name
+                text[col] = col in columns or pd.to_numeric(values, errors="coerce").notna().sum() < values.notna().sum()
+                pending = parts.get(col, [])
+                parts[col] = [dictionary(col).encode(p) if text[col] else pd.to_numeric(p) for p in pending]
+            if not text[col]:
+                try:
+                    parts[col].append(pd.to_numeric(values))
+                    continue
+                except (ValueError, TypeError):
+                    # a name after chunks that looked numeric: re-encode those as names
+                    text[col] = True
+                    parts[col] = [dictionary(col).encode(_numbers_as_text(p)) for p in parts[col]]
+            parts[col].append(dictionary(col).encode(values))
+
+    out = {}
+    for col, chunks in parts.items():
+        if text.get(col):
+            d = dicts[columns.get(col, col)]
+            out[col] = d.categorical(np.concatenate(chunks))
+        else:
+            # numeric, or NULL throughout
+            out[col] = narrow(pd.concat([pd.to_numeric(c) for c in chunks], ignore_index=True))
+    return pd.DataFrame(out)
+
+def _numbers_as_text(values: pd.Series) -> pd.Series:
+    """Numbers back to the names they were read from ("3", not "3.0"); NULL stays NULL."""
+    import pandas as pd
+
+    def name(v):
+        if pd.isna(v):
+            return None
+        return str(int(v)) if float(v).is_integer() else str(v)
+
+    return values.map(name).astype(object)
+
+def load_table(conn, table: str, dicts: Optional[Dict[str, Dictionary]] = None,
+               chunk_rows: int = CHUNK_ROWS) -> pd.DataFrame:
+    columns = COLUMNS.get(table, {})
+    if dicts is None:
+        dicts = load_dictionaries(conn, sorted(set(columns.values())))
+    return read_encoded(conn, f"SELECT * FROM {table}", columns, dicts, chunk_rows)
+
+def load_kills(conn, dicts: Optional[Dict[str, Dictionary]] = None) -> pd.DataFrame:
+    return load_table(conn, "kills", dicts)
+
+def load_players_stats(conn, dicts: Optional[Dict[str, Dictionary]] = None) -> pd.DataFrame:
+    return load_table(conn, "players_stats", dicts)
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    from main import add_db_args
+
+    p = argparse.ArgumentParser(description="Load tables dictionary-encoded; compare memory and groupby time")
+    add_db_args(p)
+    p.add_argument("--backend", choices=["mysql", "snapshot"], default="mysql")
+    p.add_argument("--snapshot-dir", default="snapshots")
+    p.add_argument("--tables", default="kills,players_stats")
+    p.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from main import open_backend, run_query
+
+    args = parse_args(argv)
+    conn = open_backend(args)
+    dicts = load_dictionaries(conn)
+    for table in [t.strip() for t in args.tables.split(",") if t.strip()]:
+        started = time.perf_counter()
+        plain = run_query(conn, f"SELECT * FROM {table}")
+        t_plain = time.perf_counter() - started
+        started = time.perf_counter()
+        enc = load_table(conn, table, dicts, args.chunk_rows)
+        t_enc = time.perf_counter() - started
+
+        mb = lambda df: df.memory_usage(deep=True).sum() / 2**20
+        keys = [c for c in ("Player", "Tournament") if c in enc.columns]
+        metric = next((c for c in enc.columns if enc[c].dtype.kind in "iuf"), None)
+        timings = []
+        for df in (plain, enc):
+            started = time.perf_counter()
+            if keys and metric:
+                df.groupby(keys, observed=True, sort=False)[metric].sum()
+            timings.append(time.perf_counter() - started)
+        print(f"{table}: {len(enc)} rows | memory {mb(plain):.1f} MB -> {mb(enc):.1f} MB "
+              f"| load {t_plain:.2f}s -> {t_enc:.2f}s | groupby({', '.join(keys)}) "
+              f"{timings[0] * 1e3:.0f} ms -> {timings[1] * 1e3:.0f} ms")
+    conn.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
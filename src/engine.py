@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single-scan engine: read `kills` once into a (Tournament, Match Name, Map, Player, Player Team)
+grouping and build the main.py reports from it in memory.
+"""
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# one scan of `kills`; every report below is derived from this frame
+BASE_SQL = """
+    SELECT
+      `Tournament`  AS tournament,
+      `Match Name`  AS match_name,
+      `Map`         AS map_name,
+      `Player`      AS player,
+      `Player Team` AS team,
+      SUM(COALESCE(`Player Kills`,0)) AS kills,
+      SUM(COALESCE(`Enemy Kills`,0))  AS deaths
+    FROM kills
+    GROUP BY `Tournament`, `Match Name`, `Map`, `Player`, `Player Team`;
+"""
+
+# ---------- Helpers ----------
+
+def _nonblank(s: pd.Series) -> pd.Series:
+    # SQL: col IS NOT NULL AND col <> ''
+    return s.notna() & (s != "")
+
+def _kd(kills: pd.Series, deaths: pd.Series) -> pd.Series:
+    # SQL: kills / NULLIF(deaths, 0)
+    return kills / deaths.where(deaths != 0)
+
+def _round(s: pd.Series, digits: int) -> pd.Series:
+    # SQL ROUND() rounds halves away from zero, pandas rounds them to even
+    f = 10 ** digits
+    return np.sign(s) * np.floor(s.abs() * f + 0.5) / f
+
+def _order(df: pd.DataFrame, by, ascending, nulls_first: bool = False) -> pd.DataFrame:
+    # MySQL sorts NULL as the smallest value: last for DESC keys, first for ASC keys
+    return df.sort_values(by, ascending=ascending, kind="mergesort",
+                          na_position="first" if nulls_first else "last")
+
+def _top_per(df: pd.DataFrame, part: str, by, ascending, k: int) -> pd.DataFrame:
+    # SQL: ROW_NUMBER() OVER (PARTITION BY part ORDER BY ...) <= k, ORDER BY part, rk
+    df = _order(df, [part] + list(by), [True] + list(ascending))
+    return df[df.groupby(part, sort=False, observed=True).cumcount() < k]
+
+def _group(base: pd.DataFrame, keys) -> pd.DataFrame:
+    return (
+        base.groupby(keys, dropna=False, sort=False, observed=True)
+        .agg(
+            matches_played=("match_name", "nunique"),
+            kills_total=("kills", "sum"),
+            deaths_total=("deaths", "sum"),
+        )
+        .reset_index()
+    )
+
+# ---------- Shared intermediates ----------
+
+def _per_map(base: pd.DataFrame) -> pd.DataFrame:
+    df = _group(base[_nonblank(base["map_name"])], ["map_name", "player"])
+    df["kd"] = _kd(df["kills_total"], df["deaths_total"])
+    return df
+
+def _per_match(base: pd.DataFrame) -> pd.DataFrame:
+    df = (
+        base[_nonblank(base["match_name"])]
+        .groupby(["match_name", "player"], dropna=False, sort=False, observed=True)
+        .agg(team=("team", "max"), kills_in_match=("kills", "sum"), deaths_in_match=("deaths", "sum"))
+        .reset_index()
+    )
+    df["kd"] = _kd(df["kills_in_match"], df["deaths_in_match"])
+    return df
+
+def _match_mvps(per_match: pd.DataFrame) -> pd.DataFrame:
+    df = _order(per_match, ["match_name", "kills_in_match", "deaths_in_match", "player"],
+                [True, False, True, True])
+    return df[df.groupby("match_name", sort=False, observed=True).cumcount() == 0]
+
+# ---------- Reports ----------
+
+def global_kd(base, cache, min_matches, top_n):
+    if "per_player" not in cache:
+        cache["per_player"] = _group(base, ["player"])
+    df = cache["per_player"]
+    df = df[df["matches_played"] >= min_matches].copy()
+    df["kd"] = _round(_kd(df["kills_total"], df["deaths_total"]), 3)
+    df = _order(df, ["kd", "kills_total"], [False, False]).head(top_n)
+    return df[["player", "matches_played", "kills_total", "deaths_total", "kd"]]
+
+def team_kd(base, cache, min_matches, top_n):
+    if "per_team" in cache:
+        return cache["per_team"]
+    df = (
+        base[_nonblank(base["team"])]
+        .groupby("team", sort=False, observed=True)
+        .agg(team_kills=("kills", "sum"), team_deaths=("deaths", "sum"))
+        .reset_index()
+        .rename(columns={"team": "Team"})
+    )
+    df["team_kd"] = _round(_kd(df["team_kills"], df["team_deaths"]), 3)
+    cache["per_team"] = _order(df, ["team_kd", "team_kills"], [False, False])
+    return cache["per_team"]
+
+def per_map_kd(base, cache, min_matches, top_n, k=None):
+    if "per_map" not in cache:
+        cache["per_map"] = _per_map(base)
+    df = cache["per_map"]
+    df = df[df["matches_played"] >= min_matches]
+    df = _top_per(df, "map_name", ["kd", "kills_total"], [False, False], top_n if k is None else k).copy()
+    df["kd"] = _round(df["kd"], 3)
+    return df[["map_name", "player", "matches_played", "kills_total", "deaths_total", "kd"]]
+
+def map_specialists(base, cache, min_matches, top_n):
+    return per_map_kd(base, cache, min_matches, top_n, k=min(5, top_n))
+
+def tournament_stars(base, cache, min_matches, top_n):
+    if "per_tournament" not in cache:
+        df = _group(base[_nonblank(base["tournament"])], ["tournament", "player"])
+        df["kd"] = _kd(df["kills_total"], df["deaths_total"])
+        cache["per_tournament"] = df
+    df = cache["per_tournament"]
+    df = df[df["matches_played"] >= min_matches]
+    df = _top_per(df, "tournament", ["kd", "kills_total"], [False, False], top_n).copy()
+    df["kd"] = _round(df["kd"], 3)
+    return df[["tournament", "player", "matches_played", "kills_total", "deaths_total", "kd"]]
+
+def match_mvp(base, cache, min_matches, top_n):
+    if "per_match" not in cache:
+        cache["per_match"] = _per_match(base)
+    if "mvp" not in cache:
+        df = _match_mvps(cache["per_match"]).copy()
+        df["kd"] = _round(df["kd"], 3)
+        cache["mvp"] = df[["match_name", "player", "team", "kills_in_match", "deaths_in_match", "kd"]]
+    return cache["mvp"]
+
+def mvp_leaders(base, cache, min_matches, top_n):
+    if "per_match" not in cache:
+        cache["per_match"] = _per_match(base)
+    if "mvp_counts" not in cache:
+        df = (
+            _match_mvps(cache["per_match"])
+            .groupby("player", dropna=False, sort=False, observed=True)
+            .size()
+            .reset_index(name="mvp_count")
+        )
+        cache["mvp_counts"] = _order(df, ["mvp_count", "player"], [False, True])
+    return cache["mvp_counts"].head(top_n)
+
+def consistency(base, cache, min_matches, top_n):
+    if "per_match" not in cache:
+        cache["per_match"] = _per_match(base)
+    if "per_player_kills" not in cache:
+        g = cache["per_match"].groupby("player", dropna=False, sort=False, observed=True)["kills_in_match"]
+        df = pd.DataFrame({
+            "matches_played": g.size(),
+            "avg_kills": _round(g.mean(), 2),
+            "std_kills": _round(g.std(ddof=1), 2),
+        }).reset_index()
+        df["coeff_var"] = _round((df["std_kills"] / df["avg_kills"].where(df["avg_kills"] != 0)), 3)
+        cache["per_player_kills"] = df
+    df = cache["per_player_kills"]
+    df = df[df["matches_played"] >= min_matches]
+    return _order(df, ["coeff_var", "avg_kills"], [True, False], nulls_first=True).head(top_n)
+
+def team_map_kd(base, cache, min_matches, top_n):
+    if "per_team_map" not in cache:
+        df = (
+            base[_nonblank(base["map_name"]) & _nonblank(base["team"])]
+            .groupby(["map_name", "team"], sort=False, observed=True)
+            .agg(team_kills=("kills", "sum"), team_deaths=("deaths", "sum"))
+            .reset_index()
+        )
+        df["team_kd"] = _kd(df["team_kills"], df["team_deaths"])
+        cache["per_team_map"] = df
+    df = cache["per_team_map"]
+    df = _top_per(df, "map_name", ["team_kd", "team_kills"], [False, False], top_n).copy()
+    df["team_kd"] = _round(df["team_kd"], 3)
+    return df
+
+# --run name -> builder; `nemesis` needs the Enemy column and stays on SQL
+REPORTS = {
+    "global": global_kd,
+    "team": team_kd,
+    "per_map": per_map_kd,
+    "mvp": match_mvp,
+    "tournament_stars": tournament_stars,
+    "team_map_kd": team_map_kd,
+    "map_specialists": map_specialists,
+    "mvp_leaders": mvp_leaders,
+    "consistency": consistency,
+}
+
+def build_reports(base: pd.DataFrame, names: Iterable[str], min_matches: int, top_n: int,
+                  cache: Optional[Dict[str, pd.DataFrame]] = None) -> Dict[str, pd.DataFrame]:
+    """Build the requested reports from one base grouping, sharing intermediates between them.
+
+    Intermediates do not depend on min_matches / top_n: pass the same `cache` to reuse them
+    across calls on the same `base`.
+    """
+    cache = {} if cache is None else cache
+    return {
+        name: REPORTS[name](base, cache, min_matches, top_n).reset_index(drop=True)
+        for name in names
+        if name in REPORTS
+    }
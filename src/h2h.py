@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Head-to-head matrix: player x enemy kills and deaths from `kills`, stored as CSR arrays
+(one .npy file each) that are memory-mapped on load, so lookups need no query and no parse.
+
+Rows and columns are the same player index, ordered by `players_ids.player_id` (players missing
+from `players_ids` get ids after the largest one). Within a row, enemies are sorted by index,
+so "X vs Y" is a binary search; two permutations per row (by deaths, by kills, descending)
+make "nemeses of X" and "victims of X" a slice, and top-K for every player one vectorised pass.
+Rows with a NULL `Player` or `Enemy` cannot be placed and are left out.
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import shutil
+import argparse
+import datetime as dt
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_DIR = "h2h"
+META = "meta.json"
+TABLES = ["kills", "players_ids"]
+ARRAYS = ["names", "player_ids", "name_order", "indptr", "enemies", "kills", "deaths", "by_deaths", "by_kills"]
+
+SQL_PAIRS = """
+    SELECT
+      `Player` AS player,
+      `Enemy`  AS enemy,
+      SUM(COALESCE(`Player Kills`,0)) AS kills,
+      SUM(COALESCE(`Enemy Kills`,0))  AS deaths
+    FROM kills
+    WHERE `Player` IS NOT NULL AND `Enemy` IS NOT NULL
+    GROUP BY `Player`, `Enemy`
+"""
+
+SQL_IDS = """
+    SELECT `Player` AS player, MIN(player_id) AS player_id
+    FROM players_ids
+    WHERE `Player` IS NOT NULL
+    GROUP BY `Player`
+"""
+
+# ---------- Matrix ----------
+
+class HeadToHead:
+    """CSR player x enemy matrix; `kills[p]` / `deaths[p]` are X's kills on / deaths to enemies[p]."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Optional[dict] = None):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.meta = meta or {}
+
+    @classmethod
+    def from_frames(cls, pairs: pd.DataFrame, ids: pd.DataFrame) -> "HeadToHead":
+        import pandas as pd
+
+        known = dict(zip(ids["player"].astype(str), ids["player_id"].astype("int64")))
+        players = pd.unique(pd.concat([pairs["player"], pairs["enemy"]], ignore_index=True).astype(str))
+        next_id = max(known.values(), default=0) + 1
+        extra = sorted(p for p in players if p not in known)
+        id_of = {**{p: known[p] for p in players if p in known}, **{p: next_id + i for i, p in enumerate(extra)}}
+
+        names = np.array(sorted(id_of, key=id_of.get), dtype=str)
+        player_ids = np.array([id_of[n] for n in names], dtype=np.int64)
+        index = pd.Index(names)
+        rows = index.get_indexer(pairs["player"].astype(str))
+        cols = index.get_indexer(pairs["enemy"].astype(str))
+        kills = pairs["kills"].to_numpy(dtype=np.int64)
+        deaths = pairs["deaths"].to_numpy(dtype=np.int64)
+
+        order = np.lexsort((cols, rows))
+        rows, cols, kills, deaths = rows[order], cols[order], kills[order], deaths[order]
+        indptr = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(names)), out=indptr[1:])
+
+        pos = np.int32 if len(rows) < 2**31 else np.int64
+        arrays = {
+            "names": names,
+            "player_ids": player_ids,
+            "name_order": np.argsort(names, kind="stable").astype(pos),
+            "indptr": indptr,
+            "enemies": cols.astype(np.int32),
+            "kills": kills.astype(np.int32),
+            "deaths": deaths.astype(np.int32),
+            # ties broken by enemy index, so the orders are deterministic
+            "by_deaths": np.lexsort((cols, -deaths, rows)).astype(pos),
+            "by_kills": np.lexsort((cols, -kills, rows)).astype(pos),
+        }
+        return cls(arrays)
+
+    # ---------- Lookups ----------
+
+    def row(self, player: str) -> int:
+        """Row of a player name (binary search over the sorted names); KeyError if unknown."""
+        names = self.names
+        i = int(np.searchsorted(names, player, sorter=self.name_order))
+        if i < len(names) and names[self.name_order[i]] == player:
+            return int(self.name_order[i])
+        raise KeyError(player)
+
+    def row_of_id(self, player_id: int) -> int:
+        i = int(np.searchsorted(self.player_ids, player_id))
+        if i < len(self.player_ids) and self.player_ids[i] == player_id:
+            return i
+        raise KeyError(player_id)
+
+    def vs(self, player: str, enemy: str) -> Tuple[int, int]:
+        """(kills of player on enemy, deaths of player to enemy); (0, 0) if they never met."""
+        r, c = self.row(player), self.row(enemy)
+        lo, hi = int(self.indptr[r]), int(self.indptr[r + 1])
+        p = lo + int(np.searchsorted(self.enemies[lo:hi], c))
+        if p < hi and self.enemies[p] == c:
+            return int(self.kills[p]), int(self.deaths[p])
+        return 0, 0
+
+    def _top(self, order: np.ndarray, player: str, k: int) -> List[Tuple[str, int, int]]:
+        r = self.row(player)
+        lo, hi = int(self.indptr[r]), int(self.indptr[r + 1])
+        return [(str(self.names[self.enemies[p]]), int(self.kills[p]), int(self.deaths[p]))
+                for p in order[lo:min(hi, lo + k)]]
+
+    def nemeses(self, player: str, k: int = 1) -> List[Tuple[str, int, int]]:
+        """Top-k enemies by deaths of `player`: (enemy, kills_on_enemy, deaths_from_enemy)."""
+        return self._top(self.by_deaths, player, k)
+
+    def victims(self, player: str, k: int = 1) -> List[Tuple[str, int, int]]:
+        """Top-k enemies by kills of `player`: (enemy, kills_on_enemy, deaths_from_enemy)."""
+        return self._top(self.by_kills, player, k)
+
+    # ---------- Batch ----------
+
+    def top_k(self, k: int, by: str = "deaths") -> pd.DataFrame:
+        """Top-k nemeses (by="deaths") or victims (by="kills") of every player, ranked."""
+        import pandas as pd
+
+        order = np.asarray(self.by_deaths if by == "deaths" else self.by_kills)
+        indptr = np.asarray(self.indptr)
+        counts = np.diff(indptr)
+        rows = np.repeat(np.arange(len(counts)), counts)
+        rank = np.arange(len(order)) - indptr[rows]
+        keep = rank < k
+        pos = order[keep]
+        return pd.DataFrame({
+            "player": self.names[rows[keep]],
+            "rank": rank[keep] + 1,
+            "enemy": self.names[self.enemies[pos]],
+            "deaths_from_enemy": self.deaths[pos],
+            "kills_on_enemy": self.kills[pos],
+        })
+
+    def top_pairs(self, n: int) -> pd.DataFrame:
+        """Global top-n (player, enemy) pairs by deaths, as the `nemesis` report."""
+        import pandas as pd
+
+        deaths = np.asarray(self.deaths)
+        n = min(n, len(deaths))
+        pos = np.argpartition(-deaths, n - 1)[:n] if n else np.array([], dtype=np.int64)
+        pos = pos[np.argsort(-deaths[pos], kind="stable")]
+        rows = np.searchsorted(np.asarray(self.indptr), pos, side="right") - 1
+        return pd.DataFrame({
+            "player": self.names[rows],
+            "enemy": self.names[self.enemies[pos]],
+            "deaths_from_enemy": deaths[pos],
+            "kills_on_enemy": self.kills[pos],
+        })
+
+    # ---------- Storage ----------
+
+    def save(self, out_dir: str) -> None:
+        tmp = out_dir.rstrip("/\\") + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name in ARRAYS:
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp, META), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp, out_dir)
+
+    @classmethod
+    def load(cls, out_dir: str, mmap: bool = True) -> "HeadToHead":
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(out_dir, f"{name}.npy"), mmap_mode=mode) for name in ARRAYS}
+        with open(os.path.join(out_dir, META), encoding="utf-8") as f:
+            return cls(arrays, json.load(f))
+
+def load_meta(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, META), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def build(args) -> HeadToHead:
+    """Build from the selected backend unless `kills` / `players_ids` are unchanged since the last build."""
+    import qcache
+    from main import open_backend, run_query
+
+    conn = open_backend(args)
+    if args.backend == "snapshot":
+        versions = qcache.snapshot_versions(args.snapshot_dir, TABLES)
+    else:
+        versions = qcache.mysql_versions(conn, TABLES)
+    meta = load_meta(args.dir)
+    if not args.rebuild and meta.get("versions") == versions:
+        conn.close()
+        print(f"[h2h] up to date: {args.dir}")
+        return HeadToHead.load(args.dir)
+
+    pairs = run_query(conn, SQL_PAIRS)
+    ids = run_query(conn, SQL_IDS)
+    conn.close()
+    m = HeadToHead.from_frames(pairs, ids)
+    m.meta = {"versions": versions, "players": len(m.names), "pairs": len(m.enemies),
+              "built_at": dt.datetime.now().isoformat(timespec="seconds")}
+    m.save(args.dir)
+    print(f"[h2h] built {m.meta['players']} players, {m.meta['pairs']} pairs -> {args.dir}")
+    return HeadToHead.load(args.dir)
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    from main import add_db_args
+
+    p = argparse.ArgumentParser(description="Head-to-head matrix: nemesis, victims and X vs Y lookups")
+    add_db_args(p)
+    p.add_argument("--backend", choices=["mysql", "snapshot"], default="mysql")
+    p.add_argument("--snapshot-dir", default="snapshots")
+    p.add_argument("--dir", default=DEFAULT_DIR, help="Directory of the memory-mapped matrix")
+    p.add_argument("--build", action="store_true", help="(Re)build the matrix if its source tables changed")
+    p.add_argument("--rebuild", action="store_true", help="Rebuild even if the source tables look unchanged")
+    p.add_argument("--nemesis", metavar="PLAYER", help="Enemies PLAYER died to most")
+    p.add_argument("--victims", metavar="PLAYER", help="Enemies PLAYER killed most")
+    p.add_argument("--vs", nargs=2, metavar=("PLAYER", "ENEMY"), help="Kills and deaths of PLAYER against ENEMY")
+    p.add_argument("--all-nemeses", action="store_true", help="Top -k nemeses of every player to CSV")
+    p.add_argument("-k", type=int, default=3)
+    p.add_argument("--outdir", default="outputs")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import pandas as pd
+    from main import show_df, write_df
+
+    args = parse_args(argv)
+    if args.build or args.rebuild or not os.path.exists(os.path.join(args.dir, META)):
+        m = build(args)
+    else:
+        m = HeadToHead.load(args.dir)
+
+    def show(title: str, rows: List[Tuple[str, int, int]]) -> None:
+        df = pd.DataFrame(rows, columns=["enemy", "kills_on_enemy", "deaths_from_enemy"])
+        print(f"\n== {title} ==\n" + (df.to_string(index=False) if rows else "<empty>"))
+
+    try:
+        if args.nemesis:
+            show(f"nemesis of {args.nemesis}", m.nemeses(args.nemesis, args.k))
+        if args.victims:
+            show(f"victims of {args.victims}", m.victims(args.victims, args.k))
+        if args.vs:
+            kills, deaths = m.vs(*args.vs)
+            print(f"\n== {args.vs[0]} vs {args.vs[1]} ==\nkills {kills}, deaths {deaths}")
+    except KeyError as e:
+        print(f"unknown player {e.args[0]!r}")
+        return 1
+    if args.all_nemeses:
+        out_root = os.path.join(args.outdir, dt.datetime.now().strftime("%Y%m%d_%H%M%S"))
+        os.makedirs(out_root, exist_ok=True)
+        df = m.top_k(args.k)
+        show_df(df, "nemeses", write_df(df, out_root, f"nemeses_top{args.k}"), rows=len(df))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming importer for the VCT CSV dataset: reads each file in chunks, coerces numeric,
+percentage and duration columns once at ingest, and loads them with batched multi-row INSERTs.
+
+Re-importing is idempotent: a file whose hash is already in `import_log` is skipped, and a
+changed file replaces the partitions (tournaments) it contains inside one transaction.
+`import_partitions` records which partitions each import replaced (a NULL partition: the whole
+table), so incremental consumers such as rollups.py only re-read what changed.
+"""
+
+import os
+import re
+import hashlib
+import argparse
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+CHUNK_ROWS = 50_000
+BATCH_ROWS = 5_000
+
+# ---------- Table specs ----------
+
+# SQL type per coercion kind; columns not listed in a spec are loaded as text
+SQL_TYPES = {
+    "int": "INT",
+    "float": "DOUBLE",
+    "pct": "DECIMAL(6,2)",
+    "duration": "TIME",
+    "text": "VARCHAR(191)",
+}
+
+# file stem -> table spec. `partition` is replaced as a whole on re-import,
+# `key` (ids tables) is upserted instead, `rename` maps CSV headers to column names.
+SPECS: Dict[str, dict] = {
+    "kills": {
+        "partition": "Tournament",
+        "types": {"Player Kills": "int", "Enemy Kills": "int", "Difference": "int"},
+    },
+    "kills_stats": {
+        "partition": "Tournament",
+        "types": {
+            "2k": "int", "3k": "int", "4k": "int", "5k": "int",
+            "1v1": "int", "1v2": "int", "1v3": "int", "1v4": "int", "1v5": "int",
+            "Econ": "int", "Spike Plants": "int", "Spike Defuses": "int",
+        },
+    },
+    "players_stats": {
+        "partition": "Tournament",
+        "types": {
+            "Rounds Played": "int", "Rating": "float", "Average Combat Score": "float",
+            "Kills:Deaths": "float", "Kill, Assist, Trade, Survive %": "pct",
+            "Average Damage Per Round": "float", "Kills Per Round": "float",
+            "Assists Per Round": "float", "First Kills Per Round": "float",
+            "First Deaths Per Round": "float", "Headshot %": "pct", "Clutch Success %": "pct",
+            "Maximum Kills in a Single Map": "int",
+            "Kills": "int", "Deaths": "int", "Assists": "int",
+            "First Kills": "int", "First Deaths": "int",
+        },
+    },
+    "maps_played": {
+        "partition": "Tournament",
+        "types": {"Total Maps Played": "int"},
+    },
+    "maps_scores": {
+        "partition": "Tournament",
+        "types": {
+            "Team A Score": "int", "Team A Attacker Score": "int",
+            "Team A Defender Score": "int", "Team A Overtime Score": "int",
+            "Team B Score": "int", "Team B Attacker Score": "int",
+            "Team B Defender Score": "int", "Team B Overtime Score": "int",
+            "Duration": "duration",
+        },
+    },
+    "agents_pick_rates": {
+        "partition": "Tournament",
+        "types": {"Pick Rate": "pct"},
+    },
+    "teams_ids": {
+        "key": ["team_id"],
+        "rename": {"Team ID": "team_id"},
+        "types": {"team_id": "int"},
+    },
+    "players_ids": {
+        "key": ["player_id"],
+        "rename": {"Player ID": "player_id"},
+        "types": {"player_id": "int"},
+    },
+    "tournaments_stages_matches_games_ids": {
+        "partition": "tournament",
+        "rename": {
+            "Tournament": "tournament", "Tournament ID": "tournament_id",
+            "Stage": "stage", "Stage ID": "stage_id",
+            "Match Type": "match_type", "Match Name": "match_name",
+            "Map": "map", "Match ID": "match_id", "Game ID": "game_id",
+        },
+        "types": {"tournament_id": "int", "stage_id": "int", "match_id": "int", "game_id": "int"},
+    },
+}
+
+LOG_DDL = """
+    CREATE TABLE IF NOT EXISTS import_log (
+      file_name   VARCHAR(255) NOT NULL PRIMARY KEY,
+      table_name  VARCHAR(64)  NOT NULL,
+      sha256      CHAR(64)     NOT NULL,
+      rows_loaded INT          NOT NULL,
+      imported_at TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+"""
+
+# REPLACE gives a re-imported partition a new seq; readers keep the last seq they consumed
+PARTITIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS import_partitions (
+      seq        BIGINT       NOT NULL AUTO_INCREMENT PRIMARY KEY,
+      table_name VARCHAR(64)  NOT NULL,
+      part       VARCHAR(191) NULL,
+      UNIQUE KEY ux_ip_part (table_name, part)
+    )
+"""
+
+# ---------- Coercion ----------
+
+def _to_number(s: pd.Series) -> pd.Series:
+    return pd.to_numeric(s.str.replace(",", "", regex=False).str.strip(), errors="coerce")
+
+def _to_pct(s: pd.Series) -> pd.Series:
+    return pd.to_numeric(s.str.replace("%", "", regex=False).str.strip(), errors="coerce")
+
+def _to_time(s: pd.Series) -> pd.Series:
+    # "MM:SS" or "H:MM:SS" -> "HH:MM:SS"
+    parts = s.str.strip().str.split(":", expand=True)
+    # a chunk without any "H:MM:SS" (or without any ':' at all, e.g. all NULL) splits into fewer columns
+    parts = parts.reindex(columns=range(3)).apply(pd.to_numeric, errors="coerce")
+    two = parts[2].isna()
+    secs = (parts[0] * 3600 + parts[1] * 60 + parts[2]).where(~two, parts[0] * 60 + parts[1])
+    out = secs.map(lambda v: None if pd.isna(v) else f"{int(v) // 3600:02d}:{int(v) % 3600 // 60:02d}:{int(v) % 60:02d}")
+    return out.where(s.notna(), None)
+
+COERCE = {
+    "int": lambda s: _to_number(s).round().astype("Int64"),
+    "float": _to_number,
+    "pct": _to_pct,
+    "duration": _to_time,
+}
+
+def coerce(chunk: pd.DataFrame, types: Dict[str, str]) -> pd.DataFrame:
+    for col, kind in types.items():
+        if col in chunk.columns and kind in COERCE:
+            chunk[col] = COERCE[kind](chunk[col])
+    return chunk
+
+# ---------- Reading ----------
+
+def read_chunks(path: str, spec: dict, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    reader = pd.read_csv(path, dtype=str, chunksize=chunk_rows, encoding="utf-8-sig")
+    for chunk in reader:
+        chunk.columns = [c.strip() for c in chunk.columns]
+        chunk = chunk.rename(columns=spec.get("rename", {}))
+        yield coerce(chunk, spec.get("types", {}))
+
+def file_columns(path: str, spec: dict) -> List[str]:
+    cols = [c.strip() for c in pd.read_csv(path, nrows=0, encoding="utf-8-sig").columns]
+    rename = spec.get("rename", {})
+    return [rename.get(c, c) for c in cols]
+
+def file_partitions(path: str, spec: dict) -> List[str]:
+    col = spec["partition"]
+    src = next((k for k, v in spec.get("rename", {}).items() if v == col), col)
+    values = set()
+    for chunk in pd.read_csv(path, dtype=str, usecols=lambda c: c.strip() == src,
+                             chunksize=CHUNK_ROWS, encoding="utf-8-sig"):
+        values.update(chunk.iloc[:, 0].dropna().unique())
+    return sorted(values)
+
+def sha256_of(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+# ---------- Loading ----------
+
+def _q(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+def create_table_sql(table: str, columns: Sequence[str], spec: dict) -> str:
+    types = spec.get("types", {})
+    key = spec.get("key", [])
+    defs = [
+        f"  {_q(c)} {SQL_TYPES[types.get(c, 'text')]} {'NOT NULL' if c in key else 'NULL'}"
+        for c in columns
+    ]
+    if spec.get("key"):
+        defs.append(f"  PRIMARY KEY ({', '.join(_q(c) for c in spec['key'])})")
+    if spec.get("partition"):
+        index = "ix_" + re.sub(r"\W+", "_", spec["partition"]).lower()
+        defs.append(f"  KEY {_q(index)} ({_q(spec['partition'])})")
+    return f"CREATE TABLE IF NOT EXISTS {_q(table)} (\n" + ",\n".join(defs) + "\n) DEFAULT CHARSET=utf8mb4"
+
+def insert_sql(table: str, columns: Sequence[str], spec: dict) -> str:
+    cols = ", ".join(_q(c) for c in columns)
+    marks = ", ".join(["%s"] * len(columns))
+    sql = f"INSERT INTO {_q(table)} ({cols}) VALUES ({marks})"
+    if spec.get("key"):
+        updates = ", ".join(f"{_q(c)} = VALUES({_q(c)})" for c in columns if c not in spec["key"])
+        sql += f" ON DUPLICATE KEY UPDATE {updates or _q(columns[0]) + ' = ' + _q(columns[0])}"
+    return sql
+
+def _rows(chunk: pd.DataFrame) -> List[tuple]:
+    chunk = chunk.astype(object).where(chunk.notna(), None)
+    return list(chunk.itertuples(index=False, name=None))
+
+def import_file(conn, path: str, table: str, file_name: Optional[str] = None,
+                force: bool = False, replace_schema: bool = False) -> int:
+    """Load one CSV into `table`. Returns rows loaded (0 when the file was already imported)."""
+    spec = SPECS[table]
+    file_name = file_name or os.path.basename(path)
+    digest = sha256_of(path)
+
+    cur = conn.cursor()
+    cur.execute(LOG_DDL)
+    cur.execute(PARTITIONS_DDL)
+    cur.execute("SELECT sha256 FROM import_log WHERE file_name = %s", (file_name,))
+    row = cur.fetchone()
+    if row and row[0] == digest and not force:
+        cur.close()
+        print(f"[skip] {file_name}: already imported")
+        return 0
+
+    columns = file_columns(path, spec)
+    if replace_schema:
+        cur.execute(f"DROP TABLE IF EXISTS {_q(table)}")
+    cur.execute(create_table_sql(table, columns, spec))
+
+    sql = insert_sql(table, columns, spec)
+    loaded = 0
+    blank = False
+    try:
+        if spec.get("partition"):
+            parts = file_partitions(path, spec)
+            for i in range(0, len(parts), 500):
+                batch = parts[i:i + 500]
+                cur.execute(
+                    f"DELETE FROM {_q(table)} WHERE {_q(spec['partition'])} IN ({', '.join(['%s'] * len(batch))})",
+                    batch,
+                )
+        for chunk in read_chunks(path, spec):
+            if spec.get("partition") in chunk.columns:
+                blank = blank or bool(chunk[spec["partition"]].isna().any())
+            rows = _rows(chunk[columns])
+            for i in range(0, len(rows), BATCH_ROWS):
+                cur.executemany(sql, rows[i:i + BATCH_ROWS])
+            loaded += len(rows)
+        cur.execute(
+            "INSERT INTO import_log (file_name, table_name, sha256, rows_loaded) VALUES (%s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE table_name = VALUES(table_name), sha256 = VALUES(sha256), "
+            "rows_loaded = VALUES(rows_loaded)",
+            (file_name, table, digest, loaded),
+        )
+        if spec.get("partition"):
+            # rows without a partition value are logged as '' (consumers key NULL as '')
+            logged = [None] if replace_schema else parts + ([""] if blank else [])
+            cur.executemany(
+                "REPLACE INTO import_partitions (table_name, part) VALUES (%s, %s)",
+                [(table, part) for part in logged],
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    print(f"[OK] {file_name} -> {table}: {loaded} rows")
+    return loaded
+
+def find_files(paths: Sequence[str]) -> List[tuple]:
+    """(path, table, file_name) for every CSV under `paths` whose stem names a known table."""
+    found = []
+    for root in paths:
+        if os.path.isfile(root):
+            candidates = [(root, os.path.basename(root))]
+        else:
+            candidates = [
+                (os.path.join(d, f), os.path.relpath(os.path.join(d, f), root))
+                for d, _, files in sorted(os.walk(root)) for f in sorted(files)
+            ]
+        for path, rel in candidates:
+            stem, ext = os.path.splitext(os.path.basename(path))
+            if ext.lower() == ".csv" and stem in SPECS:
+                found.append((path, stem, rel.replace(os.sep, "/")))
+    return found
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    from main import add_db_args
+
+    p = argparse.ArgumentParser(description="Import the VCT CSV dataset into MySQL with typed columns")
+    add_db_args(p)
+    p.add_argument("paths", nargs="+", help="CSV files or dataset folders (e.g. vct_2025/)")
+    p.add_argument("--force", action="store_true", help="Re-import files even if their hash is unchanged")
+    p.add_argument("--replace-schema", action="store_true",
+                   help="Drop and recreate each target table with typed columns (first load over hand-imported tables)")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from main import open_conn
+
+    args = parse_args(argv)
+    files = find_files(args.paths)
+    if not files:
+        print("No known CSV files found")
+        return 1
+
+    conn = open_conn(args)
+    recreated = set()
+    total = 0
+    for path, table, file_name in files:
+        replace = args.replace_schema and table not in recreated
+        total += import_file(conn, path, table, file_name, force=args.force or replace, replace_schema=replace)
+        recreated.add(table)
+    conn.close()
+    print(f"\nDone. {total} rows loaded from {len(files)} files")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index advisor: create composite/covering indexes matched to the GROUP BY / PARTITION BY and
+JOIN patterns of the main.py reports and analytics.py charts, and record EXPLAIN ANALYZE for
+every report before and after so plan changes (table scan + filesort -> index order) are visible.
+"""
+
+import os
+import re
+import argparse
+import datetime as dt
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# text columns loaded by hand (TEXT/BLOB) can only be indexed by prefix
+PREFIX_LEN = 64
+
+# (table, index name, columns, access path it serves)
+INDEXES: List[Tuple[str, str, List[str], str]] = [
+    ("kills", "ix_kills_player_match",
+     ["Player", "Match Name", "Player Kills", "Enemy Kills"],
+     "global, consistency: GROUP BY Player / (Player, Match Name), covering"),
+    ("kills", "ix_kills_map_player",
+     ["Map", "Player", "Match Name", "Player Kills", "Enemy Kills"],
+     "per_map, map_specialists: GROUP BY Map, Player + COUNT(DISTINCT Match Name), covering"),
+    ("kills", "ix_kills_match_player",
+     ["Match Name", "Player", "Player Team", "Player Kills", "Enemy Kills"],
+     "mvp, mvp_leaders: GROUP BY Match Name, Player + MAX(Player Team), covering; rollup refresh"),
+    ("kills", "ix_kills_tournament_player",
+     ["Tournament", "Player", "Match Name", "Player Kills", "Enemy Kills"],
+     "tournament_stars: GROUP BY Tournament, Player + COUNT(DISTINCT Match Name), covering"),
+    ("kills", "ix_kills_team_map",
+     ["Player Team", "Map", "Player Kills", "Enemy Kills"],
+     "team, team_map_kd: GROUP BY Player Team / (Map, Player Team), covering"),
+    ("kills", "ix_kills_player_enemy",
+     ["Player", "Enemy", "Player Kills", "Enemy Kills"],
+     "nemesis: GROUP BY Player, Enemy, covering"),
+    ("players_stats", "ix_ps_teams_player",
+     ["Teams", "Player"],
+     "charts: players_stats JOIN teams_ids ON Teams, GROUP BY team"),
+    ("players_stats", "ix_ps_player",
+     ["Player"],
+     "charts: players_stats JOIN players_ids ON Player"),
+    ("players_stats", "ix_ps_tournament_teams",
+     ["Tournament", "Teams"],
+     "line_maps_played: GROUP BY Tournament, Team"),
+    ("teams_ids", "ix_teams_team",
+     ["Team"],
+     "charts: join key"),
+    ("players_ids", "ix_players_player",
+     ["Player"],
+     "charts: join key"),
+    ("agents_pick_rates", "ix_apr_tournament_stage_agent",
+     ["Tournament", "Stage", "Agent", "Pick Rate"],
+     "agent charts: GROUP BY (Tournament,) Stage, Agent + AVG(Pick Rate), covering"),
+    ("maps_played", "ix_mp_map",
+     ["Map"],
+     "bar_maps_played: GROUP BY Map"),
+]
+
+# ---------- Schema ----------
+
+def _q(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+def column_types(conn, table: str) -> Dict[str, str]:
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,),
+    )
+    types = {name: dtype.lower() for name, dtype in cur.fetchall()}
+    cur.close()
+    return types
+
+def existing_indexes(conn, table: str) -> set:
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,),
+    )
+    names = {row[0] for row in cur.fetchall()}
+    cur.close()
+    return names
+
+def index_ddl(table: str, name: str, columns: Sequence[str], types: Dict[str, str]) -> str:
+    parts = []
+    for col in columns:
+        if types.get(col, "").endswith(("text", "blob")):
+            parts.append(f"{_q(col)}({PREFIX_LEN})")
+        else:
+            parts.append(_q(col))
+    return f"CREATE INDEX {_q(name)} ON {_q(table)} ({', '.join(parts)})"
+
+def planned_indexes(conn) -> List[Tuple[str, str]]:
+    """(index name, DDL) for every advised index whose table and columns exist and which is missing."""
+    plan = []
+    cache: Dict[str, Tuple[Dict[str, str], set]] = {}
+    for table, name, columns, _ in INDEXES:
+        if table not in cache:
+            cache[table] = (column_types(conn, table), existing_indexes(conn, table))
+        types, existing = cache[table]
+        if not types or name in existing or any(c not in types for c in columns):
+            continue
+        plan.append((name, index_ddl(table, name, columns, types)))
+    return plan
+
+def apply_indexes(conn, plan: List[Tuple[str, str]]) -> None:
+    cur = conn.cursor()
+    for name, ddl in plan:
+        started = dt.datetime.now()
+        cur.execute(ddl)
+        print(f"[OK] {name} ({(dt.datetime.now() - started).total_seconds():.1f}s)")
+    cur.close()
+
+def drop_indexes(conn) -> None:
+    cur = conn.cursor()
+    for table, name, _, _ in INDEXES:
+        if name in existing_indexes(conn, table):
+            cur.execute(f"DROP INDEX {_q(name)} ON {_q(table)}")
+            print(f"[dropped] {table}.{name}")
+    cur.close()
+
+# ---------- EXPLAIN ANALYZE ----------
+
+def explain_analyze(conn, sql: str, params: Sequence = ()) -> str:
+    cur = conn.cursor()
+    cur.execute("EXPLAIN ANALYZE " + sql.strip().rstrip(";"), tuple(params) or None)
+    plan = "\n".join(row[0] for row in cur.fetchall())
+    cur.close()
+    return plan
+
+def plan_summary(plan: str) -> dict:
+    root = re.search(r"actual time=[\d.]+\.\.([\d.]+)", plan)
+    return {
+        "actual_ms": float(root.group(1)) if root else None,
+        "table_scans": len(re.findall(r"-> Table scan on (?!<)", plan)),
+        "index_scans": len(re.findall(r"-> (?:Covering index|Index) (?:scan|lookup|range scan)", plan)),
+        "sorts": len(re.findall(r"-> Sort", plan)),
+        "temp_tables": len(re.findall(r"using temporary", plan, flags=re.IGNORECASE)),
+    }
+
+def record_plans(conn, queries: Dict[str, Tuple[str, Tuple]], out_dir: str) -> Dict[str, dict]:
+    """`queries`: report name -> (SQL, bound params)."""
+    os.makedirs(out_dir, exist_ok=True)
+    summary = {}
+    for name, (sql, params) in queries.items():
+        plan = explain_analyze(conn, sql, params)
+        with open(os.path.join(out_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+            f.write(plan + "\n")
+        summary[name] = plan_summary(plan)
+    return summary
+
+def write_comparison(before: Dict[str, dict], after: Dict[str, dict], path: str) -> None:
+    import pandas as pd
+
+    rows = []
+    for name in before:
+        row = {"report": name}
+        for key in ("actual_ms", "table_scans", "index_scans", "sorts", "temp_tables"):
+            row[f"{key}_before"] = before[name][key]
+            row[f"{key}_after"] = after.get(name, {}).get(key)
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    df.to_csv(path, index=False, encoding="utf-8")
+    print(df.to_string(index=False))
+    print(f"[saved] {path}")
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    from main import add_db_args
+
+    p = argparse.ArgumentParser(description="Create report-matched indexes and compare EXPLAIN ANALYZE plans")
+    add_db_args(p)
+    p.add_argument("--dry-run", action="store_true", help="Only print the CREATE INDEX statements")
+    p.add_argument("--no-explain", action="store_true", help="Skip EXPLAIN ANALYZE before/after")
+    p.add_argument("--drop", action="store_true", help="Drop the advised indexes instead of creating them")
+    p.add_argument("--min-matches", type=int, default=2)
+    p.add_argument("--top-n", type=int, default=20)
+    p.add_argument("--outdir", default="explain", help="Root directory for plans and the comparison table")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from main import open_conn
+    import reports
+
+    args = parse_args(argv)
+    conn = open_conn(args)
+
+    if args.drop:
+        drop_indexes(conn)
+        conn.close()
+        return 0
+
+    plan = planned_indexes(conn)
+    for _, ddl in plan:
+        print(ddl + ";")
+    if args.dry_run or not plan:
+        if not plan:
+            print("All advised indexes already exist")
+        conn.close()
+        return 0
+
+    values = reports.knobs(args.min_matches, args.top_n)
+    queries = {name: (r.sql, reports.bind(r, values)) for name, r in reports.REPORTS.items()}
+    out_root = os.path.join(args.outdir, dt.datetime.now().strftime("%Y%m%d_%H%M%S"))
+    before = {} if args.no_explain else record_plans(conn, queries, os.path.join(out_root, "before"))
+    apply_indexes(conn, plan)
+    if not args.no_explain:
+        after = record_plans(conn, queries, os.path.join(out_root, "after"))
+        write_comparison(before, after, os.path.join(out_root, "comparison.csv"))
+    conn.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,19 +1,50 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Valorant analytics (simplified): run PURE SQL queries for global, team, nemesis, per_map, mvp, tournament_stars
+Valorant analytics reports: run the reports registered in reports.py (global, team, nemesis,
+per_map, mvp, tournament_stars by default; team_map_kd, map_specialists, mvp_leaders,
+consistency on --run) and write one output file per report.
+
+Engines (--engine): `sql` runs each report's query, over a connection pool with --jobs;
+`scan` reads `kills` once (engine.BASE_SQL) and builds every report in memory; `shards`
+builds the same frames from per-tournament partials, re-aggregating only changed tournaments
+(shards.py), with --approx-matches taking per-map matches_played from stored HyperLogLog sketches.
+nemesis always runs as SQL.
+
+Backends: MySQL, or --backend snapshot (Parquet files queried with DuckDB, snapshot.py).
+--source rollups reads the incrementally maintained rollup tables (rollups.py) instead of
+raw `kills`. Results go through the table-versioned cache (qcache.py) unless --no-cache or
+--stream.
+
+Outputs go to <outdir>/<timestamp>/ as csv, parquet or feather (--format), with
+manifest.json, a line in <outdir>/runs.jsonl (manifest.py) and, with --profile,
+profile.json. `python src/cli.py report` runs this module.
 """
 
+from __future__ import annotations
+
 import os
 import sys
+import time
 import argparse
+import threading
 import datetime as dt
-from typing import Optional, Sequence
-
-import pandas as pd
-import mysql.connector as mysql
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple
 import getpass
 
+# pandas, mysql.connector and the scan engine are imported where they are used,
+# so --help, --list and --dry-run start without them
+import manifest
+import profiler
+import qcache
+import reports
+import rollups
+import snapshot
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 # ---------- Utils ----------
 
 def ensure_dir(path: str) -> None:
@@ -22,345 +53,583 @@ def ensure_dir(path: str) -> None:
 # ---------- DB helpers ----------
 
 def get_conn(host: str, port: int, user: str, password: str, db: str):
+    import mysql.connector as mysql
+
     return mysql.connect(host=host, port=port, user=user, password=password, database=db)
 
+def open_conn(args):
+    # remember a prompted password so pooled connections can reuse it
+    args.password = args.password or getpass.getpass("MySQL password: ")
+    return get_conn(host=args.host, port=args.port, user=args.user, password=args.password, db=args.db)
+
+def get_pool(args, size: int):
+    from mysql.connector import pooling
+
+    # the pool may be the first connection of the run (no cache probe before it)
+    args.password = args.password or getpass.getpass("MySQL password: ")
+    return pooling.MySQLConnectionPool(
+        pool_name="valorant_reports", pool_size=size,
+        # keep session state (prepared statements) when a connection goes back to the pool
+        pool_reset_session=False,
+        host=args.host, port=args.port, user=args.user, password=args.password, database=args.db,
+    )
+
+def open_backend(args):
+    if args.backend == "snapshot":
+        return snapshot.connect(args.snapshot_dir)
+    return open_conn(args)
+
 def run_query(conn, sql: str, params: Optional[Sequence] = None) -> pd.DataFrame:
-    return pd.read_sql(sql, conn, params=params or [])
+    if isinstance(conn, snapshot.SnapshotConn):
+        with profiler.phase("execute"):
+            cur = conn.execute(sql, params)
+        with profiler.phase("fetch"):
+            df = cur.df()
+        profiler.record_result(df)
+        return df
+    before = profiler.server_stats(conn)
+    if params:
+        # bound reports: prepared once per connection, re-executed with new values
+        df = reports.statements(conn).query_df(sql, params)
+    else:
+        import pandas as pd
+
+        # what pd.read_sql does on a DB-API connection, in steps --profile can time
+        cur = conn.cursor()
+        with profiler.phase("execute"):
+            cur.execute(sql)
+        with profiler.phase("fetch"):
+            rows = cur.fetchall()
+        columns = [d[0] for d in cur.description]
+        cur.close()
+        with profiler.phase("build"):
+            df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    profiler.record_server(before, profiler.server_stats(conn))
+    profiler.record_result(df)
+    return df
+
+def set_timeout(conn, seconds: Optional[float]) -> None:
+    # server-side limit for SELECTs in this session (MySQL 5.7.8+)
+    if seconds and not isinstance(conn, snapshot.SnapshotConn):
+        cur = conn.cursor()
+        cur.execute(f"SET SESSION MAX_EXECUTION_TIME = {int(seconds * 1000)}")
+        cur.close()
+
+def is_timeout(exc: Optional[BaseException]) -> bool:
+    # 3024: MAX_EXECUTION_TIME exceeded, 1317: query killed by the watchdog
+    while exc is not None:
+        if getattr(exc, "errno", None) in (3024, 1317) or "execution time exceeded" in str(exc).lower():
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+def kill_query(conn, connection_id: int) -> None:
+    cur = conn.cursor()
+    cur.execute(f"KILL QUERY {int(connection_id)}")
+    cur.close()
+
+def iter_chunks(conn, sql: str, params: Optional[Sequence] = None, chunk_rows: int = 10_000) -> Iterator[pd.DataFrame]:
+    """Yield the result in DataFrames of at most `chunk_rows` rows without materializing it."""
+    import pandas as pd
+
+    prepared = False
+    with profiler.phase("execute"):
+        if isinstance(conn, snapshot.SnapshotConn):
+            cur = conn.execute(sql, params)
+        elif params:
+            # prepared cursors are unbuffered too; they stay cached for the next execution
+            cur = reports.statements(conn).execute(sql, params)
+            prepared = True
+        else:
+            # unbuffered: rows stay on the server / socket until fetched
+            cur = conn.cursor(buffered=False)
+            cur.execute(sql)
+    columns = [d[0] for d in cur.description]
+    try:
+        while True:
+            with profiler.phase("fetch"):
+                rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            # object dtype keeps each value's text identical across chunks (no per-chunk int -> float)
+            with profiler.phase("build"):
+                chunk = pd.DataFrame(rows, columns=columns, dtype=object)
+            yield chunk
+    finally:
+        if not prepared:
+            cur.close()
+
+# ---------- Output ----------
+
+PREVIEW_ROWS = 30
+
+def write_df(df: Optional[pd.DataFrame], out_root: str, name: str, fmt: str = "csv") -> Optional[str]:
+    """CSV, or typed zstd-compressed Parquet / Feather (column subsets load without parsing)."""
+    if df is None or df.empty:
+        return None
+    path = os.path.join(out_root, name + manifest.EXTENSIONS[fmt])
+    with profiler.phase("write"):
+        if fmt != "csv":
+            # encoded name columns carry the whole dictionary; keep only the names in this report
+            df = df.apply(lambda c: c.cat.remove_unused_categories() if c.dtype == "category" else c)
+        if fmt == "parquet":
+            df.to_parquet(path, index=False, compression="zstd")
+        elif fmt == "feather":
+            df.reset_index(drop=True).to_feather(path, compression="zstd")
+        else:
+            df.to_csv(path, index=False, encoding="utf-8")
+    return path
+
+def stream_csv(chunks: Iterator[pd.DataFrame], out_root: str, name: str) -> Tuple[pd.DataFrame, int, Optional[str]]:
+    """Write chunks to CSV as they arrive; only the preview rows and the row count are kept."""
+    import pandas as pd
+
+    path = os.path.join(out_root, f"{name}.csv")
+    tmp = path + ".tmp"
+    preview = None
+    rows = 0
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        for chunk in chunks:
+            with profiler.phase("write"):
+                chunk.to_csv(f, index=False, header=rows == 0)
+            if rows < PREVIEW_ROWS:
+                head = chunk.head(PREVIEW_ROWS - rows)
+                preview = head if preview is None else pd.concat([preview, head], ignore_index=True)
+            rows += len(chunk)
+    if rows == 0:
+        os.remove(tmp)
+        return pd.DataFrame(), 0, None
+    os.replace(tmp, path)
+    return preview.infer_objects(), rows, path
+
+def show_df(df: Optional[pd.DataFrame], name: str, path: Optional[str], rows: Optional[int] = None) -> None:
+    if df is None or df.empty:
+        print(f"\n== {name} ==\n<empty>")
+        return
+    print(f"\n== {name} ==")
+    print(df.head(PREVIEW_ROWS).to_string(index=False))
+    print(f"[saved] {path}" + (f" ({rows} rows)" if rows is not None else ""))
+
+def show_timeout(name: str, seconds: Optional[float]) -> None:
+    print(f"\n== {name} ==\n[timeout] no result within {seconds}s")
+
+# ---------- Execution ----------
+
+class LazyConn:
+    """Opens the backend connection on first use, so cache hits never connect."""
+
+    def __init__(self, opener):
+        self._opener = opener
+        self._conn = None
+
+    def get(self):
+        if self._conn is None:
+            with profiler.phase("connect"):
+                self._conn = self._opener()
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+
+def make_cache(args) -> Optional[qcache.QueryCache]:
+    if args.no_cache:
+        return None
+    if args.backend == "snapshot":
+        source = "snapshot:" + os.path.abspath(args.snapshot_dir)
+    else:
+        source = f"mysql://{args.user}@{args.host}:{args.port}/{args.db}"
+    return qcache.QueryCache(
+        source, cache_dir=args.cache_dir, max_bytes=int(args.cache_size_mb * 2**20),
+        ttl=args.cache_ttl, refresh=args.refresh,
+    )
+
+def make_probe(args, conn: LazyConn):
+    if args.backend == "snapshot":
+        return lambda tables: qcache.snapshot_versions(args.snapshot_dir, tables)
+    return lambda tables: qcache.mysql_versions(conn.get(), tables)
+
+def fetch(cache, probe, sql: str, params: Optional[Sequence], connect) -> pd.DataFrame:
+    if cache is None:
+        return run_query(connect(), sql, params)
+    missed = []
+
+    def run():
+        missed.append(True)
+        return run_query(connect(), sql, params)
+
+    df = cache.fetch(sql, params, run, probe)
+    profiler.record(cache="miss" if missed else "hit")
+    if not missed:
+        profiler.record_result(df)
+    return df
+
+# (output name, SQL, bound params, precomputed frame or None)
+Work = List[Tuple[str, str, Tuple, Optional["pd.DataFrame"]]]
+
+# output name -> (preview or full frame, path, rows), or None after a timeout; read by the manifest
+Written = Dict[str, Optional[Tuple[Optional["pd.DataFrame"], Optional[str], int]]]
+
+def run_serial(conn: LazyConn, work: Work, out_root: str, timeout: Optional[float], cache=None, probe=None,
+               stream: Optional[int] = None, fmt: str = "csv", written: Optional[Written] = None) -> None:
+    """`stream`: chunk size for writing SQL results straight to CSV (bypasses the cache)."""
+    written = {} if written is None else written
+    for out_name, sql, params, df in work:
+        rows = None
+        try:
+            with profiler.item(out_name, "report"):
+                if df is None and stream:
+                    df, rows, path = stream_csv(iter_chunks(conn.get(), sql, params, stream), out_root, out_name)
+                    profiler.record(rows=rows)
+                else:
+                    if df is None:
+                        df = fetch(cache, probe, sql, params, conn.get)
+                    path = write_df(df, out_root, out_name, fmt)
+        except Exception as e:
+            if not is_timeout(e):
+                raise
+            show_timeout(out_name, timeout)
+            written[out_name] = None
+            continue
+        written[out_name] = (df, path, len(df) if rows is None else rows)
+        show_df(df, out_name, path, rows)
+
+def run_parallel(args, conn: LazyConn, work: Work, out_root: str, jobs: int, timeout: Optional[float],
+                 cache=None, probe=None, stream: Optional[int] = None, fmt: str = "csv",
+                 written: Optional[Written] = None) -> None:
+    """Run reports concurrently over a bounded pool. Each file is written as soon as its
+    query finishes; previews are printed in --run order. `conn` is kept for KILL QUERY."""
+    written = {} if written is None else written
+    pool = []
+    pool_lock = threading.Lock()
+    started: Dict[str, Tuple[int, float]] = {}
+    stopping = threading.Event()
+
+    def task(out_name: str, sql: str, params: Tuple, df: Optional[pd.DataFrame]):
+        with profiler.item(out_name, "report"):
+            return _task(out_name, sql, params, df)
+
+    def _task(out_name: str, sql: str, params: Tuple, df: Optional[pd.DataFrame]):
+        if df is None:
+            pooled = []
+
+            def connect():
+                if stopping.is_set():
+                    raise RuntimeError("run aborted")
+                # the pool is created on the first cache miss
+                with profiler.phase("connect"):
+                    with pool_lock:
+                        if not pool:
+                            pool.append(get_pool(args, jobs))
+                    pooled.append(pool[0].get_connection())
+                set_timeout(pooled[-1], timeout)
+                started[out_name] = (pooled[-1].connection_id, time.monotonic())
+                return pooled[-1]
+
+            try:
+                if stream:
+                    result = stream_csv(iter_chunks(connect(), sql, params, stream), out_root, out_name)
+                    profiler.record(rows=result[1])
+                    return result
+                df = fetch(cache, probe, sql, params, connect)
+            finally:
+                # the connection goes back to the pool: the watchdog must not kill its next query
+                started.pop(out_name, None)
+                for c in pooled:
+                    c.close()
+        return df, None, write_df(df, out_root, out_name, fmt)
+
+    if cache is not None and not stream:
+        # probe table versions once, from this thread, before the workers start
+        cache.versions({t for _, sql, _, df in work if df is None for t in qcache.tables_in(sql)}, probe)
+
+    def watchdog(pending) -> None:
+        # client-side watchdog in case the server limit does not apply: every running report, every tick
+        now = time.monotonic()
+        for out_name, fut in futures:
+            running = started.get(out_name)
+            if fut in pending and running and out_name not in killed:
+                connection_id, t0 = running
+                if now - t0 > timeout + 1:
+                    kill_query(conn.get(), connection_id)
+                    killed.add(out_name)
+
+    def abort() -> None:
+        # a failed report ends the run: drop the queued ones and stop the queries still running
+        stopping.set()
+        for out_name, fut in futures:
+            running = started.get(out_name)
+            if fut.cancel() or fut.done() or not running or out_name in killed:
+                continue
+            try:
+                kill_query(conn.get(), running[0])
+            except Exception:
+                pass
+
+    killed = set()
+    with ThreadPoolExecutor(max_workers=jobs) as ex:
+        futures = [(out_name, ex.submit(task, out_name, sql, params, df)) for out_name, sql, params, df in work]
+        pending = {fut for _, fut in futures}
+        shown = 0
+        try:
+            while shown < len(futures):
+                _, pending = wait(pending, timeout=0.2)
+                if timeout:
+                    watchdog(pending)
+                # previews in --run order: show every finished report up to the first one still running
+                while shown < len(futures) and futures[shown][1].done():
+                    out_name, fut = futures[shown]
+                    shown += 1
+                    try:
+                        df, rows, path = fut.result()
+                    except Exception as e:
+                        if not is_timeout(e):
+                            raise
+                        show_timeout(out_name, timeout)
+                        written[out_name] = None
+                    else:
+                        written[out_name] = (df, path, len(df) if rows is None else rows)
+                        show_df(df, out_name, path, rows)
+        except BaseException:
+            abort()
+            raise
 
 # ---------- CLI ----------
 
-def parse_args(argv: Optional[Sequence[str]] = None):
-    p = argparse.ArgumentParser(description="Valorant analytics from MySQL 'kills' table (pure SQL)")
+def _int_list(text: str) -> List[int]:
+    try:
+        return [int(x) for x in text.split(",") if x.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers, got {text!r}")
+
+def add_db_args(p: argparse.ArgumentParser) -> None:
     p.add_argument("--host", default="127.0.0.1")
     p.add_argument("--port", type=int, default=3306)
     p.add_argument("--user", default="root")
     p.add_argument("--password", default="", help="MySQL password")
     p.add_argument("--db", default="valorant_stats")
 
+def parse_args(argv: Optional[Sequence[str]] = None):
+    p = argparse.ArgumentParser(description="Valorant analytics from MySQL 'kills' table (pure SQL)")
+    add_db_args(p)
+    p.add_argument(
+        "--backend", choices=["mysql", "snapshot"], default="mysql",
+        help="snapshot: run against the local Parquet files written by src/snapshot.py (no MySQL needed)"
+    )
+    p.add_argument("--snapshot-dir", default=snapshot.DEFAULT_DIR, help="Snapshot directory for --backend snapshot")
+
     # what to run
     p.add_argument(
         "--run",
-        default="global,team,nemesis,per_map,mvp,tournament_stars",
-        help="Comma-separated: global,team,nemesis,per_map,mvp,tournament_stars (per_map/tournament_stars top-K uses --top-n)"
+        default=",".join(reports.DEFAULT_RUN),
+        help=f"Comma-separated: {','.join(reports.REPORTS)} (per_map/tournament_stars top-K uses --top-n)"
+    )
+    p.add_argument(
+        "--engine", choices=["sql", "scan", "shards"], default="sql",
+        help="sql: one query per report; scan: read `kills` once and build all reports in memory (nemesis stays SQL); "
+             "shards: like scan, from per-tournament partials aggregated in --jobs processes, "
+             "re-aggregating only changed tournaments"
+    )
+    p.add_argument("--shard-dir", default="shards", help="Stored per-tournament partials for --engine shards")
+    p.add_argument("--approx-matches", action="store_true",
+                   help="--engine shards: per-map matches_played (and --min-matches) from unions of the "
+                        "HyperLogLog sketches stored per tournament, instead of exact distinct match sets "
+                        "(per_map, map_specialists)")
+    p.add_argument("--sketch-precision", type=int, default=12, choices=range(4, 17), metavar="4..16",
+                   help="2**N registers per sketch; relative standard error 1.04/sqrt(2**N) (12: 1.6%%)")
+    p.add_argument(
+        "--source", choices=["kills", "rollups"], default="kills",
+        help="rollups: read the incrementally maintained rollup tables instead of raw `kills` (nemesis stays on kills)"
     )
+    p.add_argument("--refresh-rollups", action="store_true", help="Fold new, re-imported and deleted matches into the rollups first")
 
     # knobs
-    p.add_argument("--min-matches", type=int, default=2, help="min matches for global ranking & per_map/tournament_stars")
+    p.add_argument("--min-matches", type=_int_list, default=[2],
+                   help="min matches for global ranking & per_map/tournament_stars; several (2,5,10) run a sweep "
+                        "over the same prepared statements, outputs suffixed _min<N>")
     p.add_argument("--top-n", type=int, default=20, help="LIMIT for global/nemesis, top-K per map/tournament_stars")
 
+    # execution
+    p.add_argument("--jobs", type=int, default=1, help="Run up to N reports concurrently over a connection pool")
+    p.add_argument("--timeout", type=float, default=None, help="Per-report time limit in seconds")
+
+    p.add_argument("--stream", action="store_true",
+                   help="Write SQL results to CSV in chunks with flat memory (skips the result cache)")
+    p.add_argument("--chunk-rows", type=int, default=10_000, help="Rows per fetch with --stream")
+
+    # result cache
+    p.add_argument("--no-cache", action="store_true", help="Always query the database")
+    p.add_argument("--refresh", action="store_true", help="Re-probe table versions and re-run every query")
+    p.add_argument("--cache-dir", default=qcache.DEFAULT_DIR)
+    p.add_argument("--cache-size-mb", type=float, default=qcache.DEFAULT_MAX_MB, help="LRU size limit")
+    p.add_argument("--cache-ttl", type=float, default=qcache.DEFAULT_TTL,
+                   help="Seconds a table version check is trusted without asking the database")
+
     # output
     p.add_argument("--outdir", default="outputs", help="Root output directory for CSVs")
-    return p.parse_args(argv)
+    p.add_argument("--format", choices=list(manifest.EXTENSIONS), default="csv",
+                   help="Output files: csv, or typed zstd-compressed parquet / feather; every run also writes "
+                        "manifest.json and a line in <outdir>/runs.jsonl (see src/manifest.py)")
+    p.add_argument("--list", action="store_true", help="List the available reports and exit")
+    p.add_argument("--dry-run", action="store_true", help="Print what would run (bound params, outputs) and exit")
+    p.add_argument("--profile", action="store_true",
+                   help="Time each report by phase (connect/execute/fetch/build/write), rows, result size and "
+                        "server stats; writes profile.json next to the CSVs and prints a summary")
+    p.add_argument("--profile-explain", action="store_true",
+                   help="With --profile: also store EXPLAIN ANALYZE for each SQL report (runs it once more)")
+    args = p.parse_args(argv)
+    if args.backend == "snapshot" and (args.source == "rollups" or args.refresh_rollups):
+        p.error("rollups live in MySQL; use --source kills with --backend snapshot")
+    if args.stream and args.format != "csv":
+        p.error("--stream writes CSV only; drop --stream for --format parquet/feather")
+    if args.approx_matches and args.engine != "shards":
+        p.error("--approx-matches needs --engine shards (the sketches are stored with the shard partials)")
+    return args
+
+def plan(args) -> List[Tuple[reports.Report, str, Tuple, int]]:
+    """(report, output name, bound params, min_matches) for the selected reports, in execution order."""
+    registry = dict(reports.REPORTS)
+    if args.source == "rollups":
+        registry.update(rollups.REPORTS)
+    to_run = [x.strip().lower() for x in args.run.split(",") if x.strip()]
+    selected = [report for name, report in registry.items() if name in to_run]
+
+    # --min-matches sweep: reports without that knob run once
+    items = []
+    sweep = args.min_matches
+    for i, min_matches in enumerate(sweep):
+        values = reports.knobs(min_matches, args.top_n)
+        for r in selected:
+            if i > 0 and "min_matches" not in r.params:
+                continue
+            out_name = r.out_name
+            if len(sweep) > 1 and "min_matches" in r.params:
+                out_name = f"{r.out_name}_min{min_matches}"
+            items.append((r, out_name, reports.bind(r, values), min_matches))
+    return items
+
+def show_list(args) -> None:
+    registry = dict(reports.REPORTS)
+    if args.source == "rollups":
+        registry.update(rollups.REPORTS)
+    default = set(reports.DEFAULT_RUN)
+    for name, r in registry.items():
+        mark = "*" if name in default else " "
+        print(f"{mark} {name:<18} -> {r.out_name + manifest.EXTENSIONS[args.format]:<22} params: {', '.join(r.params) or '-':<28} "
+              f"tables: {', '.join(r.tables)}")
+    print("\n* run by default")
+
+def show_plan(args, items) -> None:
+    where = args.snapshot_dir if args.backend == "snapshot" else f"{args.user}@{args.host}:{args.port}/{args.db}"
+    print(f"backend: {args.backend} ({where}), source: {args.source}, engine: {args.engine}, jobs: {args.jobs}")
+    if args.refresh_rollups:
+        print("would refresh rollups first")
+    for r, out_name, params, _ in items:
+        print(f"  {r.name:<18} -> {out_name}{manifest.EXTENSIONS[args.format]}  params={params}")
+    cache = "off" if args.no_cache else ("refresh" if args.refresh else args.cache_dir)
+    print(f"cache: {cache}, output: {os.path.join(args.outdir, '<timestamp>')}")
+
+def write_manifest(args, items, written: Written, out_root: str, cache=None, probe=None) -> str:
+    tables = sorted({t for r, _, _, _ in items for t in r.tables})
+    versions = cache.versions(tables, probe) if cache is not None else probe(tables)
+    entries = []
+    for r, out_name, params, min_matches in items:
+        bound = dict(zip(r.params, params))
+        if out_name not in written:
+            continue
+        if written[out_name] is None:
+            entries.append(manifest.entry(r.name, out_name, bound, None, None, 0, status="timeout"))
+        else:
+            df, path, rows = written[out_name]
+            entries.append(manifest.entry(r.name, out_name, bound, df, path, rows))
+    run = {
+        "format": args.format, "backend": args.backend, "source": args.source, "engine": args.engine,
+        "min_matches": args.min_matches, "top_n": args.top_n, "versions": versions,
+    }
+    if args.approx_matches:
+        run["approx_matches"] = {"precision": args.sketch_precision}
+    return manifest.write(out_root, run, entries)
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     args = parse_args(argv)
-
-    # open connection
-    conn = get_conn(
-        host=args.host,
-        port=args.port,
-        user=args.user,
-        password=(args.password or getpass.getpass("MySQL password: ")),
-        db=args.db,
-    )
+    if args.list:
+        show_list(args)
+        return 0
+    items = plan(args)
+    if args.dry_run:
+        show_plan(args, items)
+        return 0
+    prof = profiler.enable("main") if args.profile or args.profile_explain else None
+
+    # the connection is opened only when a query misses the cache
+    def connect():
+        conn = open_backend(args)
+        set_timeout(conn, args.timeout)
+        return conn
+
+    conn = LazyConn(connect)
+    cache = make_cache(args)
+    probe = make_probe(args, conn)
+
+    if args.refresh_rollups:
+        with profiler.item("(refresh_rollups)", "refresh"):
+            changed = rollups.refresh_rollups(conn.get())
+        print(f"[rollups] {changed} new, changed or removed matches applied")
 
     ts = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
     out_root = os.path.join(args.outdir, ts)
     ensure_dir(out_root)
 
-    to_run = [x.strip().lower() for x in args.run.split(",") if x.strip()]
-
-    def save_df(df: pd.DataFrame, name: str):
-        if df is None or df.empty:
-            print(f"\n== {name} ==\n<empty>")
-            return
-        print(f"\n== {name} ==")
-        print(df.head(30).to_string(index=False))
-        path = os.path.join(out_root, f"{name}.csv")
-        df.to_csv(path, index=False, encoding="utf-8")
-        print(f"[saved] {path}")
-
-    # ---------- SQL queries ----------
-
-    min_matches = int(args.min_matches)
-    top_n = int(args.top_n)
-
-    # 1) GLOBAL KD
-    sql_global = f"""
-        WITH agg AS (
-          SELECT
-            `Player` AS player,
-            COUNT(DISTINCT `Match Name`)      AS matches_played,
-            SUM(COALESCE(`Player Kills`,0))   AS kills_total,
-            SUM(COALESCE(`Enemy Kills`,0))    AS deaths_total
-          FROM kills
-          GROUP BY `Player`
-        )
-        SELECT
-          player, matches_played, kills_total, deaths_total,
-          ROUND(kills_total / NULLIF(deaths_total, 0), 3) AS kd
-        FROM agg
-        WHERE matches_played >= {min_matches}
-        ORDER BY kd DESC, kills_total DESC
-        LIMIT {top_n};
-    """
-
-    # 2) TEAM KD
-    sql_team = """
-        SELECT
-          `Player Team` AS Team,
-          SUM(COALESCE(`Player Kills`,0)) AS team_kills,
-          SUM(COALESCE(`Enemy Kills`,0))  AS team_deaths,
-          ROUND(SUM(COALESCE(`Player Kills`,0)) / NULLIF(SUM(COALESCE(`Enemy Kills`,0)), 0), 3) AS team_kd
-        FROM kills
-        WHERE `Player Team` IS NOT NULL AND `Player Team` <> ''
-        GROUP BY `Player Team`
-        ORDER BY team_kd DESC, team_kills DESC;
-    """
-
-    # 3) NEMESIS
-    sql_nemesis = f"""
-        SELECT
-          `Player` AS player,
-          `Enemy`  AS enemy,
-          SUM(COALESCE(`Enemy Kills`,0))  AS deaths_from_enemy,
-          SUM(COALESCE(`Player Kills`,0)) AS kills_on_enemy
-        FROM kills
-        GROUP BY `Player`, `Enemy`
-        ORDER BY deaths_from_enemy DESC
-        LIMIT {top_n};
-    """
-
-    # 4) PER MAP KD
-    sql_per_map = f"""
-        WITH per_map AS (
-          SELECT
-            `Map`                        AS map_name,
-            `Player`                     AS player,
-            COUNT(DISTINCT `Match Name`) AS matches_played,
-            SUM(COALESCE(`Player Kills`,0)) AS kills_total,
-            SUM(COALESCE(`Enemy Kills`,0))  AS deaths_total,
-            SUM(COALESCE(`Player Kills`,0)) / NULLIF(SUM(COALESCE(`Enemy Kills`,0)), 0) AS kd
-          FROM kills
-          WHERE `Map` IS NOT NULL AND `Map` <> ''
-          GROUP BY `Map`, `Player`
-        ),
-        ranked AS (
-          SELECT
-            per_map.*,
-            ROW_NUMBER() OVER (PARTITION BY map_name ORDER BY kd DESC, kills_total DESC) AS rk
-          FROM per_map
-          WHERE matches_played >= {min_matches}
-        )
-        SELECT map_name, player, matches_played, kills_total, deaths_total, ROUND(kd,3) AS kd
-        FROM ranked
-        WHERE rk <= {top_n}
-        ORDER BY map_name, rk;
-    """
-
-    # 5) MATCH MVP
-    sql_mvp = """
-        WITH per_match AS (
-          SELECT
-            `Match Name` AS match_name,
-            `Player`     AS player,
-            MAX(`Player Team`) AS team,
-            SUM(COALESCE(`Player Kills`,0)) AS kills_in_match,
-            SUM(COALESCE(`Enemy Kills`,0))  AS deaths_in_match,
-            SUM(COALESCE(`Player Kills`,0)) / NULLIF(SUM(COALESCE(`Enemy Kills`,0)), 0) AS kd
-          FROM kills
-          WHERE `Match Name` IS NOT NULL AND `Match Name` <> ''
-          GROUP BY `Match Name`, `Player`
-        ), ranked AS (
-          SELECT
-            per_match.*,
-            ROW_NUMBER() OVER (
-              PARTITION BY match_name
-              ORDER BY kills_in_match DESC, deaths_in_match ASC, player ASC
-            ) AS rk
-          FROM per_match
-        )
-        SELECT match_name, player, team, kills_in_match, deaths_in_match, ROUND(kd,3) AS kd
-        FROM ranked
-        WHERE rk = 1
-        ORDER BY match_name;
-    """
-    sql_map_specialists = f"""
-WITH per_map AS (
-  SELECT
-    `Map` AS map_name,
-    `Player` AS player,
-    COUNT(DISTINCT `Match Name`) AS matches_played,
-    SUM(COALESCE(`Player Kills`,0)) AS kills_total,
-    SUM(COALESCE(`Enemy Kills`,0))  AS deaths_total,
-    SUM(COALESCE(`Player Kills`,0)) / NULLIF(SUM(COALESCE(`Enemy Kills`,0)),0) AS kd
-  FROM kills
-  WHERE `Map` IS NOT NULL AND `Map` <> ''
-  GROUP BY `Map`, `Player`
-),
-ranked AS (
-  SELECT
-    per_map.*,
-    ROW_NUMBER() OVER (PARTITION BY map_name ORDER BY kd DESC, kills_total DESC) AS rk
-  FROM per_map
-  WHERE matches_played >= {min_matches}
-)
-SELECT map_name, player, matches_played, kills_total, deaths_total, ROUND(kd,3) AS kd
-FROM ranked
-WHERE rk <= {min(5, top_n)}
-ORDER BY map_name, rk;
-"""
-
-
-
-    # 6) TOURNAMENT STARS
-    sql_tournament_stars = f"""
-        WITH per_t AS (
-          SELECT
-            `Tournament` AS tournament,
-            `Player`     AS player,
-            COUNT(DISTINCT `Match Name`)     AS matches_played,
-            SUM(COALESCE(`Player Kills`,0))  AS kills_total,
-            SUM(COALESCE(`Enemy Kills`,0))   AS deaths_total,
-            SUM(COALESCE(`Player Kills`,0)) / NULLIF(SUM(COALESCE(`Enemy Kills`,0)),0) AS kd
-          FROM kills
-          WHERE `Tournament` IS NOT NULL AND `Tournament` <> ''
-          GROUP BY `Tournament`, `Player`
-        ), ranked AS (
-          SELECT
-            per_t.*,
-            ROW_NUMBER() OVER (PARTITION BY tournament ORDER BY kd DESC, kills_total DESC) AS rk
-          FROM per_t
-          WHERE matches_played >= {min_matches}
-        )
-        SELECT tournament, player, matches_played, kills_total, deaths_total, ROUND(kd,3) AS kd
-        FROM ranked
-        WHERE rk <= {top_n}
-        ORDER BY tournament, rk;
-    """
-    sql_consistency = f"""
-WITH per_match AS (
-  SELECT
-    `Player` AS player,
-    `Match Name` AS match_name,
-    SUM(COALESCE(`Player Kills`,0)) AS kills_in_match
-  FROM kills
-  WHERE `Match Name` IS NOT NULL AND `Match Name` <> ''
-  GROUP BY `Player`, `Match Name`
-),
-agg AS (
-  SELECT
-    player,
-    COUNT(*) AS matches_played,
-    ROUND(AVG(kills_in_match), 2) AS avg_kills,
-    ROUND(STDDEV_SAMP(kills_in_match), 2) AS std_kills
-  FROM per_match
-  GROUP BY player
-)
-SELECT
-  player, matches_played, avg_kills, std_kills,
-  CASE WHEN avg_kills=0 THEN NULL ELSE ROUND(std_kills/avg_kills, 3) END AS coeff_var
-FROM agg
-WHERE matches_played >= {min_matches}
-ORDER BY coeff_var ASC, avg_kills DESC
-LIMIT {top_n};
-"""
-
-    
-    sql_mvp_leaders = f"""
-WITH per_match AS (
-  SELECT
-    `Match Name` AS match_name,
-    `Player`     AS player,
-    MAX(`Player Team`) AS team,
-    SUM(COALESCE(`Player Kills`,0)) AS kills_in_match,
-    SUM(COALESCE(`Enemy Kills`,0))  AS deaths_in_match
-  FROM kills
-  WHERE `Match Name` IS NOT NULL AND `Match Name` <> ''
-  GROUP BY `Match Name`, `Player`
-), ranked AS (
-  SELECT
-    per_match.*,
-    ROW_NUMBER() OVER (
-      PARTITION BY match_name
-      ORDER BY kills_in_match DESC, deaths_in_match ASC, player ASC
-    ) AS rk
-  FROM per_match
-)
-SELECT
-  player,
-  COUNT(*) AS mvp_count
-FROM ranked
-WHERE rk = 1
-GROUP BY player
-ORDER BY mvp_count DESC, player ASC
-LIMIT {top_n};
-"""
-
-  
-
-
-    sql_team_map_kd = f"""
-WITH base AS (
-  SELECT
-    `Map` AS map_name,
-    `Player Team` AS team,
-    SUM(COALESCE(`Player Kills`,0)) AS team_kills,
-    SUM(COALESCE(`Enemy Kills`,0))  AS team_deaths,
-    SUM(COALESCE(`Player Kills`,0)) / NULLIF(SUM(COALESCE(`Enemy Kills`,0)), 0) AS team_kd
-  FROM kills
-  WHERE `Map` IS NOT NULL AND `Map` <> ''
-    AND `Player Team` IS NOT NULL AND `Player Team` <> ''
-  GROUP BY `Map`, `Player Team`
-),
-ranked AS (
-  SELECT
-    base.*,
-    ROW_NUMBER() OVER (PARTITION BY map_name ORDER BY team_kd DESC, team_kills DESC) AS rk
-  FROM base
-)
-SELECT map_name, team, team_kills, team_deaths, ROUND(team_kd, 3) AS team_kd
-FROM ranked
-WHERE rk <= {top_n}
-ORDER BY map_name, rk;
-"""
-
-
-
     # ---------- Execute selected ----------
-    if "global" in to_run:
-        save_df(run_query(conn, sql_global), "global_kd")
-
-    if "team" in to_run:
-        save_df(run_query(conn, sql_team), "team_kd")
-
-    if "nemesis" in to_run:
-        save_df(run_query(conn, sql_nemesis), "nemesis")
-
-    if "per_map" in to_run:
-        save_df(run_query(conn, sql_per_map), "per_map_kd")
-
-    if "mvp" in to_run:
-        save_df(run_query(conn, sql_mvp), "match_mvp")
-
-    if "tournament_stars" in to_run:
-        save_df(run_query(conn, sql_tournament_stars), "tournament_stars")
-
-    if "team_map_kd" in to_run:
-        save_df(run_query(conn, sql_team_map_kd), "team_map_kd")
-    
-    if "map_specialists" in to_run:
-        save_df(run_query(conn, sql_map_specialists), "map_specialists")
-        
-    if "mvp_leaders" in to_run:
-        save_df(run_query(conn, sql_mvp_leaders), "mvp_leaders")
-    
-    if "consistency" in to_run:
-        save_df(run_query(conn, sql_consistency), "consistency")
-
-        
+    # single-scan engine: one pass over `kills`, reports built in memory per --min-matches value
+    scanned: Dict[int, dict] = {}
+    if args.engine in ("scan", "shards") and args.source == "kills":
+        import engine
+
+        wanted: Dict[int, List[str]] = {}
+        for r, _, _, min_matches in items:
+            if r.name in engine.REPORTS:
+                wanted.setdefault(min_matches, []).append(r.name)
+        if wanted and args.engine == "shards":
+            import shards
+
+            with profiler.item("(shards)", "scan"):
+                precision = args.sketch_precision if args.approx_matches else None
+                intermediates = shards.load_intermediates(args, jobs=max(1, args.jobs), precision=precision)
+                for min_matches, names in wanted.items():
+                    scanned[min_matches] = engine.build_reports(None, names, min_matches, args.top_n, intermediates)
+        elif wanted:
+            import encoded
+
+            with profiler.item("(scan)", "scan"):
+                base = fetch(cache, probe, engine.BASE_SQL, None, conn.get)
+                with profiler.phase("build"):
+                    base = encoded.encode_frame(base)
+                    for min_matches, names in wanted.items():
+                        scanned[min_matches] = engine.build_reports(base, names, min_matches, args.top_n)
+
+    work: Work = [
+        (out_name, r.sql, params, scanned.get(min_matches, {}).get(r.name))
+        for r, out_name, params, min_matches in items
+    ]
+    # mysql.connector caps a pool at 32 connections
+    jobs = max(1, min(args.jobs, 32, len(work)))
+    stream = args.chunk_rows if args.stream else None
+    written: Written = {}
+    if jobs > 1 and args.backend == "mysql":
+        run_parallel(args, conn, work, out_root, jobs, args.timeout, cache, probe, stream, args.format, written)
+    else:
+        run_serial(conn, work, out_root, args.timeout, cache, probe, stream, args.format, written)
+    write_manifest(args, items, written, out_root, cache, probe)
+
+    if prof is not None:
+        if args.profile_explain:
+            profiler.explain_all(prof, conn.get(), [(n, sql, p) for n, sql, p, df in work if df is None])
+        profiler.report(prof, os.path.join(out_root, "profile.json"))
     conn.close()
-    print(f"\nDone. CSVs saved to: {out_root}")
+    if cache is not None:
+        print(f"\n[cache] {cache.hits} hits, {cache.misses} misses")
+    print(f"\nDone. {args.format.upper()} files saved to: {out_root}")
     return 0
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run manifests for main.py outputs. Each run writes `<outdir>/<timestamp>/manifest.json`
+(reports, bound parameters, row counts, columns, file hashes, source table versions) and, once
+every file is written, appends a one-line summary to `<outdir>/runs.jsonl`. A run missing from
+runs.jsonl did not finish, so consumers find the latest complete output for given parameters
+by reading that one file backwards instead of scanning the timestamp folders:
+
+    python src/manifest.py --report global --min-matches 2     # path of the newest global_kd file
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import hashlib
+import argparse
+import datetime as dt
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MANIFEST = "manifest.json"
+RUNS = "runs.jsonl"
+
+# --format -> file extension
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+def sha256_of(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def entry(report: str, out_name: str, params: Dict[str, object], df: Optional[pd.DataFrame],
+          path: Optional[str], rows: Optional[int], status: str = "ok") -> dict:
+    """One report of a run; `df` gives the column types (a preview is enough)."""
+    e = {"report": report, "name": out_name, "params": params, "status": status,
+         "rows": rows if rows is not None else (len(df) if df is not None else 0), "file": None}
+    if path is not None:
+        e.update(file=os.path.basename(path), bytes=os.path.getsize(path), sha256=sha256_of(path))
+    if df is not None and not df.empty:
+        e["columns"] = {str(c): str(t) for c, t in df.dtypes.items()}
+    return e
+
+def write(out_root: str, run: dict, reports: List[dict]) -> str:
+    """manifest.json in the run folder, then the run's line in runs.jsonl next to it."""
+    run = dict(run, finished_at=dt.datetime.now().isoformat(timespec="seconds"), reports=reports)
+    path = os.path.join(out_root, MANIFEST)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(run, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp, path)
+
+    summary = {k: v for k, v in run.items() if k != "reports"}
+    summary["dir"] = os.path.basename(os.path.normpath(out_root))
+    summary["reports"] = {e["name"]: {"report": e["report"], "params": e["params"], "file": e["file"]}
+                          for e in reports if e["status"] == "ok"}
+    with open(os.path.join(os.path.dirname(os.path.normpath(out_root)), RUNS), "a", encoding="utf-8") as f:
+        f.write(json.dumps(summary, ensure_ascii=False, default=str) + "\n")
+    return path
+
+def runs(outdir: str) -> Iterator[dict]:
+    """Finished runs, newest first."""
+    try:
+        with open(os.path.join(outdir, RUNS), encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        return
+    for line in reversed(lines):
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue  # a line cut off by a crash
+
+def latest(outdir: str, report: str, params: Optional[Dict[str, object]] = None,
+           fmt: Optional[str] = None, verify: bool = False, approx: bool = False) -> Optional[str]:
+    """Path of the newest output of `report` (--run name) whose bound params include `params`.
+
+    verify=True also checks the file against the hash in its run's manifest; runs made with
+    --approx-matches are skipped unless approx=True.
+    """
+    params = params or {}
+    for run in runs(outdir):
+        if fmt and run.get("format") != fmt:
+            continue
+        if run.get("approx_matches") and not approx:
+            continue
+        for e in run["reports"].values():
+            if e["report"] != report or e["file"] is None:
+                continue
+            # a knob the report does not take matches any value
+            if any(k in e["params"] and e["params"][k] != v for k, v in params.items()):
+                continue
+            path = os.path.join(outdir, run["dir"], e["file"])
+            if not os.path.exists(path):
+                continue
+            if verify and not _verified(os.path.join(outdir, run["dir"]), e["file"]):
+                continue
+            return path
+    return None
+
+def _verified(out_root: str, file: str) -> bool:
+    try:
+        with open(os.path.join(out_root, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    expected = next((e.get("sha256") for e in manifest["reports"] if e["file"] == file), None)
+    return expected is not None and expected == sha256_of(os.path.join(out_root, file))
+
+def read(path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Load an output file by extension; parquet and feather read only `columns`."""
+    import pandas as pd
+
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    if path.endswith(".feather"):
+        return pd.read_feather(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    p = argparse.ArgumentParser(description="Find the newest finished main.py output of a report")
+    p.add_argument("--outdir", default="outputs")
+    p.add_argument("--report", required=True, help="--run name, e.g. global")
+    p.add_argument("--min-matches", type=int, default=None)
+    p.add_argument("--top-n", type=int, default=None)
+    p.add_argument("--format", choices=list(EXTENSIONS), default=None)
+    p.add_argument("--verify", action="store_true", help="Check the file hash against its manifest")
+    p.add_argument("--approx", action="store_true", help="Also accept runs made with --approx-matches")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    params = {k: v for k, v in (("min_matches", args.min_matches), ("top_n", args.top_n)) if v is not None}
+    path = latest(args.outdir, args.report, params, args.format, args.verify, args.approx)
+    if path is None:
+        print(f"no finished output of {args.report!r} with {params or 'any params'} in {args.outdir}")
+        return 1
+    print(path)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
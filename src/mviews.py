@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Materialized copies of the sql/queries.sql views: `v_maps` -> `mv_maps`, `v_kills` -> `mv_kills`,
+`v_games` -> `mv_games`. Columns are typed and indexed, and the derived map columns
+(duration_sec, winner_team, score_diff, per-side win flags) are computed once at refresh
+instead of on every read.
+
+Refresh is incremental per tournament, the unit src/importer.py replaces on re-import: a
+tournament whose source row count or content checksum (SUM of CRC32 over the materialized
+source columns of each row) differs from `mv_watermark` is deleted and re-inserted, one that
+disappeared from the source is deleted, the rest are not touched. The checksum catches rows
+corrected in place, which leave the count unchanged. `tournament` stays NULL where the source
+is NULL, as in the views; refresh and the watermark key on the stored `tournament_key`
+(COALESCE(tournament, '')), so NULL and '' rows form one unit.
+"""
+
+import argparse
+from typing import Dict, Optional, Sequence
+
+# ---------- DDL ----------
+
+DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS mv_watermark (
+      mview        VARCHAR(64)  NOT NULL,
+      tournament   VARCHAR(191) NOT NULL,
+      rows_applied INT NOT NULL,
+      checksum     DECIMAL(32,0) NOT NULL DEFAULT 0,
+      applied_at   TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (mview, tournament)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS mv_maps (
+      id              BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+      tournament      VARCHAR(191) NULL,
+      tournament_key  VARCHAR(191) AS (COALESCE(tournament, '')) STORED NOT NULL,
+      stage           VARCHAR(191) NULL,
+      match_type      VARCHAR(191) NULL,
+      match_name      VARCHAR(191) NULL,
+      map             VARCHAR(191) NULL,
+      team_a          VARCHAR(191) NULL,
+      team_a_score    SMALLINT NULL,
+      team_a_attacker SMALLINT NULL,
+      team_a_defender SMALLINT NULL,
+      team_a_ot       SMALLINT NULL,
+      team_b          VARCHAR(191) NULL,
+      team_b_score    SMALLINT NULL,
+      team_b_attacker SMALLINT NULL,
+      team_b_defender SMALLINT NULL,
+      team_b_ot       SMALLINT NULL,
+      duration_raw    TIME NULL,
+      duration_sec    INT NULL,
+      winner_team     VARCHAR(191) NOT NULL,
+      score_diff      SMALLINT NULL,
+      team_a_win      TINYINT NOT NULL,
+      team_b_win      TINYINT NOT NULL,
+      KEY ix_mvm_tournament_key (tournament_key),
+      KEY ix_mvm_tournament_stage (tournament, stage),
+      KEY ix_mvm_match_map (match_name, map),
+      KEY ix_mvm_map (map),
+      KEY ix_mvm_duration (duration_sec),
+      KEY ix_mvm_team_a (team_a),
+      KEY ix_mvm_team_b (team_b)
+    ) DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS mv_kills (
+      id             BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+      tournament     VARCHAR(191) NULL,
+      tournament_key VARCHAR(191) AS (COALESCE(tournament, '')) STORED NOT NULL,
+      stage          VARCHAR(191) NULL,
+      match_type     VARCHAR(191) NULL,
+      match_name     VARCHAR(191) NULL,
+      map            VARCHAR(191) NULL,
+      player_team    VARCHAR(191) NULL,
+      player         VARCHAR(191) NULL,
+      enemy_team     VARCHAR(191) NULL,
+      enemy          VARCHAR(191) NULL,
+      player_kills   INT NULL,
+      enemy_kills    INT NULL,
+      difference     INT NULL,
+      kill_type      VARCHAR(64) NULL,
+      KEY ix_mvk_tournament (tournament),
+      KEY ix_mvk_tournament_key (tournament_key),
+      KEY ix_mvk_match (match_name),
+      KEY ix_mvk_player_enemy (player, enemy)
+    ) DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS mv_games (
+      id             BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+      tournament     VARCHAR(191) NULL,
+      tournament_key VARCHAR(191) AS (COALESCE(tournament, '')) STORED NOT NULL,
+      tournament_id  INT NULL,
+      stage          VARCHAR(191) NULL,
+      stage_id       INT NULL,
+      match_type     VARCHAR(191) NULL,
+      match_name     VARCHAR(191) NULL,
+      map            VARCHAR(191) NULL,
+      match_id       INT NULL,
+      game_id        INT NULL,
+      KEY ix_mvg_tournament (tournament),
+      KEY ix_mvg_tournament_key (tournament_key),
+      KEY ix_mvg_match_map (match_name, map),
+      KEY ix_mvg_game (game_id)
+    ) DEFAULT CHARSET=utf8mb4
+    """,
+]
+
+# mview -> (source table, its tournament column, checksummed source columns, INSERT ... SELECT reading alias `s`)
+MVIEWS = {
+    "mv_maps": ("maps_scores", "`Tournament`", (
+        "`Stage`, `Match Type`, `Match Name`, `Map`, `Team A`, `Team A Score`, `Team A Attacker Score`,"
+        " `Team A Defender Score`, `Team A Overtime Score`, `Team B`, `Team B Score`, `Team B Attacker Score`,"
+        " `Team B Defender Score`, `Team B Overtime Score`, `Duration`"
+    ), """
+        INSERT INTO mv_maps (
+          tournament, stage, match_type, match_name, map,
+          team_a, team_a_score, team_a_attacker, team_a_defender, team_a_ot,
+          team_b, team_b_score, team_b_attacker, team_b_defender, team_b_ot,
+          duration_raw, duration_sec, winner_team, score_diff, team_a_win, team_b_win
+        )
+        SELECT
+          s.`Tournament`, s.`Stage`, s.`Match Type`, s.`Match Name`, s.`Map`,
+          s.`Team A`, s.`Team A Score`, s.`Team A Attacker Score`, s.`Team A Defender Score`, s.`Team A Overtime Score`,
+          s.`Team B`, s.`Team B Score`, s.`Team B Attacker Score`, s.`Team B Defender Score`, s.`Team B Overtime Score`,
+          s.`Duration`,
+          TIME_TO_SEC(s.`Duration`),
+          CASE
+            WHEN s.`Team A Score` > s.`Team B Score` THEN s.`Team A`
+            WHEN s.`Team B Score` > s.`Team A Score` THEN s.`Team B`
+            ELSE 'TIE'
+          END,
+          ABS(s.`Team A Score` - s.`Team B Score`),
+          COALESCE(s.`Team A Score` > s.`Team B Score`, 0),
+          COALESCE(s.`Team B Score` > s.`Team A Score`, 0)
+        FROM maps_scores s
+    """),
+    "mv_kills": ("kills", "`Tournament`", (
+        "`Stage`, `Match Type`, `Match Name`, `Map`, `Player Team`, `Player`, `Enemy Team`, `Enemy`,"
+        " `Player Kills`, `Enemy Kills`, `Difference`, `Kill Type`"
+    ), """
+        INSERT INTO mv_kills (
+          tournament, stage, match_type, match_name, map, player_team, player, enemy_team, enemy,
+          player_kills, enemy_kills, difference, kill_type
+        )
+        SELECT
+          s.`Tournament`, s.`Stage`, s.`Match Type`, s.`Match Name`, s.`Map`,
+          s.`Player Team`, s.`Player`, s.`Enemy Team`, s.`Enemy`,
+          s.`Player Kills`, s.`Enemy Kills`, s.`Difference`, s.`Kill Type`
+        FROM kills s
+    """),
+    "mv_games": ("tournaments_stages_matches_games_ids", "tournament", (
+        "tournament_id, stage, stage_id, match_type, match_name, map, match_id, game_id"
+    ), """
+        INSERT INTO mv_games (
+          tournament, tournament_id, stage, stage_id, match_type, match_name, map, match_id, game_id
+        )
+        SELECT
+          s.tournament, s.tournament_id, s.stage, s.stage_id,
+          s.match_type, s.match_name, s.map, s.match_id, s.game_id
+        FROM tournaments_stages_matches_games_ids s
+    """),
+}
+
+MVIEW_TABLES = [*MVIEWS, "mv_watermark"]
+
+# ---------- Incremental refresh ----------
+
+def ensure_mviews(conn) -> None:
+    cur = conn.cursor()
+    # tables from before tournament_key stored NULL tournaments as '': rebuilt from the source
+    stale = []
+    for mview in MVIEWS:
+        cur.execute(
+            "SELECT COUNT(*) FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = 'tournament_key'",
+            (mview,),
+        )
+        (current,) = cur.fetchone()
+        cur.execute("SHOW TABLES LIKE %s", (mview,))
+        if cur.fetchall() and not current:
+            cur.execute(f"DROP TABLE {mview}")
+            stale.append(mview)
+    for ddl in DDL:
+        cur.execute(ddl)
+    for mview in stale:
+        cur.execute("DELETE FROM mv_watermark WHERE mview = %s", (mview,))
+    # watermarks from before the checksum get 0, which a non-empty tournament never sums to: each is re-materialized once
+    cur.execute(
+        "SELECT COUNT(*) FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = 'mv_watermark' AND column_name = 'checksum'"
+    )
+    (current,) = cur.fetchone()
+    if not current:
+        cur.execute("ALTER TABLE mv_watermark ADD COLUMN checksum DECIMAL(32,0) NOT NULL DEFAULT 0 AFTER rows_applied")
+    cur.close()
+
+def _refresh_one(cur, mview: str) -> int:
+    source, column, checksummed, insert = MVIEWS[mview]
+    cur.execute("DELETE FROM mv_changed")
+    # tournaments whose row count or content changed, including new ones (applied = NULL) ...
+    cur.execute(
+        "INSERT INTO mv_changed (tournament, rows_now, checksum) "
+        "SELECT s.tournament, s.n, s.checksum FROM ("
+        f" SELECT COALESCE({column}, '') AS tournament, COUNT(*) AS n,"
+        f" SUM(CRC32(JSON_ARRAY({checksummed}))) AS checksum"
+        f" FROM {source} GROUP BY COALESCE({column}, '')"
+        ") s LEFT JOIN mv_watermark w ON w.mview = %s AND w.tournament = s.tournament "
+        "WHERE w.rows_applied IS NULL OR w.rows_applied <> s.n OR w.checksum <> s.checksum",
+        (mview,),
+    )
+    # ... and the ones no longer in the source
+    cur.execute(
+        "INSERT INTO mv_changed (tournament, rows_now, checksum) "
+        "SELECT w.tournament, 0, 0 FROM mv_watermark w "
+        f"WHERE w.mview = %s AND NOT EXISTS (SELECT 1 FROM {source} WHERE COALESCE({column}, '') = w.tournament)",
+        (mview,),
+    )
+    cur.execute("SELECT COUNT(*) FROM mv_changed")
+    (changed,) = cur.fetchone()
+    if not changed:
+        return 0
+    cur.execute(f"DELETE m FROM {mview} m JOIN mv_changed c ON c.tournament = m.tournament_key")
+    cur.execute(insert + f" JOIN mv_changed c ON c.tournament = COALESCE(s.{column}, '')")
+    cur.execute(
+        "DELETE w FROM mv_watermark w JOIN mv_changed c ON c.tournament = w.tournament WHERE w.mview = %s",
+        (mview,),
+    )
+    cur.execute(
+        "INSERT INTO mv_watermark (mview, tournament, rows_applied, checksum) "
+        "SELECT %s, tournament, rows_now, checksum FROM mv_changed WHERE rows_now > 0",
+        (mview,),
+    )
+    return int(changed)
+
+def refresh_mviews(conn, rebuild: bool = False) -> Dict[str, int]:
+    """Bring the materialized tables up to date. Returns mview -> tournaments re-materialized."""
+    ensure_mviews(conn)
+    cur = conn.cursor()
+    try:
+        if rebuild:
+            for table in MVIEW_TABLES:
+                cur.execute(f"DELETE FROM {table}")
+        cur.execute("DROP TEMPORARY TABLE IF EXISTS mv_changed")
+        cur.execute(
+            "CREATE TEMPORARY TABLE mv_changed ("
+            " tournament VARCHAR(191) NOT NULL PRIMARY KEY, rows_now INT NOT NULL, checksum DECIMAL(32,0) NOT NULL)"
+        )
+        changed = {mview: _refresh_one(cur, mview) for mview in MVIEWS}
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.execute("DROP TEMPORARY TABLE IF EXISTS mv_changed")
+        cur.close()
+    return changed
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    from main import add_db_args
+
+    p = argparse.ArgumentParser(description="Materialize v_maps, v_kills and v_games into typed, indexed tables")
+    add_db_args(p)
+    p.add_argument("--rebuild", action="store_true", help="Drop all materialized rows and re-insert every tournament")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from main import open_conn
+
+    args = parse_args(argv)
+    conn = open_conn(args)
+    changed = refresh_mviews(conn, rebuild=args.rebuild)
+    conn.close()
+    print("[OK] Materialized views refreshed: "
+          + ", ".join(f"{mview} {n} tournaments" for mview, n in changed.items()))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-report / per-chart profiling for --profile: wall time split into phases (connect, execute,
+fetch, build, write, render, ...), row count, result size, and for MySQL the server's own
+execution time, rows examined and bytes sent (performance_schema), optionally the
+EXPLAIN ANALYZE plan. Written as a JSON trace plus a summary table.
+
+Everything here is a no-op until enable() is called. Enabled, it costs a few perf_counter()
+calls per phase, one deep memory_usage() per result and, on MySQL, two small
+performance_schema lookups per query, so it can stay on in production runs.
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import threading
+import contextlib
+import datetime as dt
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# phases in summary-column order
+PHASES = ["connect", "cache", "execute", "fetch", "query", "build", "write", "render"]
+
+SQL_SERVER_STATS = """
+    SELECT
+      (SELECT VARIABLE_VALUE FROM performance_schema.status_by_thread
+        WHERE THREAD_ID = PS_CURRENT_THREAD_ID() AND VARIABLE_NAME = 'Bytes_sent') AS bytes_sent,
+      s.TIMER_WAIT / 1e9 AS server_ms,
+      s.ROWS_EXAMINED AS rows_examined
+    FROM performance_schema.events_statements_history s
+    WHERE s.THREAD_ID = PS_CURRENT_THREAD_ID()
+    ORDER BY s.EVENT_ID DESC
+    LIMIT 1
+"""
+
+_NULL = contextlib.nullcontext()
+
+class Profiler:
+    def __init__(self, label: str):
+        self.label = label
+        self.started_at = dt.datetime.now().isoformat(timespec="seconds")
+        self._t0 = time.perf_counter()
+        self.items: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def entry(self, name: str, kind: str = "run") -> dict:
+        with self._lock:
+            e = self.items.get(name)
+            if e is None:
+                e = self.items[name] = {"name": name, "kind": kind, "total_s": 0.0, "phases": {}}
+            return e
+
+    def current(self) -> dict:
+        return getattr(self._local, "item", None) or self.entry("(run)")
+
+    @contextlib.contextmanager
+    def item(self, name: str, kind: str):
+        e = self.entry(name, kind)
+        prev = getattr(self._local, "item", None)
+        self._local.item = e
+        t0 = time.perf_counter()
+        try:
+            yield e
+        except BaseException as exc:
+            e["error"] = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            e["total_s"] += time.perf_counter() - t0
+            self._local.item = prev
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        e = self.current()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(e, name, time.perf_counter() - t0)
+
+    def add_phase(self, e: dict, name: str, seconds: float) -> None:
+        with self._lock:
+            e["phases"][name] = e["phases"].get(name, 0.0) + seconds
+
+    def to_dict(self) -> dict:
+        return {"label": self.label, "started_at": self.started_at,
+                "wall_s": round(time.perf_counter() - self._t0, 6), "items": list(self.items.values())}
+
+    def write(self, path: str) -> str:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp, path)
+        return path
+
+    def summary(self) -> str:
+        used = [p for p in PHASES if any(p in e["phases"] for e in self.items.values())]
+        header = ["name", "kind", "total_ms"] + [f"{p}_ms" for p in used] + \
+                 ["rows", "result_kb", "sent_kb", "server_ms", "cache"]
+        rows = []
+        for e in self.items.values():
+            ms = lambda s: f"{s * 1e3:.1f}" if s is not None else ""
+            kb = lambda b: f"{b / 1024:.1f}" if b is not None else ""
+            rows.append([e["name"], e["kind"], ms(e["total_s"])] + [ms(e["phases"].get(p)) for p in used] + [
+                str(e.get("rows", "")), kb(e.get("result_bytes")), kb(e.get("bytes_sent")),
+                f"{e['server_ms']:.1f}" if e.get("server_ms") is not None else "", e.get("cache", ""),
+            ])
+        widths = [max(len(str(r[i])) for r in [header] + rows) for i in range(len(header))]
+        fmt = lambda r: "  ".join(str(v).ljust(w) if i < 2 else str(v).rjust(w) for i, (v, w) in enumerate(zip(r, widths)))
+        return "\n".join([fmt(header)] + [fmt(r) for r in rows])
+
+# ---------- Module-level switch ----------
+
+_active: Optional[Profiler] = None
+
+def enable(label: str) -> Profiler:
+    global _active
+    _active = Profiler(label)
+    return _active
+
+def active() -> Optional[Profiler]:
+    return _active
+
+def item(name: str, kind: str):
+    return _active.item(name, kind) if _active is not None else _NULL
+
+def phase(name: str):
+    return _active.phase(name) if _active is not None else _NULL
+
+def record(**fields) -> None:
+    """Set fields on the current item (rows, cache, plan, ...)."""
+    if _active is not None:
+        _active.current().update(fields)
+
+def record_result(df: pd.DataFrame) -> None:
+    if _active is not None and df is not None:
+        _active.current().update(rows=len(df), result_bytes=int(df.memory_usage(deep=True).sum()))
+
+def add_phase(name: str, phase_name: str, seconds: float, kind: str = "run") -> None:
+    """Add time measured elsewhere (e.g. in a worker process) to an item and its total."""
+    if _active is not None:
+        e = _active.entry(name, kind)
+        _active.add_phase(e, phase_name, seconds)
+        with _active._lock:
+            e["total_s"] += seconds
+
+# ---------- Server side ----------
+
+def server_stats(conn) -> Optional[dict]:
+    """Bytes sent on this session and the last statement's server time (MySQL, DB-API connection).
+
+    None when performance_schema is not available; then it is not asked again on `conn`.
+    """
+    if _active is None or getattr(conn, "_profile_no_stats", False):
+        return None
+    try:
+        cur = conn.cursor()
+        cur.execute(SQL_SERVER_STATS)
+        row = cur.fetchone()
+        cur.close()
+    except Exception:
+        try:
+            conn._profile_no_stats = True
+        except AttributeError:
+            pass
+        return None
+    if row is None:
+        return None
+    bytes_sent, server_ms, rows_examined = row
+    return {"bytes_sent": int(bytes_sent or 0), "server_ms": float(server_ms or 0), "rows_examined": rows_examined}
+
+def record_server(before: Optional[dict], after: Optional[dict]) -> None:
+    if _active is None or before is None or after is None:
+        return
+    e = _active.current()
+    with _active._lock:
+        e["bytes_sent"] = e.get("bytes_sent", 0) + max(after["bytes_sent"] - before["bytes_sent"], 0)
+        e["server_ms"] = e.get("server_ms", 0.0) + after["server_ms"]
+        e["rows_examined"] = int(e.get("rows_examined", 0) + (after["rows_examined"] or 0))
+
+def explain(conn, sql: str, params: Optional[Sequence] = None) -> str:
+    """EXPLAIN ANALYZE text on MySQL or on a snapshot (DuckDB); runs the query once more."""
+    import snapshot
+
+    if isinstance(conn, snapshot.SnapshotConn):
+        rows = conn.execute("EXPLAIN ANALYZE " + sql.strip().rstrip(";"), params).fetchall()
+        return "\n".join(str(r[-1]) for r in rows)
+    import indexes
+
+    return indexes.explain_analyze(conn, sql, params or ())
+
+def report(profiler: Profiler, path: str) -> None:
+    profiler.write(path)
+    print(f"\n== profile ==\n{profiler.summary()}\n[saved] {path}")
+
+def explain_all(profiler: Profiler, conn, queries: List[tuple]) -> None:
+    """`queries`: (item name, SQL, params); the plan is stored on the item, outside its timings."""
+    for name, sql, params in queries:
+        e = profiler.entry(name)
+        t0 = time.perf_counter()
+        try:
+            e["plan"] = explain(conn, sql, params)
+        except Exception as exc:
+            e["plan_error"] = f"{type(exc).__name__}: {exc}"
+        e["explain_s"] = time.perf_counter() - t0
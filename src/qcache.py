@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent query-result cache. Entries are keyed on the normalized SQL, the bound parameters,
+the backend and a cheap version of every table the query reads (CREATE/UPDATE_TIME and row
+estimate from information_schema, or Parquet file stats for snapshots). Table versions are
+memoized for `ttl` seconds, so a hit inside that window never opens a database connection.
+Least recently used entries are evicted once the cache exceeds `max_bytes`.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_DIR = os.path.join(".cache", "queries")
+DEFAULT_MAX_MB = 512
+DEFAULT_TTL = 60.0
+
+# ---------- SQL inspection ----------
+
+def normalize_sql(sql: str) -> str:
+    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.DOTALL)
+    sql = re.sub(r"--[^\n]*", " ", sql)
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";").strip()
+
+def tables_in(sql: str) -> List[str]:
+    """Base tables referenced by FROM/JOIN, excluding CTE names."""
+    sql = normalize_sql(sql)
+    ctes = {m.lower() for m in re.findall(r"(?:\bWITH|,)\s*`?(\w+)`?\s+AS\s*\(", sql, flags=re.IGNORECASE)}
+    found = re.findall(r"\b(?:FROM|JOIN)\s+`?(\w+)`?", sql, flags=re.IGNORECASE)
+    return sorted({t for t in found if t.lower() not in ctes})
+
+# ---------- Table versions ----------
+
+def mysql_versions(conn, tables: Sequence[str]) -> Dict[str, str]:
+    """CREATE_TIME|UPDATE_TIME|TABLE_ROWS per table from information_schema (DB-API connection)."""
+    cur = conn.cursor()
+    try:
+        # MySQL 8 caches these columns for a day unless the expiry is disabled
+        cur.execute("SET SESSION information_schema_stats_expiry = 0")
+    except Exception:
+        pass
+    marks = ", ".join(["%s"] * len(tables))
+    cur.execute(
+        "SELECT TABLE_NAME, CREATE_TIME, UPDATE_TIME, TABLE_ROWS FROM information_schema.TABLES "
+        f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({marks})",
+        list(tables),
+    )
+    out = {name: f"{created}|{updated}|{rows}" for name, created, updated, rows in cur.fetchall()}
+    cur.close()
+    return out
+
+def snapshot_versions(snapshot_dir: str, tables: Sequence[str]) -> Dict[str, str]:
+    out = {}
+    for t in tables:
+        path = os.path.join(snapshot_dir, f"{t}.parquet")
+        if os.path.exists(path):
+            st = os.stat(path)
+            out[t] = f"{st.st_mtime_ns}|{st.st_size}"
+    return out
+
+# ---------- Cache ----------
+
+class QueryCache:
+    def __init__(self, source: str, cache_dir: str = DEFAULT_DIR, max_bytes: int = DEFAULT_MAX_MB * 2**20,
+                 ttl: float = DEFAULT_TTL, refresh: bool = False):
+        self.source = source
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._probed = set()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._memo_path = os.path.join(cache_dir, "versions.json")
+        self._memo = self._load_memo()
+
+    # -- table versions --
+
+    def _load_memo(self) -> Dict[str, list]:
+        try:
+            with open(self._memo_path, encoding="utf-8") as f:
+                return json.load(f).get(self.source, {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_memo(self) -> None:
+        try:
+            with open(self._memo_path, encoding="utf-8") as f:
+                allmemo = json.load(f)
+        except (OSError, ValueError):
+            allmemo = {}
+        allmemo[self.source] = self._memo
+        tmp = f"{self._memo_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(allmemo, f)
+        os.replace(tmp, self._memo_path)
+
+    def versions(self, tables: Iterable[str], probe: Callable[[List[str]], Dict[str, str]]) -> Dict[str, str]:
+        """Versions of `tables`, probing only those not memoized within the last `ttl` seconds."""
+        tables = sorted(set(tables))
+        with self._lock:
+            now = time.time()
+            stale = [
+                t for t in tables
+                if t not in self._memo or now - self._memo[t][1] > self.ttl or (self.refresh and t not in self._probed)
+            ]
+            if stale:
+                probed = probe(stale)
+                for t in stale:
+                    self._memo[t] = [probed.get(t, "missing"), now]
+                self._probed.update(stale)
+                self._save_memo()
+            return {t: self._memo[t][0] for t in tables}
+
+    # -- entries --
+
+    def key(self, sql: str, params: Optional[Sequence], versions: Dict[str, str]) -> str:
+        payload = json.dumps(
+            {"source": self.source, "sql": normalize_sql(sql), "params": list(params or []), "versions": versions},
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def fetch(self, sql: str, params: Optional[Sequence], run: Callable[[], pd.DataFrame],
+              probe: Callable[[List[str]], Dict[str, str]]) -> pd.DataFrame:
+        import pandas as pd
+
+        key = self.key(sql, params, self.versions(tables_in(sql), probe))
+        path = self._path(key)
+        if not self.refresh and os.path.exists(path):
+            try:
+                df = pd.read_pickle(path)
+                os.utime(path)  # LRU clock
+                self.hits += 1
+                return df
+            except Exception:
+                pass  # unreadable entry: recompute
+        df = run()
+        self.misses += 1
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        df.to_pickle(tmp)
+        os.replace(tmp, path)
+        self._evict()
+        return df
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".pkl"):
+                    st = os.stat(os.path.join(self.cache_dir, name))
+                    entries.append((st.st_mtime, st.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+                total -= size
+
+    def clear(self) -> None:
+        for name in os.listdir(self.cache_dir):
+            os.remove(os.path.join(self.cache_dir, name))
+        self._memo = {}
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Team ratings from `maps_scores`: Elo with a margin-of-victory multiplier on the round
+differential, overall and per map, with the rating history of every map played.
+
+Maps are ordered by `tournaments_stages_matches_games_ids.game_id` (maps without a game id
+cannot be placed and are skipped). Team state lives in arrays indexed like h2h.py: teams
+ordered by `teams_ids.team_id`, teams missing there get ids after the largest one, and teams
+first seen later are appended, so an index never moves. Ratings are a (1 + maps) x teams array:
+row 0 overall, one row per map.
+
+The update is batched: maps are split into levels where no team plays twice (a team's maps stay
+in order across levels), and each level updates the overall and per-map ratings of all its maps
+in one array operation, giving the same result as replaying map by map. The state is saved as a
+checkpoint (one .npy per array, as in h2h.py); the next run only applies maps with a game id
+above the last one applied, so new maps extend the ratings instead of replaying the season.
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import shutil
+import argparse
+import datetime as dt
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_DIR = "ratings"
+META = "meta.json"
+TABLES = ["maps_scores", "tournaments_stages_matches_games_ids", "teams_ids"]
+BASE_RATING = 1500.0
+DEFAULT_K = 32.0
+
+STATE = ["names", "team_ids", "maps", "ratings", "games"]
+HISTORY = ["h_game_id", "h_map", "h_team_a", "h_team_b", "h_score_a", "h_score_b",
+           "h_before_a", "h_before_b", "h_after_a", "h_after_b", "h_map_after_a", "h_map_after_b"]
+
+# maps after `game_id` %s, in play order
+SQL_MAPS = """
+    SELECT
+      g.game_id,
+      m.`Map`          AS map,
+      m.`Team A`       AS team_a,
+      m.`Team B`       AS team_b,
+      m.`Team A Score` AS score_a,
+      m.`Team B Score` AS score_b
+    FROM maps_scores m
+    JOIN tournaments_stages_matches_games_ids g
+      ON g.tournament = m.`Tournament`
+     AND g.stage      = m.`Stage`
+     AND g.match_type = m.`Match Type`
+     AND g.match_name = m.`Match Name`
+     AND g.map        = m.`Map`
+    WHERE g.game_id > %s
+      AND m.`Map` <> 'All Maps'
+      AND m.`Team A` IS NOT NULL AND m.`Team B` IS NOT NULL
+      AND m.`Team A Score` IS NOT NULL AND m.`Team B Score` IS NOT NULL
+    ORDER BY g.game_id
+"""
+
+SQL_TEAM_IDS = "SELECT `Team` AS team, team_id FROM teams_ids WHERE `Team` IS NOT NULL AND team_id IS NOT NULL"
+
+# ---------- Rating state ----------
+
+class Ratings:
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Optional[dict] = None):
+        for name in STATE + HISTORY:
+            setattr(self, name, arrays[name])
+        self.meta = meta or {}
+        self._team_index = {n: i for i, n in enumerate(self.names.tolist())}
+        self._map_index = {n: i for i, n in enumerate(self.maps.tolist())}
+
+    @classmethod
+    def empty(cls, k: float = DEFAULT_K, base: float = BASE_RATING) -> "Ratings":
+        arrays = {
+            "names": np.array([], dtype=str), "team_ids": np.array([], dtype=np.int64),
+            "maps": np.array([], dtype=str),
+            "ratings": np.full((1, 0), base), "games": np.zeros((1, 0), dtype=np.int32),
+        }
+        for name in HISTORY:
+            arrays[name] = np.array([], dtype=np.float64 if "before" in name or "after" in name else np.int64)
+        return cls(arrays, {"k": k, "base": base, "last_game_id": 0})
+
+    @property
+    def last_game_id(self) -> int:
+        return int(self.meta.get("last_game_id", 0))
+
+    # ---------- Indexing ----------
+
+    def add_teams(self, teams: Sequence[str], known_ids: Dict[str, int]) -> None:
+        """Append teams not seen yet: by teams_ids.team_id, unknown ones after the largest id."""
+        new = sorted({t for t in teams if t not in self._team_index})
+        if not new:
+            return
+        next_id = max([*known_ids.values(), *self.team_ids.tolist(), 0]) + 1
+        ids = {}
+        for t in new:
+            if t in known_ids:
+                ids[t] = known_ids[t]
+            else:
+                ids[t] = next_id
+                next_id += 1
+        new.sort(key=ids.get)
+        self.names = np.concatenate([self.names, np.array(new, dtype=str)])
+        self.team_ids = np.concatenate([self.team_ids, np.array([ids[t] for t in new], dtype=np.int64)])
+        pad = len(new)
+        self.ratings = np.pad(self.ratings, ((0, 0), (0, pad)), constant_values=self.meta["base"])
+        self.games = np.pad(self.games, ((0, 0), (0, pad)))
+        self._team_index.update({t: len(self._team_index) + i for i, t in enumerate(new)})
+
+    def add_maps(self, maps: Sequence[str]) -> None:
+        new = sorted({m for m in maps if m not in self._map_index})
+        if not new:
+            return
+        self.maps = np.concatenate([self.maps, np.array(new, dtype=str)])
+        self.ratings = np.pad(self.ratings, ((0, len(new)), (0, 0)), constant_values=self.meta["base"])
+        self.games = np.pad(self.games, ((0, len(new)), (0, 0)))
+        self._map_index.update({m: len(self._map_index) + i for i, m in enumerate(new)})
+
+    # ---------- Update ----------
+
+    def apply(self, maps: pd.DataFrame, known_ids: Dict[str, int]) -> int:
+        """Apply `maps` (SQL_MAPS rows, in game_id order) to the ratings. Returns maps applied."""
+        if maps.empty:
+            return 0
+        self.add_teams(_unique(maps["team_a"], maps["team_b"]), known_ids)
+        self.add_maps(_unique(maps["map"]))
+        a = np.array([self._team_index[t] for t in maps["team_a"].astype(str)], dtype=np.int64)
+        b = np.array([self._team_index[t] for t in maps["team_b"].astype(str)], dtype=np.int64)
+        row = np.array([self._map_index[m] for m in maps["map"].astype(str)], dtype=np.int64) + 1
+        score_a = maps["score_a"].to_numpy(dtype=np.int64)
+        score_b = maps["score_b"].to_numpy(dtype=np.int64)
+
+        n = len(maps)
+        before_a, before_b = np.empty(n), np.empty(n)
+        after_a, after_b = np.empty(n), np.empty(n)
+        map_after_a, map_after_b = np.empty(n), np.empty(n)
+        k, R = float(self.meta["k"]), self.ratings
+        for idx in levels(a, b):
+            ia, ib, rows = a[idx], b[idx], row[idx]
+            before_a[idx], before_b[idx] = R[0, ia], R[0, ib]
+            # overall (row 0) and per-map rows of this level in one update
+            r = np.concatenate([np.zeros(len(idx), dtype=np.int64), rows])
+            ca, cb = np.concatenate([ia, ia]), np.concatenate([ib, ib])
+            sa, sb = np.concatenate([score_a[idx], score_a[idx]]), np.concatenate([score_b[idx], score_b[idx]])
+            delta = elo_delta(R[r, ca], R[r, cb], sa, sb, k)
+            R[r, ca] += delta
+            R[r, cb] -= delta
+            self.games[r, ca] += 1
+            self.games[r, cb] += 1
+            after_a[idx], after_b[idx] = R[0, ia], R[0, ib]
+            map_after_a[idx], map_after_b[idx] = R[rows, ia], R[rows, ib]
+
+        history = {
+            "h_game_id": maps["game_id"].to_numpy(dtype=np.int64), "h_map": row - 1,
+            "h_team_a": a, "h_team_b": b, "h_score_a": score_a, "h_score_b": score_b,
+            "h_before_a": before_a, "h_before_b": before_b, "h_after_a": after_a, "h_after_b": after_b,
+            "h_map_after_a": map_after_a, "h_map_after_b": map_after_b,
+        }
+        for name, values in history.items():
+            setattr(self, name, np.concatenate([getattr(self, name), values.astype(getattr(self, name).dtype)]))
+        self.meta["last_game_id"] = int(history["h_game_id"].max())
+        return n
+
+    # ---------- Tables ----------
+
+    def table(self) -> pd.DataFrame:
+        import pandas as pd
+
+        played = self.games[0] > 0
+        df = pd.DataFrame({"team": self.names[played], "team_id": self.team_ids[played],
+                           "rating": self.ratings[0, played].round(1), "maps_played": self.games[0, played]})
+        df = df.sort_values(["rating", "team"], ascending=[False, True], kind="mergesort").reset_index(drop=True)
+        df.insert(0, "rank", np.arange(1, len(df) + 1))
+        return df
+
+    def map_table(self, top_n: Optional[int] = None) -> pd.DataFrame:
+        import pandas as pd
+
+        rows, cols = np.nonzero(self.games[1:] > 0)
+        df = pd.DataFrame({"map": self.maps[rows], "team": self.names[cols],
+                           "rating": self.ratings[rows + 1, cols].round(1), "maps_played": self.games[rows + 1, cols]})
+        df = df.sort_values(["map", "rating", "team"], ascending=[True, False, True], kind="mergesort")
+        if top_n:
+            df = df.groupby("map", sort=False).head(top_n)
+        return df.reset_index(drop=True)
+
+    def history(self) -> pd.DataFrame:
+        import pandas as pd
+
+        return pd.DataFrame({
+            "game_id": self.h_game_id,
+            "map": self.maps[self.h_map],
+            "team_a": self.names[self.h_team_a], "team_b": self.names[self.h_team_b],
+            "score_a": self.h_score_a, "score_b": self.h_score_b,
+            "rating_a_before": self.h_before_a.round(1), "rating_b_before": self.h_before_b.round(1),
+            "rating_a_after": self.h_after_a.round(1), "rating_b_after": self.h_after_b.round(1),
+            "map_rating_a_after": self.h_map_after_a.round(1), "map_rating_b_after": self.h_map_after_b.round(1),
+        })
+
+    # ---------- Storage ----------
+
+    def save(self, out_dir: str) -> None:
+        tmp = out_dir.rstrip("/\\") + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name in STATE + HISTORY:
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp, META), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp, out_dir)
+
+    @classmethod
+    def load(cls, out_dir: str) -> "Ratings":
+        # not memory-mapped: the arrays are updated in place and re-saved
+        arrays = {name: np.load(os.path.join(out_dir, f"{name}.npy")) for name in STATE + HISTORY}
+        with open(os.path.join(out_dir, META), encoding="utf-8") as f:
+            return cls(arrays, json.load(f))
+
+def _unique(*columns: pd.Series) -> List[str]:
+    import pandas as pd
+
+    return pd.unique(pd.concat(columns, ignore_index=True).astype(str)).tolist()
+
+def elo_delta(ra: np.ndarray, rb: np.ndarray, score_a: np.ndarray, score_b: np.ndarray, k: float) -> np.ndarray:
+    """Rating change of side A (B gets the opposite): K x margin multiplier x (result - expected).
+
+    The multiplier grows with the round differential, damped when the favourite wins, so
+    big wins by strong teams do not inflate ratings (FiveThirtyEight's NFL/NBA form).
+    """
+    expected = 1.0 / (1.0 + 10.0 ** ((rb - ra) / 400.0))
+    result = np.where(score_a > score_b, 1.0, np.where(score_a < score_b, 0.0, 0.5))
+    winner_gap = np.where(score_a >= score_b, ra - rb, rb - ra)
+    margin = np.log1p(np.maximum(np.abs(score_a - score_b), 1)) * 2.2 / (winner_gap * 0.001 + 2.2)
+    return k * margin * (result - expected)
+
+def levels(a: np.ndarray, b: np.ndarray) -> List[np.ndarray]:
+    """Positions grouped into levels where each team appears at most once, in play order:
+    a map's level is one more than the last level of either team."""
+    last: Dict[int, int] = {}
+    level = np.empty(len(a), dtype=np.int64)
+    for i, (ta, tb) in enumerate(zip(a.tolist(), b.tolist())):
+        lv = max(last.get(ta, -1), last.get(tb, -1)) + 1
+        level[i] = last[ta] = last[tb] = lv
+    order = np.argsort(level, kind="stable")
+    return np.split(order, np.cumsum(np.bincount(level))[:-1]) if len(level) else []
+
+# ---------- Build ----------
+
+def load_meta(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, META), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def update(args) -> Ratings:
+    """Extend the checkpoint with maps played since it was saved (rebuild on --rebuild or new K)."""
+    import qcache
+    from main import open_backend, run_query
+
+    meta = load_meta(args.dir)
+    rebuild = args.rebuild or not meta or meta.get("k") != args.k
+    ratings = Ratings.empty(args.k) if rebuild else Ratings.load(args.dir)
+
+    conn = open_backend(args)
+    try:
+        if args.backend == "snapshot":
+            versions = qcache.snapshot_versions(args.snapshot_dir, TABLES)
+        else:
+            versions = qcache.mysql_versions(conn, TABLES)
+        if not rebuild and meta.get("versions") == versions:
+            print(f"[ratings] up to date: {args.dir} (last game_id {ratings.last_game_id})")
+            return ratings
+        maps = run_query(conn, SQL_MAPS, (ratings.last_game_id,))
+        ids = run_query(conn, SQL_TEAM_IDS)
+    finally:
+        conn.close()
+
+    known = dict(zip(ids["team"].astype(str), ids["team_id"].astype("int64")))
+    applied = ratings.apply(maps, known)
+    ratings.meta.update(versions=versions, teams=len(ratings.names), maps_applied=len(ratings.h_game_id),
+                        updated_at=dt.datetime.now().isoformat(timespec="seconds"))
+    ratings.save(args.dir)
+    print(f"[ratings] {'rebuilt' if rebuild else 'extended'} with {applied} maps "
+          f"(last game_id {ratings.last_game_id}) -> {args.dir}")
+    return ratings
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    from main import add_db_args
+
+    p = argparse.ArgumentParser(description="Team Elo ratings (overall and per map) from maps_scores, incremental")
+    add_db_args(p)
+    p.add_argument("--backend", choices=["mysql", "snapshot"], default="mysql")
+    p.add_argument("--snapshot-dir", default="snapshots")
+    p.add_argument("--dir", default=DEFAULT_DIR, help="Checkpoint directory")
+    p.add_argument("--rebuild", action="store_true",
+                   help="Replay every map (needed when older maps were imported after newer ones)")
+    p.add_argument("--k", type=float, default=DEFAULT_K, help="Elo K factor; a change rebuilds the checkpoint")
+    p.add_argument("--top-n", type=int, default=20, help="Teams shown, and kept per map in map_ratings")
+    p.add_argument("--outdir", default="outputs")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from main import show_df, write_df
+
+    args = parse_args(argv)
+    ratings = update(args)
+    out_root = os.path.join(args.outdir, dt.datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(out_root, exist_ok=True)
+    for name, df in (("team_ratings", ratings.table()), ("map_ratings", ratings.map_table(args.top_n)),
+                     ("rating_history", ratings.history())):
+        show_df(df.head(args.top_n), name, write_df(df, out_root, name), rows=len(df))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Report registry. Each report declares its --run name, output name, the tables it reads and
+SQL with %s placeholders for its knobs, so the statement text does not change with
+--top-n/--min-matches: on MySQL it is prepared once per connection and re-executed with new
+values (see `statements`), including across --min-matches sweeps in one session.
+
+Adding a report = one `register(...)` call here (plus rollups.REPORTS if it has a rollup form).
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Sequence, Tuple
+
+import profiler
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+class Report(NamedTuple):
+    name: str                 # --run name
+    out_name: str             # CSV / output name
+    sql: str                  # %s placeholders, bound in `params` order
+    params: Tuple[str, ...]   # knob names, see `knobs`
+    tables: Tuple[str, ...]   # tables the SQL reads
+
+REPORTS: Dict[str, Report] = {}
+
+DEFAULT_RUN = ["global", "team", "nemesis", "per_map", "mvp", "tournament_stars"]
+
+def register(name: str, out_name: str, sql: str, params: Tuple[str, ...] = (),
+             tables: Tuple[str, ...] = ("kills",), registry: Optional[Dict[str, Report]] = None) -> Report:
+    report = Report(name, out_name, sql, tuple(params), tuple(tables))
+    (REPORTS if registry is None else registry)[name] = report
+    return report
+
+def knobs(min_matches: int, top_n: int) -> Dict[str, int]:
+    return {"min_matches": int(min_matches), "top_n": int(top_n), "specialists_k": min(5, int(top_n))}
+
+def bind(report: Report, values: Dict[str, int]) -> Tuple[int, ...]:
+    return tuple(values[p] for p in report.params)
+
+# ---------- Prepared statements ----------
+
+class Statements:
+    """Server-side prepared statements on one MySQL connection, one cursor per SQL text.
+
+    mysql.connector re-prepares only when a cursor is given a different statement, so keeping
+    a cursor per report lets every later execution (other knob values, the next sweep step)
+    skip parsing and planning setup on the server.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._cursors = {}
+
+    def execute(self, sql: str, params: Sequence):
+        cur = self._cursors.get(sql)
+        if cur is None:
+            cur = self._cursors[sql] = self.conn.cursor(prepared=True)
+        cur.execute(sql, tuple(params))
+        return cur
+
+    def query_df(self, sql: str, params: Sequence) -> pd.DataFrame:
+        import pandas as pd
+
+        with profiler.phase("execute"):
+            cur = self.execute(sql, params)
+        columns = [d[0] for d in cur.description]
+        with profiler.phase("fetch"):
+            rows = cur.fetchall()
+        with profiler.phase("build"):
+            return pd.DataFrame.from_records(rows, columns=columns)
+
+    def close(self) -> None:
+        for cur in self._cursors.values():
+            cur.close()
+        self._cursors.clear()
+
+def statements(conn) -> Statements:
+    """The statement cache of `conn`; pooled connections share the one of their real connection."""
+    cnx = getattr(conn, "_cnx", None) or conn
+    st = getattr(cnx, "_report_statements", None)
+    if st is None:
+        st = cnx._report_statements = Statements(cnx)
+    return st
+
+# ---------- Reports over `kills` ----------
+
+# 1) GLOBAL KD
+register("global", "global_kd", """
+        WITH agg AS (
+          SELECT
+            `Player` AS player,
+            COUNT(DISTINCT `Match Name`)      AS matches_played,
+            SUM(COALESCE(`Player Kills`,0))   AS kills_total,
+            SUM(COALESCE(`Enemy Kills`,0))    AS deaths_total
+          FROM kills
+          GROUP BY `Player`
+        )
+        SELECT
+          player, matches_played, kills_total, deaths_total,
+          ROUND(kills_total / NULLIF(deaths_total, 0), 3) AS kd
+        FROM agg
+        WHERE matches_played >= %s
+        ORDER BY kd DESC, kills_total DESC
+        LIMIT %s
+    """, params=('min_matches', 'top_n'))
+
+# 2) TEAM KD
+register("team", "team_kd", """
+        SELECT
+          `Player Team` AS Team,
+          SUM(COALESCE(`Player Kills`,0)) AS team_kills,
+          SUM(COALESCE(`Enemy Kills`,0))  AS team_deaths,
+          ROUND(SUM(COALESCE(`Player Kills`,0)) / NULLIF(SUM(COALESCE(`Enemy Kills`,0)), 0), 3) AS team_kd
+        FROM kills
+        WHERE `Player Team` IS NOT NULL AND `Player Team` <> ''
+        GROUP BY `Player Team`
+        ORDER BY team_kd DESC, team_kills DESC
+    """)
+
+# 3) NEMESIS
+register("nemesis", "nemesis", """
+        SELECT
+          `Player` AS player,
+          `Enemy`  AS enemy,
+          SUM(COALESCE(`Enemy Kills`,0))  AS deaths_from_enemy,
+          SUM(COALESCE(`Player Kills`,0)) AS kills_on_enemy
+        FROM kills
+        GROUP BY `Player`, `Enemy`
+        ORDER BY deaths_from_enemy DESC
+        LIMIT %s
+    """, params=('top_n',))
+
+# 4) PER MAP KD
+register("per_map", "per_map_kd", """
+        WITH per_map AS (
+          SELECT
+            `Map`                        AS map_name,
+            `Player`                     AS player,
+            COUNT(DISTINCT `Match Name`) AS matches_played,
+            SUM(COALESCE(`Player Kills`,0)) AS kills_total,
+            SUM(COALESCE(`Enemy Kills`,0))  AS deaths_total,
+            SUM(COALESCE(`Player Kills`,0)) / NULLIF(SUM(COALESCE(`Enemy Kills`,0)), 0) AS kd
+          FROM kills
+          WHERE `Map` IS NOT NULL AND `Map` <> ''
+          GROUP BY `Map`, `Player`
+        ),
+        ranked AS (
+          SELECT
+            per_map.*,
+            ROW_NUMBER() OVER (PARTITION BY map_name ORDER BY kd DESC, kills_total DESC) AS rk
+          FROM per_map
+          WHERE matches_played >= %s
+        )
+        SELECT map_name, player, matches_played, kills_total, deaths_total, ROUND(kd,3) AS kd
+        FROM ranked
+        WHERE rk <= %s
+        ORDER BY map_name, rk
+    """, params=('min_matches', 'top_n'))
+
+# 5) MATCH MVP
+register("mvp", "match_mvp", """
+        WITH per_match AS (
+          SELECT
+            `Match Name` AS match_name,
+            `Player`     AS player,
+            MAX(`Player Team`) AS team,
+            SUM(COALESCE(`Player Kills`,0)) AS kills_in_match,
+            SUM(COALESCE(`Enemy Kills`,0))  AS deaths_in_match,
+            SUM(COALESCE(`Player Kills`,0)) / NULLIF(SUM(COALESCE(`Enemy Kills`,0)), 0) AS kd
+          FROM kills
+          WHERE `Match Name` IS NOT NULL AND `Match Name` <> ''
+          GROUP BY `Match Name`, `Player`
+        ), ranked AS (
+          SELECT
+            per_match.*,
+            ROW_NUMBER() OVER (
+              PARTITION BY match_name
+              ORDER BY kills_in_match DESC, deaths_in_match ASC, player ASC
+            ) AS rk
+          FROM per_match
+        )
+        SELECT match_name, player, team, kills_in_match, deaths_in_match, ROUND(kd,3) AS kd
+        FROM ranked
+        WHERE rk = 1
+        ORDER BY match_name
+    """)
+
+# 6) TOURNAMENT STARS
+register("tournament_stars", "tournament_stars", """
+        WITH per_t AS (
+          SELECT
+            `Tournament` AS tournament,
+            `Player`     AS player,
+            COUNT(DISTINCT `Match Name`)     AS matches_played,
+            SUM(COALESCE(`Player Kills`,0))  AS kills_total,
+            SUM(COALESCE(`Enemy Kills`,0))   AS deaths_total,
+            SUM(COALESCE(`Player Kills`,0)) / NULLIF(SUM(COALESCE(`Enemy Kills`,0)),0) AS kd
+          FROM kills
+          WHERE `Tournament` IS NOT NULL AND `Tournament` <> ''
+          GROUP BY `Tournament`, `Player`
+        ), ranked AS (
+          SELECT
+            per_t.*,
+            ROW_NUMBER() OVER (PARTITION BY tournament ORDER BY kd DESC, kills_total DESC) AS rk
+          FROM per_t
+          WHERE matches_played >= %s
+        )
+        SELECT tournament, player, matches_played, kills_total, deaths_total, ROUND(kd,3) AS kd
+        FROM ranked
+        WHERE rk <= %s
+        ORDER BY tournament, rk
+    """, params=('min_matches', 'top_n'))
+
+# 7) TEAM x MAP KD
+register("team_map_kd", "team_map_kd", """
+        WITH base AS (
+          SELECT
+            `Map` AS map_name,
+            `Player Team` AS team,
+            SUM(COALESCE(`Player Kills`,0)) AS team_kills,
+            SUM(COALESCE(`Enemy Kills`,0))  AS team_deaths,
+            SUM(COALESCE(`Player Kills`,0)) / NULLIF(SUM(COALESCE(`Enemy Kills`,0)), 0) AS team_kd
+          FROM kills
+          WHERE `Map` IS NOT NULL AND `Map` <> ''
+            AND `Player Team` IS NOT NULL AND `Player Team` <> ''
+          GROUP BY `Map`, `Player Team`
+        ),
+        ranked AS (
+          SELECT
+            base.*,
+            ROW_NUMBER() OVER (PARTITION BY map_name ORDER BY team_kd DESC, team_kills DESC) AS rk
+          FROM base
+        )
+        SELECT map_name, team, team_kills, team_deaths, ROUND(team_kd, 3) AS team_kd
+        FROM ranked
+        WHERE rk <= %s
+        ORDER BY map_name, rk
+    """, params=('top_n',))
+
+# 8) MAP SPECIALISTS (top 5 per map)
+register("map_specialists", "map_specialists", """
+        WITH per_map AS (
+          SELECT
+            `Map` AS map_name,
+            `Player` AS player,
+            COUNT(DISTINCT `Match Name`) AS matches_played,
+            SUM(COALESCE(`Player Kills`,0)) AS kills_total,
+            SUM(COALESCE(`Enemy Kills`,0))  AS deaths_total,
+            SUM(COALESCE(`Player Kills`,0)) / NULLIF(SUM(COALESCE(`Enemy Kills`,0)),0) AS kd
+          FROM kills
+          WHERE `Map` IS NOT NULL AND `Map` <> ''
+          GROUP BY `Map`, `Player`
+        ),
+        ranked AS (
+          SELECT
+            per_map.*,
+            ROW_NUMBER() OVER (PARTITION BY map_name ORDER BY kd DESC, kills_total DESC) AS rk
+          FROM per_map
+          WHERE matches_played >= %s
+        )
+        SELECT map_name, player, matches_played, kills_total, deaths_total, ROUND(kd,3) AS kd
+        FROM ranked
+        WHERE rk <= %s
+        ORDER BY map_name, rk
+    """, params=('min_matches', 'specialists_k'))
+
+# 9) MVP LEADERS
+register("mvp_leaders", "mvp_leaders", """
+        WITH per_match AS (
+          SELECT
+            `Match Name` AS match_name,
+            `Player`     AS player,
+            MAX(`Player Team`) AS team,
+            SUM(COALESCE(`Player Kills`,0)) AS kills_in_match,
+            SUM(COALESCE(`Enemy Kills`,0))  AS deaths_in_match
+          FROM kills
+          WHERE `Match Name` IS NOT NULL AND `Match Name` <> ''
+          GROUP BY `Match Name`, `Player`
+        ), ranked AS (
+          SELECT
+            per_match.*,
+            ROW_NUMBER() OVER (
+              PARTITION BY match_name
+              ORDER BY kills_in_match DESC, deaths_in_match ASC, player ASC
+            ) AS rk
+          FROM per_match
+        )
+        SELECT
+          player,
+          COUNT(*) AS mvp_count
+        FROM ranked
+        WHERE rk = 1
+        GROUP BY player
+        ORDER BY mvp_count DESC, player ASC
+        LIMIT %s
+    """, params=('top_n',))
+
+# 10) CONSISTENCY
+register("consistency", "consistency", """
+        WITH per_match AS (
+          SELECT
+            `Player` AS player,
+            `Match Name` AS match_name,
+            SUM(COALESCE(`Player Kills`,0)) AS kills_in_match
+          FROM kills
+          WHERE `Match Name` IS NOT NULL AND `Match Name` <> ''
+          GROUP BY `Player`, `Match Name`
+        ),
+        agg AS (
+          SELECT
+            player,
+            COUNT(*) AS matches_played,
+            ROUND(AVG(kills_in_match), 2) AS avg_kills,
+            ROUND(STDDEV_SAMP(kills_in_match), 2) AS std_kills
+          FROM per_match
+          GROUP BY player
+        )
+        SELECT
+          player, matches_played, avg_kills, std_kills,
+          CASE WHEN avg_kills=0 THEN NULL ELSE ROUND(std_kills/avg_kills, 3) END AS coeff_var
+        FROM agg
+        WHERE matches_played >= %s
+        ORDER BY coeff_var ASC, avg_kills DESC
+        LIMIT %s
+    """, params=('min_matches', 'top_n'))
@@ -0,0 +1,688 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rollup tables over `kills` (player x match, player x map, player x tournament, team x map),
+maintained incrementally per match.
+
+A match is (Tournament, Stage, Match Type, Match Name): names such as "TeamA vs TeamB" repeat
+across events. `rollup_watermark` stores each applied match with its row count and a checksum of
+the columns the rollups read; a refresh re-applies the matches that are new or whose fingerprint
+changed (a re-import) and backs out the ones gone from `kills`. Each match's per (map, player,
+team) sums are kept in `rollup_unit_player`, so a changed or deleted match is backed out without
+its old rows; the rollup groups it touches are then re-derived from those sums, never from
+the whole of `kills`. Change detection itself reads only the tournaments that importer.py logged
+in `import_partitions` since the last refresh (`rollup_state`).
+
+Key columns store NULL as '' so the reports' `<> ''` filters behave as before.
+Rows without a `Match Name` cannot be attributed to a match and are not rolled up.
+
+`rollup_player_moments` keeps per-player kill moments (count, mean, M2) per scope: 'all' and
+'tournament' sample kills per match, 'map' samples kills per match on a map. A refresh removes
+the samples of the backed-out matches and merges those of the applied ones in place, so the
+consistency reports never rescan history (see consistency.py for merging and rolling windows on
+the Python side).
+"""
+
+import argparse
+from typing import Dict, Optional, Sequence
+
+from reports import Report, register
+
+# ---------- DDL ----------
+
+DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS rollup_watermark (
+      unit_id      BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+      tournament   VARCHAR(191) NOT NULL,
+      stage        VARCHAR(191) NOT NULL,
+      match_type   VARCHAR(191) NOT NULL,
+      match_name   VARCHAR(191) NOT NULL,
+      rows_applied INT NOT NULL,
+      checksum     DECIMAL(32,0) NOT NULL,
+      applied_at   TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      UNIQUE KEY ux_rw_match (tournament, stage, match_type, match_name),
+      KEY ix_rw_match_name (match_name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_unit_player (
+      unit_id    BIGINT NOT NULL,
+      tournament VARCHAR(191) NOT NULL,
+      match_name VARCHAR(191) NOT NULL,
+      map_name   VARCHAR(191) NOT NULL,
+      player     VARCHAR(191) NOT NULL,
+      team       VARCHAR(191) NOT NULL,
+      kills      BIGINT NOT NULL,
+      deaths     BIGINT NOT NULL,
+      PRIMARY KEY (unit_id, map_name, player, team),
+      KEY ix_rup_match_player (match_name, player),
+      KEY ix_rup_map_player (map_name, player),
+      KEY ix_rup_tournament_player (tournament, player),
+      KEY ix_rup_map_team (map_name, team)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_player_match (
+      match_name VARCHAR(191) NOT NULL,
+      player     VARCHAR(191) NOT NULL,
+      tournament VARCHAR(191) NOT NULL,
+      team       VARCHAR(191) NULL,
+      kills      BIGINT NOT NULL,
+      deaths     BIGINT NOT NULL,
+      PRIMARY KEY (match_name, player),
+      KEY ix_rpm_player (player)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_player_map (
+      map_name       VARCHAR(191) NOT NULL,
+      player         VARCHAR(191) NOT NULL,
+      matches_played INT NOT NULL,
+      kills          BIGINT NOT NULL,
+      deaths         BIGINT NOT NULL,
+      PRIMARY KEY (map_name, player)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_player_tournament (
+      tournament     VARCHAR(191) NOT NULL,
+      player         VARCHAR(191) NOT NULL,
+      matches_played INT NOT NULL,
+      kills          BIGINT NOT NULL,
+      deaths         BIGINT NOT NULL,
+      PRIMARY KEY (tournament, player)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_team_map (
+      map_name VARCHAR(191) NOT NULL,
+      team     VARCHAR(191) NOT NULL,
+      kills    BIGINT NOT NULL,
+      deaths   BIGINT NOT NULL,
+      PRIMARY KEY (map_name, team)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_state (
+      source   VARCHAR(64) NOT NULL PRIMARY KEY,
+      last_seq BIGINT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_player_moments (
+      scope     VARCHAR(16)  NOT NULL,
+      scope_key VARCHAR(191) NOT NULL,
+      player    VARCHAR(191) NOT NULL,
+      n         BIGINT NOT NULL,
+      mean      DOUBLE NOT NULL,
+      m2        DOUBLE NOT NULL,
+      PRIMARY KEY (scope, scope_key, player)
+    )
+    """,
+]
+
+ROLLUP_TABLES = [
+    "rollup_unit_player",
+    "rollup_player_match",
+    "rollup_player_map",
+    "rollup_player_tournament",
+    "rollup_team_map",
+    "rollup_player_moments",
+    "rollup_watermark",
+    "rollup_state",
+]
+
+# ---------- Incremental refresh ----------
+
+# one row per match: its row count and an order-independent checksum of the columns rolled up.
+# Materialized once per refresh into rollup_units and read by both the changed and removed checks;
+# {scope} limits it to the tournaments imported since the last refresh.
+SQL_UNITS = """
+    INSERT INTO rollup_units (tournament, stage, match_type, match_name, n_rows, checksum)
+    SELECT
+      COALESCE(`Tournament`, '') AS tournament,
+      COALESCE(`Stage`, '') AS stage,
+      COALESCE(`Match Type`, '') AS match_type,
+      `Match Name` AS match_name,
+      COUNT(*) AS n_rows,
+      SUM(CRC32(JSON_ARRAY(`Map`, `Player`, `Player Team`, `Player Kills`, `Enemy Kills`))) AS checksum
+    FROM kills
+    WHERE `Match Name` IS NOT NULL{scope}
+    GROUP BY COALESCE(`Tournament`, ''), COALESCE(`Stage`, ''), COALESCE(`Match Type`, ''), `Match Name`
+"""
+
+UNIT_JOIN = """
+    {a}.tournament = {b}.tournament AND {a}.stage = {b}.stage
+    AND {a}.match_type = {b}.match_type AND {a}.match_name = {b}.match_name
+"""
+
+def _on(a: str, b: str) -> str:
+    return UNIT_JOIN.format(a=a, b=b)
+
+# new matches and matches whose rows changed; old_id is the applied version to back out
+SQL_CHANGED = """
+    INSERT INTO rollup_changed (tournament, stage, match_type, match_name, rows_now, checksum, old_id)
+    SELECT s.tournament, s.stage, s.match_type, s.match_name, s.n_rows, s.checksum, w.unit_id
+    FROM rollup_units s
+    LEFT JOIN rollup_watermark w ON""" + _on("w", "s") + """
+    WHERE w.unit_id IS NULL OR w.rows_applied <> s.n_rows OR w.checksum <> s.checksum
+"""
+
+# applied matches (of the tournaments in scope) no longer in `kills`
+SQL_REMOVED = """
+    INSERT INTO rollup_changed (tournament, stage, match_type, match_name, rows_now, checksum, old_id)
+    SELECT w.tournament, w.stage, w.match_type, w.match_name, 0, 0, w.unit_id
+    FROM rollup_watermark w
+    LEFT JOIN rollup_units s ON""" + _on("w", "s") + """
+    WHERE s.match_name IS NULL{scope}
+"""
+
+def _in(column: str, values: Sequence[str]) -> str:
+    return f"{column} IN ({', '.join(['%s'] * len(values))})"
+
+def scope_filters(scope: Optional[Sequence[str]]):
+    """(kills filter, watermark filter, params of each) for SQL_UNITS / SQL_REMOVED; None: every tournament."""
+    if scope is None:
+        return "", "", (), ()
+    named = [t for t in scope if t]
+    kills = [_in("`Tournament`", named)] if named else []
+    if "" in scope:
+        kills.append("`Tournament` IS NULL OR `Tournament` = ''")
+    return " AND (" + " OR ".join(kills) + ")", " AND " + _in("w.tournament", scope), tuple(named), tuple(scope)
+
+# rollup groups touched by the per-match sums of the changed matches (old versions, then new)
+SQL_TOUCH_OLD = """
+    INSERT INTO rollup_touched (tournament, match_name, map_name, player, team)
+    SELECT u.tournament, u.match_name, u.map_name, u.player, u.team
+    FROM rollup_unit_player u
+    JOIN rollup_changed c ON c.old_id = u.unit_id
+"""
+
+SQL_TOUCH_NEW = """
+    INSERT INTO rollup_touched (tournament, match_name, map_name, player, team)
+    SELECT u.tournament, u.match_name, u.map_name, u.player, u.team
+    FROM rollup_unit_player u
+    JOIN rollup_watermark w ON w.unit_id = u.unit_id
+    JOIN rollup_changed c ON""" + _on("c", "w") + """
+"""
+
+# back out the applied versions, then apply the current rows
+BACK_OUT = [
+    "DELETE u FROM rollup_unit_player u JOIN rollup_changed c ON c.old_id = u.unit_id",
+    "DELETE w FROM rollup_watermark w JOIN rollup_changed c ON c.old_id = w.unit_id",
+]
+
+APPLY = [
+    """
+    INSERT INTO rollup_watermark (tournament, stage, match_type, match_name, rows_applied, checksum)
+    SELECT tournament, stage, match_type, match_name, rows_now, checksum
+    FROM rollup_changed
+    WHERE rows_now > 0
+    """,
+    """
+    INSERT INTO rollup_unit_player (unit_id, tournament, match_name, map_name, player, team, kills, deaths)
+    SELECT
+      w.unit_id, w.tournament, w.match_name,
+      COALESCE(k.`Map`, ''),
+      COALESCE(k.`Player`, ''),
+      COALESCE(k.`Player Team`, ''),
+      SUM(COALESCE(k.`Player Kills`,0)),
+      SUM(COALESCE(k.`Enemy Kills`,0))
+    FROM kills k
+    JOIN rollup_changed c
+      ON c.tournament = COALESCE(k.`Tournament`, '') AND c.stage = COALESCE(k.`Stage`, '')
+      AND c.match_type = COALESCE(k.`Match Type`, '') AND c.match_name = k.`Match Name`
+    JOIN rollup_watermark w ON""" + _on("w", "c") + """
+    WHERE c.rows_now > 0
+    GROUP BY w.unit_id, w.tournament, w.match_name, COALESCE(k.`Map`, ''), COALESCE(k.`Player`, ''),
+             COALESCE(k.`Player Team`, '')
+    """,
+]
+
+# (DELETE, INSERT) per rollup: the touched groups are dropped and re-derived from rollup_unit_player.
+# A temporary table can be opened once per statement, hence one DISTINCT read of rollup_touched each.
+RECOMPUTE = [
+    (
+        """
+        DELETE p FROM rollup_player_match p
+        JOIN (SELECT DISTINCT match_name, player FROM rollup_touched) t
+          ON t.match_name = p.match_name AND t.player = p.player
+        """,
+        """
+        INSERT INTO rollup_player_match (match_name, player, tournament, team, kills, deaths)
+        SELECT u.match_name, u.player, MAX(u.tournament), NULLIF(MAX(u.team), ''), SUM(u.kills), SUM(u.deaths)
+        FROM rollup_unit_player u
+        JOIN (SELECT DISTINCT match_name, player FROM rollup_touched) t
+          ON t.match_name = u.match_name AND t.player = u.player
+        GROUP BY u.match_name, u.player
+        """,
+    ),
+    (
+        """
+        DELETE p FROM rollup_player_map p
+        JOIN (SELECT DISTINCT map_name, player FROM rollup_touched) t
+          ON t.map_name = p.map_name AND t.player = p.player
+        """,
+        """
+        INSERT INTO rollup_player_map (map_name, player, matches_played, kills, deaths)
+        SELECT u.map_name, u.player, COUNT(DISTINCT u.match_name), SUM(u.kills), SUM(u.deaths)
+        FROM rollup_unit_player u
+        JOIN (SELECT DISTINCT map_name, player FROM rollup_touched) t
+          ON t.map_name = u.map_name AND t.player = u.player
+        GROUP BY u.map_name, u.player
+        """,
+    ),
+    (
+        """
+        DELETE p FROM rollup_player_tournament p
+        JOIN (SELECT DISTINCT tournament, player FROM rollup_touched) t
+          ON t.tournament = p.tournament AND t.player = p.player
+        """,
+        """
+        INSERT INTO rollup_player_tournament (tournament, player, matches_played, kills, deaths)
+        SELECT u.tournament, u.player, COUNT(DISTINCT u.match_name), SUM(u.kills), SUM(u.deaths)
+        FROM rollup_unit_player u
+        JOIN (SELECT DISTINCT tournament, player FROM rollup_touched) t
+          ON t.tournament = u.tournament AND t.player = u.player
+        GROUP BY u.tournament, u.player
+        """,
+    ),
+    (
+        """
+        DELETE p FROM rollup_team_map p
+        JOIN (SELECT DISTINCT map_name, team FROM rollup_touched) t
+          ON t.map_name = p.map_name AND t.team = p.team
+        """,
+        """
+        INSERT INTO rollup_team_map (map_name, team, kills, deaths)
+        SELECT u.map_name, u.team, SUM(u.kills), SUM(u.deaths)
+        FROM rollup_unit_player u
+        JOIN (SELECT DISTINCT map_name, team FROM rollup_touched) t
+          ON t.map_name = u.map_name AND t.team = u.team
+        GROUP BY u.map_name, u.team
+        """,
+    ),
+]
+
+# Moments are updated in place from per-match samples: a player's kills in one match (unit),
+# or in one map of it. The samples of the backed-out versions are removed (Chan, inverted) and
+# those of the applied versions merged, so a refresh costs O(changed matches), not O(history).
+# {units} is rollup_unit_player u restricted to the old or the new versions of the changed matches.
+SAMPLES = [
+    """
+    INSERT INTO rollup_samples (sign, scope, scope_key, player, kills)
+    SELECT {sign}, 'all', '', u.player, SUM(u.kills)
+    FROM {units}
+    WHERE u.match_name <> ''
+    GROUP BY u.unit_id, u.player
+    """,
+    """
+    INSERT INTO rollup_samples (sign, scope, scope_key, player, kills)
+    SELECT {sign}, 'tournament', MAX(u.tournament), u.player, SUM(u.kills)
+    FROM {units}
+    WHERE u.match_name <> ''
+    GROUP BY u.unit_id, u.player
+    """,
+    """
+    INSERT INTO rollup_samples (sign, scope, scope_key, player, kills)
+    SELECT {sign}, 'map', u.map_name, u.player, SUM(u.kills)
+    FROM {units}
+    WHERE u.match_name <> ''
+    GROUP BY u.unit_id, u.map_name, u.player
+    """,
+]
+
+OLD_UNITS = "rollup_unit_player u JOIN rollup_changed c ON c.old_id = u.unit_id"
+NEW_UNITS = ("rollup_unit_player u JOIN rollup_watermark w ON w.unit_id = u.unit_id"
+             " JOIN rollup_changed c ON" + _on("c", "w"))
+
+def samples_sql(sign: int, units: str) -> list:
+    return [sql.replace("{sign}", str(sign)).replace("{units}", units) for sql in SAMPLES]
+
+# AVG over a DOUBLE, not DECIMAL, so the merged mean keeps full precision; m2 = VAR_POP * n
+SQL_SAMPLE_BATCHES = """
+    SELECT scope, scope_key, player, sign, COUNT(*), AVG(CAST(kills AS DOUBLE)), VAR_POP(kills) * COUNT(*)
+    FROM rollup_samples
+    GROUP BY scope, scope_key, player, sign
+"""
+
+SQL_TOUCHED_MOMENTS = """
+    SELECT m.scope, m.scope_key, m.player, m.n, m.mean, m.m2
+    FROM rollup_player_moments m
+    JOIN (SELECT DISTINCT scope, scope_key, player FROM rollup_samples) s
+      ON s.scope = m.scope AND s.scope_key = m.scope_key AND s.player = m.player
+"""
+
+def update_moments(current, batches) -> dict:
+    """(scope, scope_key, player) -> Moments after removing the -1 and merging the +1 sample batches."""
+    from consistency import Moments
+
+    moments = {tuple(key): Moments(n, mean, m2) for *key, n, mean, m2 in current}
+    # every removal before any merge: a key can lose an old version and gain a new one
+    for sign, apply in ((-1, Moments.subtract), (1, Moments.merge)):
+        for scope, scope_key, player, _, n, mean, m2 in (row for row in batches if row[3] == sign):
+            apply(moments.setdefault((scope, scope_key, player), Moments()), Moments(n, mean, m2))
+    return moments
+
+TEMP_TABLES = {
+    "rollup_units": (
+        "tournament VARCHAR(191) NOT NULL, stage VARCHAR(191) NOT NULL, match_type VARCHAR(191) NOT NULL,"
+        " match_name VARCHAR(191) NOT NULL, n_rows INT NOT NULL, checksum DECIMAL(32,0) NOT NULL,"
+        " PRIMARY KEY (tournament, stage, match_type, match_name)"
+    ),
+    "rollup_changed": (
+        "tournament VARCHAR(191) NOT NULL, stage VARCHAR(191) NOT NULL, match_type VARCHAR(191) NOT NULL,"
+        " match_name VARCHAR(191) NOT NULL, rows_now INT NOT NULL, checksum DECIMAL(32,0) NOT NULL,"
+        " old_id BIGINT NULL, PRIMARY KEY (tournament, stage, match_type, match_name), KEY (old_id)"
+    ),
+    "rollup_touched": (
+        "tournament VARCHAR(191) NOT NULL, match_name VARCHAR(191) NOT NULL, map_name VARCHAR(191) NOT NULL,"
+        " player VARCHAR(191) NOT NULL, team VARCHAR(191) NOT NULL"
+    ),
+    "rollup_samples": (
+        "sign TINYINT NOT NULL, scope VARCHAR(16) NOT NULL, scope_key VARCHAR(191) NOT NULL,"
+        " player VARCHAR(191) NOT NULL, kills BIGINT NOT NULL"
+    ),
+}
+
+def ensure_rollups(conn) -> None:
+    cur = conn.cursor()
+    # rollups from before per-match watermarks (keyed on Match Name alone) cannot be backed out: rebuild
+    cur.execute(
+        "SELECT COUNT(*) FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = 'rollup_watermark' AND column_name = 'unit_id'"
+    )
+    (current,) = cur.fetchone()
+    cur.execute("SHOW TABLES LIKE 'rollup_watermark'")
+    if cur.fetchall() and not current:
+        for table in ROLLUP_TABLES:
+            cur.execute(f"DROP TABLE IF EXISTS {table}")
+    for ddl in DDL:
+        cur.execute(ddl)
+    cur.close()
+
+def write_moments(cur) -> None:
+    cur.execute(SQL_SAMPLE_BATCHES)
+    batches = cur.fetchall()
+    cur.execute(SQL_TOUCHED_MOMENTS)
+    moments = update_moments(cur.fetchall(), batches)
+    gone = [key for key, m in moments.items() if m.n == 0]
+    kept = [key + (m.n, m.mean, m.m2) for key, m in moments.items() if m.n > 0]
+    if gone:
+        cur.executemany(
+            "DELETE FROM rollup_player_moments WHERE scope = %s AND scope_key = %s AND player = %s", gone
+        )
+    if kept:
+        cur.executemany(
+            "INSERT INTO rollup_player_moments (scope, scope_key, player, n, mean, m2) "
+            "VALUES (%s, %s, %s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE n = VALUES(n), mean = VALUES(mean), m2 = VALUES(m2)",
+            kept,
+        )
+
+def changed_tournaments(cur):
+    """(tournaments of `kills` imported since the last refresh, latest import seq).
+
+    The tournaments are None when every match has to be checked: no import log (tables loaded by
+    hand), no refresh against the log yet, or a whole-table re-import (a NULL partition).
+    """
+    cur.execute("SHOW TABLES LIKE 'import_partitions'")
+    if not cur.fetchall():
+        return None, None
+    cur.execute("SELECT COALESCE(MAX(seq), 0) FROM import_partitions")
+    (seq,) = cur.fetchone()
+    cur.execute("SELECT last_seq FROM rollup_state WHERE source = 'kills'")
+    row = cur.fetchone()
+    if row is None:
+        return None, seq
+    cur.execute(
+        "SELECT part FROM import_partitions WHERE table_name = 'kills' AND seq > %s AND seq <= %s",
+        (row[0], seq),
+    )
+    parts = {part for (part,) in cur.fetchall()}
+    return (None if None in parts else sorted(parts)), seq
+
+def refresh_rollups(conn, rebuild: bool = False, full: bool = False) -> int:
+    """Apply new and changed matches, back out removed ones. Returns the number of matches re-applied.
+
+    Only the tournaments the importer replaced since the last refresh are checked, unless `full`
+    (for rows edited outside importer.py) or `rebuild`.
+    """
+    ensure_rollups(conn)
+    cur = conn.cursor()
+    changed = 0
+    try:
+        scope, seq = changed_tournaments(cur)
+        if rebuild or full:
+            scope = None
+        if rebuild:
+            for table in ROLLUP_TABLES:
+                cur.execute(f"DELETE FROM {table}")
+        if scope != []:
+            for table, columns in TEMP_TABLES.items():
+                cur.execute(f"DROP TEMPORARY TABLE IF EXISTS {table}")
+                cur.execute(f"CREATE TEMPORARY TABLE {table} ({columns})")
+            in_kills, in_marks, kills_params, marks_params = scope_filters(scope)
+            cur.execute(SQL_UNITS.replace("{scope}", in_kills), kills_params)
+            cur.execute(SQL_CHANGED)
+            cur.execute(SQL_REMOVED.replace("{scope}", in_marks), marks_params)
+            cur.execute("SELECT COUNT(*) FROM rollup_changed")
+            (changed,) = cur.fetchone()
+        if changed:
+            cur.execute(SQL_TOUCH_OLD)
+            for sql in samples_sql(-1, OLD_UNITS) + BACK_OUT + APPLY + samples_sql(1, NEW_UNITS):
+                cur.execute(sql)
+            cur.execute(SQL_TOUCH_NEW)
+            for delete, insert in RECOMPUTE:
+                cur.execute(delete)
+                cur.execute(insert)
+            write_moments(cur)
+        if seq is not None:
+            cur.execute("REPLACE INTO rollup_state (source, last_seq) VALUES ('kills', %s)", (seq,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        for table in TEMP_TABLES:
+            cur.execute(f"DROP TEMPORARY TABLE IF EXISTS {table}")
+        cur.close()
+    return int(changed)
+
+# ---------- Reports over rollups ----------
+
+# same --run names as reports.REPORTS, reading the rollup tables instead of `kills` (no nemesis)
+REPORTS: Dict[str, Report] = {}
+
+register("global", "global_kd", """
+        WITH agg AS (
+          SELECT player, COUNT(*) AS matches_played, SUM(kills) AS kills_total, SUM(deaths) AS deaths_total
+          FROM rollup_player_match
+          GROUP BY player
+        )
+        SELECT
+          player, matches_played, kills_total, deaths_total,
+          ROUND(kills_total / NULLIF(deaths_total, 0), 3) AS kd
+        FROM agg
+        WHERE matches_played >= %s
+        ORDER BY kd DESC, kills_total DESC
+        LIMIT %s
+    """, params=("min_matches", "top_n"), tables=("rollup_player_match",), registry=REPORTS)
+
+register("team", "team_kd", """
+        SELECT
+          team AS Team,
+          SUM(kills)  AS team_kills,
+          SUM(deaths) AS team_deaths,
+          ROUND(SUM(kills) / NULLIF(SUM(deaths), 0), 3) AS team_kd
+        FROM rollup_team_map
+        WHERE team <> ''
+        GROUP BY team
+        ORDER BY team_kd DESC, team_kills DESC
+    """, tables=("rollup_team_map",), registry=REPORTS)
+
+SQL_PER_MAP = """
+        WITH ranked AS (
+          SELECT
+            map_name, player, matches_played,
+            kills AS kills_total, deaths AS deaths_total,
+            kills / NULLIF(deaths, 0) AS kd,
+            ROW_NUMBER() OVER (PARTITION BY map_name ORDER BY kills / NULLIF(deaths, 0) DESC, kills DESC) AS rk
+          FROM rollup_player_map
+          WHERE map_name <> '' AND matches_played >= %s
+        )
+        SELECT map_name, player, matches_played, kills_total, deaths_total, ROUND(kd,3) AS kd
+        FROM ranked
+        WHERE rk <= %s
+        ORDER BY map_name, rk
+    """
+
+register("per_map", "per_map_kd", SQL_PER_MAP, params=("min_matches", "top_n"),
+         tables=("rollup_player_map",), registry=REPORTS)
+
+SQL_RANKED_MATCH = """
+        WITH ranked AS (
+          SELECT
+            match_name, player, team,
+            kills AS kills_in_match, deaths AS deaths_in_match,
+            kills / NULLIF(deaths, 0) AS kd,
+            ROW_NUMBER() OVER (
+              PARTITION BY match_name
+              ORDER BY kills DESC, deaths ASC, player ASC
+            ) AS rk
+          FROM rollup_player_match
+          WHERE match_name <> ''
+        )
+    """
+
+register("mvp", "match_mvp", SQL_RANKED_MATCH + """
+        SELECT match_name, player, team, kills_in_match, deaths_in_match, ROUND(kd,3) AS kd
+        FROM ranked
+        WHERE rk = 1
+        ORDER BY match_name
+    """, tables=("rollup_player_match",), registry=REPORTS)
+
+register("tournament_stars", "tournament_stars", """
+        WITH ranked AS (
+          SELECT
+            tournament, player, matches_played,
+            kills AS kills_total, deaths AS deaths_total,
+            kills / NULLIF(deaths, 0) AS kd,
+            ROW_NUMBER() OVER (PARTITION BY tournament ORDER BY kills / NULLIF(deaths, 0) DESC, kills DESC) AS rk
+          FROM rollup_player_tournament
+          WHERE tournament <> '' AND matches_played >= %s
+        )
+        SELECT tournament, player, matches_played, kills_total, deaths_total, ROUND(kd,3) AS kd
+        FROM ranked
+        WHERE rk <= %s
+        ORDER BY tournament, rk
+    """, params=("min_matches", "top_n"), tables=("rollup_player_tournament",), registry=REPORTS)
+
+register("team_map_kd", "team_map_kd", """
+        WITH ranked AS (
+          SELECT
+            map_name, team,
+            kills AS team_kills, deaths AS team_deaths,
+            kills / NULLIF(deaths, 0) AS team_kd,
+            ROW_NUMBER() OVER (PARTITION BY map_name ORDER BY kills / NULLIF(deaths, 0) DESC, kills DESC) AS rk
+          FROM rollup_team_map
+          WHERE map_name <> '' AND team <> ''
+        )
+        SELECT map_name, team, team_kills, team_deaths, ROUND(team_kd, 3) AS team_kd
+        FROM ranked
+        WHERE rk <= %s
+        ORDER BY map_name, rk
+    """, params=("top_n",), tables=("rollup_team_map",), registry=REPORTS)
+
+register("map_specialists", "map_specialists", SQL_PER_MAP, params=("min_matches", "specialists_k"),
+         tables=("rollup_player_map",), registry=REPORTS)
+
+register("mvp_leaders", "mvp_leaders", SQL_RANKED_MATCH + """
+        SELECT player, COUNT(*) AS mvp_count
+        FROM ranked
+        WHERE rk = 1
+        GROUP BY player
+        ORDER BY mvp_count DESC, player ASC
+        LIMIT %s
+    """, params=("top_n",), tables=("rollup_player_match",), registry=REPORTS)
+
+# sample std from the stored moments; rounding matches reports.REPORTS["consistency"]
+SQL_MOMENTS = """
+        WITH agg AS (
+          SELECT
+            scope_key, player,
+            n AS matches_played,
+            ROUND(mean, 2) AS avg_kills,
+            CASE WHEN n > 1 THEN ROUND(SQRT(GREATEST(m2, 0) / (n - 1)), 2) END AS std_kills
+          FROM rollup_player_moments
+          WHERE scope = '{scope}'
+        )
+    """
+
+def sql_moments(scope: str) -> str:
+    return SQL_MOMENTS.replace("{scope}", scope)
+
+register("consistency", "consistency", sql_moments("all") + """
+        SELECT
+          player, matches_played, avg_kills, std_kills,
+          CASE WHEN avg_kills=0 THEN NULL ELSE ROUND(std_kills/avg_kills, 3) END AS coeff_var
+        FROM agg
+        WHERE matches_played >= %s
+        ORDER BY coeff_var ASC, avg_kills DESC
+        LIMIT %s
+    """, params=("min_matches", "top_n"), tables=("rollup_player_moments",), registry=REPORTS)
+
+SQL_RANKED_MOMENTS = """
+        , ranked AS (
+          SELECT
+            scope_key, player, matches_played, avg_kills, std_kills,
+            CASE WHEN avg_kills=0 THEN NULL ELSE ROUND(std_kills/avg_kills, 3) END AS coeff_var
+          FROM agg
+          WHERE scope_key <> '' AND matches_played >= %s
+        ),
+        ordered AS (
+          SELECT ranked.*,
+                 ROW_NUMBER() OVER (PARTITION BY scope_key ORDER BY coeff_var ASC, avg_kills DESC) AS rk
+          FROM ranked
+        )
+    """
+
+register("consistency_tournament", "consistency_tournament", sql_moments("tournament") + SQL_RANKED_MOMENTS + """
+        SELECT scope_key AS tournament, player, matches_played, avg_kills, std_kills, coeff_var
+        FROM ordered
+        WHERE rk <= %s
+        ORDER BY tournament, rk
+    """, params=("min_matches", "top_n"), tables=("rollup_player_moments",), registry=REPORTS)
+
+register("consistency_map", "consistency_map", sql_moments("map") + SQL_RANKED_MOMENTS + """
+        SELECT scope_key AS map_name, player, matches_played, avg_kills, std_kills, coeff_var
+        FROM ordered
+        WHERE rk <= %s
+        ORDER BY map_name, rk
+    """, params=("min_matches", "top_n"), tables=("rollup_player_moments",), registry=REPORTS)
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    from main import add_db_args
+
+    p = argparse.ArgumentParser(description="Incrementally refresh the kills rollup tables")
+    add_db_args(p)
+    p.add_argument("--rebuild", action="store_true", help="Drop all rollup rows and re-apply every match")
+    p.add_argument("--full-check", action="store_true",
+                   help="Check every match, not only the tournaments imported since the last refresh")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from main import open_conn
+
+    args = parse_args(argv)
+    conn = open_conn(args)
+    changed = refresh_rollups(conn, rebuild=args.rebuild, full=args.full_check)
+    conn.close()
+    print(f"[OK] Rollups refreshed: {changed} new, changed or removed matches applied")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local report server: load the kills aggregates once (engine.BASE_SQL plus player x enemy pairs
+for nemesis), keep them in memory and answer the main.py reports over HTTP/JSON.
+
+    GET  /reports                                   report names and their parameters
+    GET  /report/<name>?min_matches=2&top_n=20      same rows as `main.py --run <name>`
+    GET  /health                                    load time, table versions, row counts
+    POST /refresh  (or GET)                         reload now, whether or not the tables changed
+
+Parameter-independent intermediates (per player, per map, per match, ...) are built at load,
+so a request only filters and sorts small frames; encoded responses are memoised per bound
+parameters until the next reload. A timer re-probes the table versions (as the result cache
+does) and reloads in the background only when `kills` changed; requests keep reading the old
+data until the new one is swapped in.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import argparse
+import threading
+import datetime as dt
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import reports
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_LISTEN = "127.0.0.1:8765"
+DEFAULT_INTERVAL = 60.0
+MEMO_SIZE = 512
+TABLES = ["kills"]
+
+# nemesis without ORDER BY / LIMIT: sorted once at load, each request takes the head
+SQL_PAIRS = """
+    SELECT
+      `Player` AS player,
+      `Enemy`  AS enemy,
+      SUM(COALESCE(`Enemy Kills`,0))  AS deaths_from_enemy,
+      SUM(COALESCE(`Player Kills`,0)) AS kills_on_enemy
+    FROM kills
+    GROUP BY `Player`, `Enemy`
+"""
+
+# ---------- Cube ----------
+
+class Cube:
+    """One loaded copy of the aggregates; never mutated after warm-up, replaced on reload."""
+
+    def __init__(self, base: pd.DataFrame, pairs: pd.DataFrame, versions: Dict[str, str]):
+        import encoded
+        import engine
+
+        self.base = encoded.encode_frame(base)
+        pairs = encoded.encode_frame(pairs, {"player": "player", "enemy": "player"})
+        self.pairs = pairs.sort_values("deaths_from_enemy", ascending=False, kind="mergesort").reset_index(drop=True)
+        self.versions = versions
+        self.cache: Dict[str, pd.DataFrame] = {}
+        # fill every intermediate now, so concurrent requests only read the cache
+        engine.build_reports(self.base, engine.REPORTS, 1, 1, self.cache)
+        self.loaded_at = dt.datetime.now().isoformat(timespec="seconds")
+
+    def report(self, name: str, min_matches: int, top_n: int) -> pd.DataFrame:
+        import engine
+
+        check_knobs(min_matches, top_n)
+        if name == "nemesis":
+            return self.pairs.head(top_n)
+        return engine.build_reports(self.base, [name], min_matches, top_n, self.cache)[name]
+
+def check_knobs(min_matches: int, top_n: int) -> None:
+    # head(-n) would drop rows and top-K would be empty instead of failing
+    if top_n < 1 or min_matches < 0:
+        raise ValueError(f"top_n must be >= 1 and min_matches >= 0 (got top_n={top_n}, min_matches={min_matches})")
+
+def load_cube(args) -> Cube:
+    from main import open_backend, run_query
+    import engine
+
+    conn = open_backend(args)
+    try:
+        versions = probe_versions(args, conn)
+        base = run_query(conn, engine.BASE_SQL)
+        pairs = run_query(conn, SQL_PAIRS)
+    finally:
+        conn.close()
+    return Cube(base, pairs, versions)
+
+def probe_versions(args, conn=None) -> Dict[str, str]:
+    import qcache
+
+    if args.backend == "snapshot":
+        return qcache.snapshot_versions(args.snapshot_dir, TABLES)
+    if conn is not None:
+        return qcache.mysql_versions(conn, TABLES)
+    from main import open_conn
+
+    conn = open_conn(args)
+    try:
+        return qcache.mysql_versions(conn, TABLES)
+    finally:
+        conn.close()
+
+# ---------- Server ----------
+
+class ReportServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], args, loader: Callable[[], Cube]):
+        super().__init__(address, ReportHandler)
+        self.args = args
+        self.loader = loader
+        self.cube = loader()
+        self.memo: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self.memo_lock = threading.Lock()
+        self.reload_lock = threading.Lock()
+
+    def reload(self, force: bool = False) -> bool:
+        """Swap in a fresh cube if `kills` changed (or always with force); True if reloaded."""
+        with self.reload_lock:
+            if not force and probe_versions(self.args) == self.cube.versions:
+                return False
+            cube = self.loader()
+            with self.memo_lock:
+                self.cube = cube
+                self.memo.clear()
+            return True
+
+    def watch(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                if self.reload():
+                    print(f"[server] reloaded at {self.cube.loaded_at}", flush=True)
+            except Exception as e:
+                print(f"[server] refresh failed, keeping the loaded data: {e}", flush=True)
+
+    def render(self, name: str, min_matches: int, top_n: int) -> bytes:
+        r = reports.REPORTS[name]
+        values = reports.knobs(min_matches, top_n)
+        key = (name,) + reports.bind(r, values)
+        with self.memo_lock:
+            cube = self.cube
+            body = self.memo.get(key)
+            if body is not None:
+                self.memo.move_to_end(key)
+                return body
+
+        df = cube.report(name, min_matches, top_n)
+        meta = {"report": name, "params": dict(zip(r.params, reports.bind(r, values))),
+                "rows": len(df), "loaded_at": cube.loaded_at}
+        body = (json.dumps(meta, ensure_ascii=False)[:-1] + ', "data": '
+                + df.to_json(orient="records", force_ascii=False) + "}").encode("utf-8")
+        with self.memo_lock:
+            if cube is self.cube:
+                self.memo[key] = body
+                while len(self.memo) > MEMO_SIZE:
+                    self.memo.popitem(last=False)
+        return body
+
+class ReportHandler(BaseHTTPRequestHandler):
+    server: ReportServer
+
+    def _send(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, json.dumps({"error": message}, ensure_ascii=False).encode("utf-8"))
+
+    def _int(self, query: Dict[str, list], name: str, default: int) -> int:
+        # accept both min_matches and min-matches, as on the command line
+        values = query.get(name) or query.get(name.replace("_", "-")) or [default]
+        return int(values[-1])
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if not parts or parts == ["reports"]:
+            body = {name: list(r.params) for name, r in reports.REPORTS.items()}
+            return self._send(200, json.dumps(body).encode("utf-8"))
+        if parts == ["health"]:
+            cube = self.server.cube
+            body = {"loaded_at": cube.loaded_at, "versions": cube.versions,
+                    "base_rows": len(cube.base), "pairs": len(cube.pairs), "memoised": len(self.server.memo)}
+            return self._send(200, json.dumps(body, ensure_ascii=False).encode("utf-8"))
+        if parts == ["refresh"]:
+            return self.do_POST()
+        if len(parts) == 2 and parts[0] == "report":
+            name = parts[1]
+            if name not in reports.REPORTS:
+                return self._error(404, f"unknown report {name!r}")
+            query = parse_qs(url.query)
+            try:
+                min_matches = self._int(query, "min_matches", self.server.args.min_matches)
+                top_n = self._int(query, "top_n", self.server.args.top_n)
+            except ValueError:
+                return self._error(400, "min_matches and top_n must be integers")
+            try:
+                check_knobs(min_matches, top_n)
+            except ValueError as e:
+                return self._error(400, str(e))
+            try:
+                return self._send(200, self.server.render(name, min_matches, top_n))
+            except Exception as e:
+                return self._error(500, str(e))
+        return self._error(404, f"no route {url.path!r}")
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path.strip("/") != "refresh":
+            return self._error(404, f"no route {self.path!r}")
+        try:
+            reloaded = self.server.reload(force=True)
+        except Exception as e:
+            return self._error(500, f"reload failed: {e}")
+        body = {"reloaded": reloaded, "loaded_at": self.server.cube.loaded_at}
+        self._send(200, json.dumps(body).encode("utf-8"))
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.args.verbose:
+            super().log_message(format, *args)
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    from main import add_db_args
+
+    p = argparse.ArgumentParser(description="Serve the kills reports as JSON from in-memory aggregates")
+    add_db_args(p)
+    p.add_argument("--backend", choices=["mysql", "snapshot"], default="mysql")
+    p.add_argument("--snapshot-dir", default="snapshots")
+    p.add_argument("--listen", default=DEFAULT_LISTEN, help="host:port to serve on")
+    p.add_argument("--refresh-interval", type=float, default=DEFAULT_INTERVAL,
+                   help="Seconds between table version checks; 0 disables (use POST /refresh)")
+    p.add_argument("--min-matches", type=int, default=2, help="Default when a request omits min_matches")
+    p.add_argument("--top-n", type=int, default=20, help="Default when a request omits top_n")
+    p.add_argument("--verbose", action="store_true", help="Log every request")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    host, _, port = args.listen.rpartition(":")
+    started = time.perf_counter()
+    server = ReportServer((host or "127.0.0.1", int(port)), args, lambda: load_cube(args))
+    cube = server.cube
+    print(f"[server] loaded {len(cube.base)} base rows, {len(cube.pairs)} pairs "
+          f"in {time.perf_counter() - started:.1f}s; listening on http://{args.listen}", flush=True)
+    if args.refresh_interval > 0:
+        threading.Thread(target=server.watch, args=(args.refresh_interval,), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tournament-sharded scan engine: each tournament of `kills` is aggregated on its own, in a process
+pool, into partial states that merge exactly:
+
+    player_match   (match_name, player) -> team, kills, deaths       sums; distinct matches per player
+    player_map     (map_name, player, match_name) -> kills, deaths   sums; distinct matches per map
+    team, team_map (team[, map_name]) -> kills, deaths               sums
+    tournament     (tournament, player) -> matches, kills, deaths    complete within its shard
+
+The merge rebuilds engine.py's intermediates (per_player, per_map, per_match, per_team, ...), so
+every engine report, ranking included, comes out as with `--engine scan`. Ranked reports are not
+pre-cut to top-K per shard: a player's totals can span tournaments, so only the merged sums rank.
+
+Partials are stored per tournament with a fingerprint (rows, kills, deaths, content checksum).
+A run reuses every shard whose fingerprint is unchanged, so finished events are never aggregated
+again and only the live (or re-imported or corrected) tournament runs; nothing is probed at all
+while `kills` is unchanged. A NULL and a '' tournament share one shard.
+
+With `precision` (main.py --approx-matches) a shard keeps HyperLogLog sketches of its matches per
+(map, player) in place of the player_map match sets (see sketches.py); per-map matches_played is
+then a sketch union across shards, so no (map, player, match) set is fetched or rebuilt for
+unchanged tournaments. Per-player counts come from the player_match partials, which the per-match
+reports merge anyway, and per-tournament counts are complete in their shard: both stay exact.
+Exact and sketched shards are indexed separately and can share a directory.
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import pickle
+import hashlib
+import argparse
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_DIR = "shards"
+INDEX = "index.json"
+TABLES = ["kills"]
+
+# per tournament ('' and NULL are one shard): row count, sums and a content checksum, so a row
+# corrected in place (same count and sums) still changes the fingerprint
+SQL_FINGERPRINTS = """
+    SELECT
+      COALESCE(`Tournament`, '') AS tournament,
+      COUNT(*) AS n_rows,
+      SUM(COALESCE(`Player Kills`,0)) AS kills,
+      SUM(COALESCE(`Enemy Kills`,0))  AS deaths,
+      SUM({checksum}) AS checksum
+    FROM kills
+    GROUP BY COALESCE(`Tournament`, '')
+"""
+
+# per-row 32-bit hash over the columns a shard aggregates (32 bits keep the DuckDB sum a BIGINT)
+CHECKSUM = {
+    "mysql": "CRC32(JSON_ARRAY(`Match Name`, `Map`, `Player`, `Player Team`, `Player Kills`, `Enemy Kills`))",
+    "snapshot": "hash(`Match Name`, `Map`, `Player`, `Player Team`, `Player Kills`, `Enemy Kills`) % 4294967296",
+}
+
+def fingerprint_sql(backend: str) -> str:
+    return SQL_FINGERPRINTS.replace("{checksum}", CHECKSUM[backend])
+
+# engine.BASE_SQL restricted to one tournament ('' stands for NULL and '')
+SQL_SHARD = """
+    SELECT
+      `Tournament`  AS tournament,
+      `Match Name`  AS match_name,
+      `Map`         AS map_name,
+      `Player`      AS player,
+      `Player Team` AS team,
+      SUM(COALESCE(`Player Kills`,0)) AS kills,
+      SUM(COALESCE(`Enemy Kills`,0))  AS deaths
+    FROM kills
+    WHERE {where}
+    GROUP BY `Tournament`, `Match Name`, `Map`, `Player`, `Player Team`
+"""
+
+def shard_sql(tournament: str) -> str:
+    return SQL_SHARD.replace("{where}", "`Tournament` = %s" if tournament else "COALESCE(`Tournament`, '') = ''")
+
+# ---------- Partials ----------
+
+def partials(base: pd.DataFrame, precision: Optional[int] = None) -> Dict[str, object]:
+    """Mergeable partial states of one shard's base rows (engine.BASE_SQL columns).
+
+    precision: keep a MatchSketches instead of the player_map match sets.
+    """
+    import engine
+    import sketches
+
+    sums = {"kills": ("kills", "sum"), "deaths": ("deaths", "sum")}
+
+    def group(df, keys, **aggs):
+        return df.groupby(keys, dropna=False, sort=False, observed=True).agg(**aggs).reset_index()
+
+    nonblank = engine._nonblank
+    if precision:
+        distinct = {"sketches": sketches.MatchSketches.from_base(base, precision)}
+    else:
+        distinct = {"player_map": group(base[nonblank(base["map_name"])], ["map_name", "player", "match_name"], **sums)}
+    return {
+        "player_match": group(base, ["match_name", "player"], team=("team", "max"), **sums),
+        **distinct,
+        "team": group(base[nonblank(base["team"])], ["team"], **sums),
+        "team_map": group(base[nonblank(base["map_name"]) & nonblank(base["team"])], ["map_name", "team"], **sums),
+        "tournament": engine._group(base[nonblank(base["tournament"])], ["tournament", "player"]),
+    }
+
+def merge(parts: List[Dict[str, object]], precision: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """engine.py intermediates from the partials of every shard (the `cache` of build_reports)."""
+    import pandas as pd
+    import engine
+    import sketches
+
+    def cat(name: str) -> pd.DataFrame:
+        return pd.concat([p[name] for p in parts], ignore_index=True)
+
+    def group(df, keys, **aggs):
+        return df.groupby(keys, dropna=False, sort=True, observed=True).agg(**aggs).reset_index()
+
+    sums = {"kills": ("kills", "sum"), "deaths": ("deaths", "sum")}
+    player_match = group(cat("player_match"), ["match_name", "player"], team=("team", "max"), **sums)
+    totals = {"matches_played": ("match_name", "nunique"),
+              "kills_total": ("kills", "sum"), "deaths_total": ("deaths", "sum")}
+    cache = {}
+
+    cache["per_player"] = group(player_match, ["player"], **totals)
+    if precision:
+        s = sketches.MatchSketches.concat([p["sketches"] for p in parts])
+        per_map = s.totals(["map_name", "player"], engine._nonblank(s.keys["map_name"]).to_numpy())
+    else:
+        player_map = group(cat("player_map"), ["map_name", "player", "match_name"], **sums)
+        per_map = group(player_map, ["map_name", "player"], **totals)
+    per_map["kd"] = engine._kd(per_map["kills_total"], per_map["deaths_total"])
+    cache["per_map"] = per_map
+
+    per_match = player_match[engine._nonblank(player_match["match_name"])].rename(
+        columns={"kills": "kills_in_match", "deaths": "deaths_in_match"})[
+        ["match_name", "player", "team", "kills_in_match", "deaths_in_match"]].reset_index(drop=True)
+    per_match["kd"] = engine._kd(per_match["kills_in_match"], per_match["deaths_in_match"])
+    cache["per_match"] = per_match
+
+    team = group(cat("team"), ["team"], **sums).rename(
+        columns={"team": "Team", "kills": "team_kills", "deaths": "team_deaths"})
+    team["team_kd"] = engine._round(engine._kd(team["team_kills"], team["team_deaths"]), 3)
+    cache["per_team"] = engine._order(team, ["team_kd", "team_kills"], [False, False])
+
+    team_map = group(cat("team_map"), ["map_name", "team"], **sums).rename(
+        columns={"kills": "team_kills", "deaths": "team_deaths"})
+    team_map["team_kd"] = engine._kd(team_map["team_kills"], team_map["team_deaths"])
+    cache["per_team_map"] = team_map
+
+    per_tournament = cat("tournament").sort_values(["tournament", "player"], kind="mergesort").reset_index(drop=True)
+    per_tournament["kd"] = engine._kd(per_tournament["kills_total"], per_tournament["deaths_total"])
+    cache["per_tournament"] = per_tournament
+    return cache
+
+# ---------- Shard store ----------
+
+def _suffix(precision: Optional[int]) -> str:
+    return f".hll{precision}" if precision else ""
+
+def _shard_file(tournament: str, precision: Optional[int] = None) -> str:
+    return hashlib.sha1(tournament.encode("utf-8")).hexdigest()[:16] + _suffix(precision) + ".pkl"
+
+def _index_file(precision: Optional[int] = None) -> str:
+    return INDEX.replace(".json", _suffix(precision) + ".json")
+
+def _load_index(shard_dir: str, precision: Optional[int] = None) -> dict:
+    try:
+        with open(os.path.join(shard_dir, _index_file(precision)), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"versions": None, "shards": {}}
+
+def _write(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _aggregate_shard(args, tournament: str, precision: Optional[int] = None) -> Dict[str, object]:
+    """Worker: own connection, one tournament's base rows -> partials."""
+    from main import open_backend, run_query
+
+    conn = open_backend(args)
+    try:
+        base = run_query(conn, shard_sql(tournament), (tournament,) if tournament else None)
+    finally:
+        conn.close()
+    return partials(base, precision)
+
+def load_intermediates(args, jobs: int = 1, rebuild: bool = False,
+                       precision: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """Bring the shard store up to date (changed tournaments only) and merge it.
+
+    precision: sketched shards, approximate per-player / per-map matches_played.
+    """
+    import qcache
+    from concurrent.futures import ProcessPoolExecutor
+    from main import open_backend, run_query
+
+    shard_dir = args.shard_dir
+    os.makedirs(shard_dir, exist_ok=True)
+    index = {"versions": None, "shards": {}} if rebuild else _load_index(shard_dir, precision)
+
+    # opened in this process first: a prompted password is then passed on to the workers
+    conn = open_backend(args)
+    try:
+        if args.backend == "snapshot":
+            versions = qcache.snapshot_versions(args.snapshot_dir, TABLES)
+        else:
+            versions = qcache.mysql_versions(conn, TABLES)
+        if versions != index["versions"]:
+            prints = run_query(conn, fingerprint_sql(args.backend))
+        else:
+            prints = None
+    finally:
+        conn.close()
+
+    shards = index["shards"]
+    todo: List[str] = []
+    if prints is not None:
+        current = {}
+        for row in prints.itertuples(index=False):
+            current[str(row.tournament)] = [int(row.n_rows), int(row.kills), int(row.deaths), int(row.checksum)]
+        for gone in set(shards) - set(current):
+            try:
+                os.remove(os.path.join(shard_dir, shards.pop(gone)["file"]))
+            except OSError:
+                pass
+        todo = [t for t, fp in current.items() if t not in shards or shards[t]["fingerprint"] != fp]
+        for t in todo:
+            shards[t] = {"file": _shard_file(t, precision), "fingerprint": current[t]}
+
+    if todo:
+        print(f"[shards] aggregating {len(todo)} of {len(shards)} tournaments"
+              + (f" in {min(jobs, len(todo))} processes" if jobs > 1 else ""))
+        if jobs > 1 and len(todo) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as pool:
+                results = pool.map(_aggregate_shard, [args] * len(todo), todo, [precision] * len(todo))
+                fresh = dict(zip(todo, results))
+        else:
+            fresh = {t: _aggregate_shard(args, t, precision) for t in todo}
+        for t, part in fresh.items():
+            _write(os.path.join(shard_dir, shards[t]["file"]), pickle.dumps(part, protocol=pickle.HIGHEST_PROTOCOL))
+    else:
+        fresh = {}
+        print(f"[shards] all {len(shards)} tournaments up to date")
+
+    index["versions"] = versions
+    _write(os.path.join(shard_dir, _index_file(precision)), json.dumps(index, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    parts = []
+    for t in sorted(shards):
+        if t in fresh:
+            parts.append(fresh[t])
+        else:
+            with open(os.path.join(shard_dir, shards[t]["file"]), "rb") as f:
+                parts.append(pickle.load(f))
+    return merge(parts, precision)
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    from main import add_db_args
+
+    p = argparse.ArgumentParser(description="Refresh the per-tournament partial aggregates of `kills`")
+    add_db_args(p)
+    p.add_argument("--backend", choices=["mysql", "snapshot"], default="mysql")
+    p.add_argument("--snapshot-dir", default="snapshots")
+    p.add_argument("--shard-dir", default=DEFAULT_DIR, help="Directory of the stored partials")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Processes aggregating tournaments")
+    p.add_argument("--rebuild", action="store_true", help="Drop the stored partials and aggregate every tournament")
+    p.add_argument("--sketch-precision", type=int, default=None, choices=range(4, 17), metavar="4..16",
+                   help="Refresh the sketched partials used by main.py --approx-matches instead of the exact ones")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    cache = load_intermediates(args, args.jobs, args.rebuild, args.sketch_precision)
+    print(f"[OK] {len(cache['per_player'])} players, {len(cache['per_match'])} player-matches merged")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
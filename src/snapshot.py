@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline snapshot backend: dump the analytics tables to local Parquet files and query them
+with an embedded DuckDB engine, so reports and charts run without a MySQL server.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import json
+import argparse
+import datetime as dt
+from typing import TYPE_CHECKING, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_DIR = "snapshots"
+
+# tables read by main.py reports and analytics.py charts
+TABLES = [
+    "kills",
+    "players_stats",
+    "kills_stats",
+    "maps_played",
+    "maps_scores",
+    "agents_pick_rates",
+    "teams_ids",
+    "players_ids",
+    "tournaments_stages_matches_games_ids",
+]
+
+MANIFEST = "snapshot.json"
+
+# ---------- Dump ----------
+
+def table_path(snapshot_dir: str, table: str) -> str:
+    return os.path.join(snapshot_dir, f"{table}.parquet")
+
+def dump(conn, snapshot_dir: str = DEFAULT_DIR, tables: Sequence[str] = TABLES) -> dict:
+    """Write every table to <snapshot_dir>/<table>.parquet and a snapshot.json manifest."""
+    import pandas as pd
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    counts = {}
+    for table in tables:
+        df = pd.read_sql(f"SELECT * FROM `{table}`", conn)
+        path = table_path(snapshot_dir, table)
+        tmp = path + ".tmp"
+        df.to_parquet(tmp, index=False, compression="zstd")
+        os.replace(tmp, path)
+        counts[table] = len(df)
+        print(f"[OK] {table}: {len(df)} rows -> {path}")
+
+    manifest = {"created_at": dt.datetime.now().isoformat(timespec="seconds"), "tables": counts}
+    with open(os.path.join(snapshot_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+# ---------- Query ----------
+
+def to_duckdb_sql(sql: str) -> str:
+    """Translate the MySQL dialect used in this repo to DuckDB."""
+    sql = re.sub(r"`([^`]*)`", r'"\1"', sql)
+    return re.sub(r"\bAS\s+SIGNED\b", "AS BIGINT", sql, flags=re.IGNORECASE)
+
+class SnapshotConn:
+    """DB-API-like handle over a snapshot directory; each table is a DuckDB view on its Parquet file."""
+
+    def __init__(self, snapshot_dir: str = DEFAULT_DIR):
+        import duckdb
+
+        if not os.path.isdir(snapshot_dir):
+            raise FileNotFoundError(f"No snapshot at {snapshot_dir!r}; run `python src/snapshot.py` first")
+        self.snapshot_dir = snapshot_dir
+        self.db = duckdb.connect(database=":memory:")
+        # MySQL sorts NULL as the smallest value; DuckDB puts NULLs last in both directions by default
+        self.db.execute("SET default_null_order = 'nulls_first_on_asc_last_on_desc'")
+        for name in sorted(os.listdir(snapshot_dir)):
+            if name.endswith(".parquet"):
+                path = os.path.join(snapshot_dir, name).replace("'", "''")
+                self.db.execute(f"CREATE VIEW \"{name[:-8]}\" AS SELECT * FROM read_parquet('{path}')")
+
+    def execute(self, sql: str, params: Optional[Sequence] = None):
+        """Run a MySQL-dialect statement on a new DuckDB cursor (description/fetchmany/close)."""
+        sql = to_duckdb_sql(sql)
+        if params:
+            return self.db.cursor().execute(sql.replace("%s", "?"), list(params))
+        return self.db.cursor().execute(sql)
+
+    def query_df(self, sql: str, params: Optional[Sequence] = None) -> pd.DataFrame:
+        return self.execute(sql, params).df()
+
+    def close(self) -> None:
+        self.db.close()
+
+def connect(snapshot_dir: str = DEFAULT_DIR) -> SnapshotConn:
+    return SnapshotConn(snapshot_dir)
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    from main import add_db_args
+
+    p = argparse.ArgumentParser(description="Dump the analytics tables to a local Parquet snapshot")
+    add_db_args(p)
+    p.add_argument("--snapshot-dir", default=DEFAULT_DIR, help="Directory for the Parquet files")
+    p.add_argument("--tables", default=",".join(TABLES), help="Comma-separated tables to dump")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from main import open_conn
+
+    args = parse_args(argv)
+    conn = open_conn(args)
+    tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+    dump(conn, args.snapshot_dir, tables)
+    conn.close()
+    print(f"\nDone. Snapshot saved to: {args.snapshot_dir}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
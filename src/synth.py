@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic VCT data generator: writes a Parquet snapshot (same layout as src/snapshot.py)
+at N x the size of one season, for benchmarks and offline development.
+
+Scale 1 ~ one season: 10 tournaments, 48 teams, ~300 matches, ~120k `kills` rows.
+Tournaments (and so matches and rows) grow linearly with the scale; teams and players grow
+with its square root, and the map/agent pools stay fixed, as they do across real seasons.
+"""
+
+import os
+import math
+import argparse
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+MAPS = ["Ascent", "Bind", "Haven", "Split", "Lotus", "Sunset", "Icebox", "Breeze", "Fracture", "Pearl", "Abyss"]
+STAGES = ["Swiss Stage", "Play-In", "Quarterfinals", "Semifinals", "Grand Final"]
+AGENTS = [
+    "jett", "raze", "reyna", "neon", "yoru", "iso", "phoenix", "waylay",
+    "sova", "fade", "skye", "kayo", "breach", "gekko", "tejo",
+    "killjoy", "cypher", "sage", "chamber", "deadlock", "vyse",
+    "omen", "viper", "astra", "brimstone", "harbor", "clove",
+]
+KILL_TYPES = [("All Kills", 2.4), ("First Kills", 0.35), ("Op Kills", 0.2)]
+
+TOURNAMENTS_PER_SEASON = 10
+TEAMS_PER_SEASON = 48
+MATCHES_PER_TOURNAMENT = 30
+PLAYERS_PER_TEAM = 5
+
+class _Writer:
+    """Appends DataFrames to one Parquet file per table without holding the whole table."""
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self.writers: Dict[str, object] = {}
+
+    def write(self, table: str, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        batch = pa.Table.from_pandas(df, preserve_index=False)
+        if table not in self.writers:
+            self.writers[table] = pq.ParquetWriter(
+                os.path.join(self.out_dir, f"{table}.parquet.tmp"), batch.schema, compression="zstd"
+            )
+        self.writers[table].write_table(batch.cast(self.writers[table].schema))
+
+    def close(self) -> None:
+        for table, writer in self.writers.items():
+            writer.close()
+            path = os.path.join(self.out_dir, f"{table}.parquet")
+            os.replace(path + ".tmp", path)
+
+def _roster(scale: int):
+    n_teams = TEAMS_PER_SEASON * int(math.ceil(math.sqrt(scale)))
+    teams = [f"Team {i:04d}" for i in range(n_teams)]
+    players = np.array([f"player{i:05d}" for i in range(n_teams * PLAYERS_PER_TEAM)], dtype=object)
+    return teams, players.reshape(n_teams, PLAYERS_PER_TEAM)
+
+def _tournament(rng, t_idx: int, t_name: str, teams: List[str], roster: np.ndarray, game_id0: int):
+    """All tables' rows for one tournament."""
+    skill = rng.normal(0, 0.15, size=len(teams))
+    kills_parts, scores, games = [], [], []
+    stats_rows = []
+    game_id = game_id0
+    for m in range(MATCHES_PER_TOURNAMENT):
+        stage_idx = min(m * len(STAGES) // MATCHES_PER_TOURNAMENT, len(STAGES) - 1)
+        stage = STAGES[stage_idx]
+        a, b = rng.choice(len(teams), size=2, replace=False)
+        match_name = f"{teams[a]} vs {teams[b]} #{t_idx}-{m}"
+        n_maps = int(rng.choice([2, 3], p=[0.55, 0.45]))
+        for map_name in rng.choice(MAPS, size=n_maps, replace=False):
+            game_id += 1
+            # player x enemy x kill type, both directions
+            for side, other in ((a, b), (b, a)):
+                edge = skill[side] - skill[other]
+                lam = np.repeat([k[1] for k in KILL_TYPES], PLAYERS_PER_TEAM * PLAYERS_PER_TEAM)
+                kills_parts.append((
+                    stage, match_name, map_name, teams[side], teams[other],
+                    np.tile(np.repeat(roster[side], PLAYERS_PER_TEAM), len(KILL_TYPES)),
+                    np.tile(np.tile(roster[other], PLAYERS_PER_TEAM), len(KILL_TYPES)),
+                    rng.poisson(lam * math.exp(edge)), rng.poisson(lam * math.exp(-edge)),
+                ))
+            win_a = rng.random() < 1 / (1 + math.exp(-(skill[a] - skill[b]) * 8))
+            loser = int(rng.integers(3, 12))
+            score_a, score_b = (13, loser) if win_a else (loser, 13)
+            secs = int(rng.normal(38 * 60, 6 * 60))
+            scores.append({
+                "Tournament": t_name, "Stage": stage, "Match Type": "Main Event",
+                "Match Name": match_name, "Map": map_name,
+                "Team A": teams[a], "Team A Score": score_a,
+                "Team A Attacker Score": score_a // 2, "Team A Defender Score": score_a - score_a // 2,
+                "Team A Overtime Score": 0,
+                "Team B": teams[b], "Team B Score": score_b,
+                "Team B Attacker Score": score_b // 2, "Team B Defender Score": score_b - score_b // 2,
+                "Team B Overtime Score": 0,
+                "Duration": f"{secs // 3600:02d}:{secs % 3600 // 60:02d}:{secs % 60:02d}",
+            })
+            games.append({
+                "tournament": t_name, "tournament_id": t_idx + 1,
+                "stage": stage, "stage_id": t_idx * len(STAGES) + stage_idx + 1,
+                "match_type": "Main Event", "match_name": match_name, "map": map_name,
+                "match_id": t_idx * MATCHES_PER_TOURNAMENT + m + 1, "game_id": game_id,
+            })
+        for side in (a, b):
+            stats_rows.append((stage, side))
+
+    n = PLAYERS_PER_TEAM * PLAYERS_PER_TEAM * len(KILL_TYPES)
+    pk = np.concatenate([p[7] for p in kills_parts])
+    ek = np.concatenate([p[8] for p in kills_parts])
+    kills = pd.DataFrame({
+        "Tournament": t_name,
+        "Stage": np.repeat([p[0] for p in kills_parts], n),
+        "Match Type": "Main Event",
+        "Match Name": np.repeat([p[1] for p in kills_parts], n),
+        "Map": np.repeat([p[2] for p in kills_parts], n),
+        "Player Team": np.repeat([p[3] for p in kills_parts], n),
+        "Player": np.concatenate([p[5] for p in kills_parts]),
+        "Enemy Team": np.repeat([p[4] for p in kills_parts], n),
+        "Enemy": np.concatenate([p[6] for p in kills_parts]),
+        "Player Kills": pk,
+        "Enemy Kills": ek,
+        "Difference": pk - ek,
+        "Kill Type": np.tile(np.repeat([k[0] for k in KILL_TYPES], PLAYERS_PER_TEAM * PLAYERS_PER_TEAM),
+                             len(kills_parts)),
+    })
+
+    # per player per stage aggregates, like players_stats / kills_stats
+    played = pd.DataFrame(stats_rows, columns=["Stage", "team_idx"]).drop_duplicates()
+    ps_rows, ks_rows = [], []
+    for stage, side in played.itertuples(index=False):
+        for player in roster[side]:
+            rounds = int(rng.integers(40, 160))
+            k = int(rng.poisson(rounds * 0.75))
+            d = int(rng.poisson(rounds * 0.72))
+            ps_rows.append({
+                "Tournament": t_name, "Stage": stage, "Match Type": "Main Event",
+                "Player": player, "Teams": teams[side], "Agents": ", ".join(rng.choice(AGENTS, 2, replace=False)),
+                "Rounds Played": rounds, "Rating": round(float(rng.normal(1.0, 0.15)), 2),
+                "Average Combat Score": round(float(rng.normal(200, 30)), 1),
+                "Kills": k, "Deaths": d, "Assists": int(rng.poisson(rounds * 0.3)),
+            })
+            multi = rng.poisson([rounds * 0.12, rounds * 0.04, rounds * 0.01, rounds * 0.002])
+            ks_rows.append({
+                "Tournament": t_name, "Stage": stage, "Match Type": "Main Event",
+                "Player": player, "Team": teams[side],
+                "2k": int(multi[0]), "3k": int(multi[1]), "4k": int(multi[2]), "5k": int(multi[3]),
+                "1v1": int(rng.poisson(2)), "1v2": int(rng.poisson(0.8)), "1v3": int(rng.poisson(0.2)),
+                "1v4": int(rng.poisson(0.05)), "1v5": int(rng.poisson(0.01)),
+            })
+
+    # agent pick rates per stage and map
+    pick = []
+    for stage in kills["Stage"].unique():
+        for map_name in MAPS:
+            rates = rng.dirichlet(np.ones(len(AGENTS)) * 0.7) * 500
+            for agent, rate in zip(AGENTS, rates):
+                pick.append({"Tournament": t_name, "Stage": stage, "Match Type": "Main Event",
+                             "Map": map_name, "Agent": agent, "Pick Rate": round(float(min(rate, 100)), 2)})
+
+    scores_df = pd.DataFrame(scores)
+    maps_played = (
+        scores_df.groupby(["Tournament", "Stage", "Match Type", "Map"]).size()
+        .reset_index(name="Total Maps Played")
+    )
+    return {
+        "kills": kills,
+        "maps_scores": scores_df,
+        "maps_played": maps_played,
+        "players_stats": pd.DataFrame(ps_rows),
+        "kills_stats": pd.DataFrame(ks_rows),
+        "agents_pick_rates": pd.DataFrame(pick),
+        "tournaments_stages_matches_games_ids": pd.DataFrame(games),
+    }, game_id
+
+def generate(out_dir: str, scale: int = 1, seed: int = 42) -> Dict[str, int]:
+    """Write a synthetic snapshot at `scale` x one season into `out_dir`. Returns rows per table."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    teams, roster = _roster(scale)
+    writer = _Writer(out_dir)
+    counts: Dict[str, int] = {}
+    game_id = 0
+    try:
+        for t_idx in range(TOURNAMENTS_PER_SEASON * scale):
+            year = 2021 + t_idx // TOURNAMENTS_PER_SEASON
+            t_name = f"Champions Tour {year}: Event {t_idx % TOURNAMENTS_PER_SEASON + 1:02d}"
+            # each event draws from a subset of the league
+            pool = np.sort(rng.choice(len(teams), size=min(16, len(teams)), replace=False))
+            tables, game_id = _tournament(rng, t_idx, t_name, [teams[i] for i in pool], roster[pool], game_id)
+            for table, df in tables.items():
+                writer.write(table, df)
+                counts[table] = counts.get(table, 0) + len(df)
+        ids = {
+            "teams_ids": pd.DataFrame({"Team": teams, "team_id": np.arange(1, len(teams) + 1)}),
+            "players_ids": pd.DataFrame({"Player": roster.ravel(), "player_id": np.arange(1, roster.size + 1)}),
+        }
+        for table, df in ids.items():
+            writer.write(table, df)
+            counts[table] = len(df)
+    finally:
+        writer.close()
+    return counts
+
+# ---------- CLI ----------
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    p = argparse.ArgumentParser(description="Generate a synthetic VCT Parquet snapshot")
+    p.add_argument("--scale", type=int, default=1, help="Size as a multiple of one season (1, 10, 100)")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--snapshot-dir", default=None, help="Output directory (default: snapshots/synth_<scale>x)")
+    return p.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    out_dir = args.snapshot_dir or os.path.join("snapshots", f"synth_{args.scale}x")
+    counts = generate(out_dir, args.scale, args.seed)
+    for table, n in counts.items():
+        print(f"[OK] {table}: {n} rows")
+    print(f"\nDone. Snapshot saved to: {out_dir}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+# the modules in src/ import each other by bare name, as when run as scripts
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+
+@pytest.fixture(scope="session")
+def synth_dir(tmp_path_factory):
+    """One synthetic season (synth.py) as a Parquet snapshot, shared by the whole run."""
+    import synth
+
+    out_dir = str(tmp_path_factory.mktemp("synth"))
+    synth.generate(out_dir, scale=1, seed=7)
+    return out_dir
+
+
+@pytest.fixture
+def conn(synth_dir):
+    import snapshot
+
+    conn = snapshot.connect(synth_dir)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope="session")
+def base(synth_dir):
+    """engine.BASE_SQL over the synthetic snapshot."""
+    import engine
+    import snapshot
+    from main import run_query
+
+    conn = snapshot.connect(synth_dir)
+    try:
+        return run_query(conn, engine.BASE_SQL)
+    finally:
+        conn.close()
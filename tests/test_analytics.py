@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+
+from .test_engine import assert_same_report
+
+JOIN = """
+    FROM players_stats p
+    JOIN teams_ids t ON p.Teams = t.Team
+    JOIN players_ids pi ON p.Player = pi.Player
+"""
+
+# the per-chart queries the shared frame replaced
+SQL = {
+    # unordered in the chart: ordered here to compare
+    "pie_players_by_team": "SELECT t.Team AS team_name, COUNT(p.Player) AS num_players" + JOIN
+                           + "GROUP BY t.Team ORDER BY t.Team",
+    "bar_avg_rating_by_team": "SELECT t.Team AS team_name, ROUND(AVG(p.Rating), 2) AS avg_rating" + JOIN
+                              + "GROUP BY t.Team ORDER BY avg_rating DESC",
+    "hbar_top_kills": "SELECT p.Player, SUM(p.Kills) AS total_kills, t.Team" + JOIN
+                      + "GROUP BY p.Player, t.Team ORDER BY total_kills DESC LIMIT 10",
+}
+
+
+@pytest.fixture
+def stats(synth_dir, monkeypatch):
+    monkeypatch.setattr(analytics, "_snapshot", None)
+    monkeypatch.setattr(analytics, "_cache", None)
+    monkeypatch.setattr(analytics, "_players_stats", None)
+    analytics.use_snapshot(synth_dir)
+    return analytics.players_stats()
+
+
+@pytest.mark.parametrize("name", sorted(SQL))
+def test_chart_data_matches_its_sql(stats, conn, name):
+    got = analytics.STATS_CHARTS[name](stats)
+    ties = ()
+    if name == "pie_players_by_team":
+        got = got.sort_values("team_name", key=lambda s: s.astype(str)).reset_index(drop=True)
+    else:
+        # which of several rows tied on the sort column make a cut is unspecified
+        ties = ["team_name", "Player", "Team"]
+    assert_same_report(got, conn.query_df(SQL[name]), ties=ties)
+
+
+def test_players_stats_is_fetched_once(stats, monkeypatch):
+    monkeypatch.setattr(analytics, "run_query", lambda *a: pytest.fail("players_stats queried again"))
+    assert analytics.players_stats() is stats
+    analytics.chart_data("pie_players_by_team")
+
+
+def test_line_maps_played_keeps_null_tournaments_first():
+    stats = pd.DataFrame({
+        "Tournament": ["B", None, "A", None, "A"],
+        "Team": ["x", "x", "y", "x", "y"],
+        "Rounds Played": [20, 21, np.nan, 19, 24],
+    })
+    got = analytics.data_line_maps_played(stats)
+    assert pd.isna(got["Tournament"].iloc[0])
+    assert got["maps_played"].tolist() == [2, 1, 1]
+    assert got["Tournament"].tolist()[1:] == ["A", "B"]
+
+
+def test_avg_rating_rounds_half_away_from_zero():
+    stats = pd.DataFrame({"Team": ["x", "x", "y"], "Player": ["a", "b", "c"], "Rating": [1.0, 1.25, 0.125]})
+    got = analytics.data_bar_avg_rating_by_team(stats)
+    assert got["avg_rating"].tolist() == [1.13, 0.13]
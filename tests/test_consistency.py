@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from consistency import Moments, Rolling, consistency_table, merge_moments
+
+VALUES = np.random.default_rng(3).normal(20.0, 6.0, 500)
+
+
+def assert_moments(m, values):
+    assert m.n == len(values)
+    assert m.mean == pytest.approx(np.mean(values))
+    assert m.m2 == pytest.approx(np.var(values) * len(values))
+
+
+def test_welford_matches_direct():
+    assert_moments(Moments.of(VALUES), VALUES)
+    assert Moments.of(VALUES).std() == pytest.approx(np.std(VALUES, ddof=1))
+    assert Moments.of([5.0]).std() is None
+
+
+@pytest.mark.parametrize("cut", [0, 1, 250, 499, 500])
+def test_chan_merge_of_any_split(cut):
+    m = Moments.of(VALUES[:cut])
+    m.merge(Moments.of(VALUES[cut:]))
+    assert_moments(m, VALUES)
+
+
+@pytest.mark.parametrize("cut", [1, 250, 499])
+def test_subtract_undoes_merge(cut):
+    m = Moments.of(VALUES)
+    m.subtract(Moments.of(VALUES[:cut]))
+    assert_moments(m, VALUES[cut:])
+
+
+def test_refresh_updates_moments_in_place():
+    import rollups
+
+    def batch(key, sign, values):
+        return key + (sign, len(values), float(np.mean(values)), float(np.var(values) * len(values)))
+
+    old, new, rest = [10.0, 30.0], [12.0, 31.0, 18.0], list(VALUES[:50])
+    kept, gone = ("all", "", "p1"), ("map", "Bind", "p2")
+    m = Moments.of(rest + old)
+    current = [kept + (m.n, m.mean, m.m2), gone + (1, 7.0, 0.0)]
+    batches = [batch(kept, -1, old), batch(kept, 1, new), batch(gone, -1, [7.0]), batch(("all", "", "p3"), 1, [4.0])]
+    moments = rollups.update_moments(current, batches)
+    assert_moments(moments[kept], rest + new)
+    assert moments[gone].n == 0
+    assert_moments(moments[("all", "", "p3")], [4.0])
+
+
+def test_rolling_window_equals_last_values():
+    r = Rolling(20)
+    for x in VALUES:
+        r.push(x)
+    assert_moments(r.moments, VALUES[-20:])
+
+
+def test_merge_moments_frame():
+    groups = np.repeat(["a", "b", "a", "c", "b"], 100)
+    parts = []
+    for i in range(5):
+        chunk = VALUES[i * 100:(i + 1) * 100]
+        m = Moments.of(chunk)
+        parts.append((groups[i * 100], m.n, m.mean, m.m2))
+    merged = merge_moments(pd.DataFrame(parts, columns=["player", "n", "mean", "m2"])).set_index("player")
+    for player in ["a", "b", "c"]:
+        values = VALUES[groups == player]
+        row = merged.loc[player]
+        assert row["n"] == len(values)
+        assert row["mean"] == pytest.approx(np.mean(values))
+        assert row["m2"] == pytest.approx(np.var(values) * len(values))
+
+
+def test_consistency_table_matches_sql(conn):
+    # per-tournament moments as the rollups store them, merged per player, against the SQL report
+    per_match = """
+        SELECT `Tournament` AS tournament, `Player` AS player, `Match Name` AS match_name,
+               SUM(COALESCE(`Player Kills`,0)) AS kills
+        FROM kills WHERE `Match Name` IS NOT NULL AND `Match Name` <> ''
+        GROUP BY `Tournament`, `Player`, `Match Name`
+    """
+    stored = conn.query_df(f"""
+        SELECT tournament, player, COUNT(*) AS n, AVG(CAST(kills AS DOUBLE)) AS mean, VAR_POP(kills) * COUNT(*) AS m2
+        FROM ({per_match}) p GROUP BY tournament, player
+    """)
+    table = consistency_table(merge_moments(stored)).set_index("player")
+    sql = conn.query_df(f"""
+        SELECT player, COUNT(*) AS matches_played, ROUND(AVG(kills), 2) AS avg_kills,
+               ROUND(STDDEV_SAMP(kills), 2) AS std_kills
+        FROM ({per_match}) p GROUP BY player
+    """).set_index("player").loc[table.index]
+    assert (table["matches_played"] == sql["matches_played"]).all()
+    assert table["avg_kills"].tolist() == sql["avg_kills"].tolist()
+    assert np.allclose(table["std_kills"], sql["std_kills"], equal_nan=True)
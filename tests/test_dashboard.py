@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+
+import analytics
+import dashboard
+
+from .test_shards import copy_snapshot
+
+
+def rewrite(snap, edit):
+    path = os.path.join(snap, "agents_pick_rates.parquet")
+    df = pd.read_parquet(path)
+    edit(df)
+    df.to_parquet(path, index=False)
+    analytics.use_snapshot(snap)
+
+
+def test_update_bundle_rebuilds_only_changed_years(synth_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics, "_snapshot", None)
+    monkeypatch.setattr(analytics, "_cache", None)
+    snap = copy_snapshot(synth_dir, tmp_path / "snap")
+    analytics.use_snapshot(snap)
+
+    bundle = dashboard.empty_bundle()
+    assert dashboard.update_bundle(bundle, backend="snapshot") == ["2021"]
+    assert dashboard.update_bundle(bundle, backend="snapshot") == []
+
+    def swap_rates(df):
+        # same count, sums and distinct stages/agents: only a per-row checksum sees it
+        first = df.index[df["Tournament"] == df["Tournament"].iloc[0]]
+        i, j = first[0], first[1]
+        df.loc[[i, j], "Pick Rate"] = df.loc[[j, i], "Pick Rate"].values
+
+    rewrite(snap, swap_rates)
+    assert dashboard.update_bundle(bundle, backend="snapshot") == ["2021"]
+
+    def move_tournament(df):
+        last = df["Tournament"].iloc[-1]
+        df.loc[df["Tournament"] == last, "Tournament"] = "Champions Tour 2022: Masters"
+
+    rewrite(snap, move_tournament)
+    assert dashboard.update_bundle(bundle, backend="snapshot") == ["2021", "2022"]
+    assert sorted(bundle["frames"]) == ["2021", "2022"]
+    assert dashboard.update_bundle(bundle, backend="snapshot") == []
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+import encoded
+import snapshot
+
+
+def read(tmp_path, df, chunk_rows=2):
+    df.to_parquet(snapshot.table_path(str(tmp_path), "t"), index=False)
+    conn = snapshot.connect(str(tmp_path))
+    try:
+        return encoded.read_encoded(conn, "SELECT * FROM t", {}, {}, chunk_rows=chunk_rows)
+    finally:
+        conn.close()
+
+
+def test_column_null_in_first_chunk_is_text(tmp_path):
+    df = pd.DataFrame({"Kill Type": [None, None, "first", "knife", None],
+                       "kills": [1, 2, 3, 4, 5]})
+    out = read(tmp_path, df)
+    assert isinstance(out["Kill Type"].dtype, pd.CategoricalDtype)
+    assert out["Kill Type"].astype(object).where(out["Kill Type"].notna(), None).tolist() == \
+        [None, None, "first", "knife", None]
+    assert out["kills"].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_numeric_looking_column_turning_text(tmp_path):
+    df = pd.DataFrame({"Stage": ["1", "2", None, "Playoffs", "3"]})
+    out = read(tmp_path, df)
+    assert out["Stage"].astype(object).where(out["Stage"].notna(), None).tolist() == \
+        ["1", "2", None, "Playoffs", "3"]
+
+
+def test_all_null_column_stays_null(tmp_path):
+    df = pd.DataFrame({"x": pd.Series([None, None, None], dtype=object), "y": [1, 2, 3]})
+    out = read(tmp_path, df)
+    assert out["x"].isna().all()
+    assert list(out.columns) == ["x", "y"]
+
+
+def test_narrow_keeps_at_least_int32():
+    out = encoded.narrow(pd.Series([1, 2, 30000], dtype="int64"))
+    assert out.dtype == np.int32
+    assert (out * 2).tolist() == [2, 4, 60000]
+    assert encoded.narrow(pd.Series([1, None, 3], dtype="float64")).dtype == pd.Int32Dtype()
+    assert encoded.narrow(pd.Series([1, 2**40], dtype="int64")).dtype == np.int64
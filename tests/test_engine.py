@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+import reports
+
+
+def assert_same_report(got, expected, ties=()):
+    """Same columns and rows; rows tied on every numeric column may come in any order.
+
+    ties: columns left out of the row check, for rows tied on all the others (which of several
+    tied players makes a top-K cut is unspecified).
+    """
+    assert list(got.columns) == list(expected.columns)
+    assert len(got) == len(expected)
+    numeric = [c for c in expected.columns if pd.api.types.is_numeric_dtype(expected[c])]
+    pd.testing.assert_frame_equal(got[numeric].reset_index(drop=True), expected[numeric].reset_index(drop=True),
+                                  check_dtype=False)
+
+    def rows(df, columns):
+        return df[columns].astype(object).where(df[columns].notna(), None) \
+            .sort_values(columns, key=lambda s: s.astype(str)).reset_index(drop=True)
+
+    rest = [c for c in expected.columns if c not in ties]
+    pd.testing.assert_frame_equal(rows(got, rest), rows(expected, rest), check_dtype=False)
+
+
+def test_round_halves_away_from_zero(conn):
+    values = pd.Series([0.5, 1.5, 2.5, -0.5, -2.5, 0.125, -0.125, np.nan])
+    assert engine._round(values, 0).tolist()[:5] == [1.0, 2.0, 3.0, -1.0, -3.0]
+    assert engine._round(values, 2).tolist()[5:7] == [0.13, -0.13]
+    assert np.isnan(engine._round(values, 1).iloc[-1])
+    # same as the SQL side
+    sql = conn.query_df("SELECT ROUND(x, 2) AS r FROM (VALUES (0.125), (-0.125), (0.375), (-2.5)) v(x)")
+    got = engine._round(pd.Series([0.125, -0.125, 0.375, -2.5]), 2)
+    assert got.tolist() == sql["r"].tolist()
+
+
+@pytest.mark.parametrize("min_matches, top_n", [(2, 10), (1, 3), (5, 20)])
+def test_engine_matches_sql(conn, base, min_matches, top_n):
+    built = engine.build_reports(base, engine.REPORTS, min_matches, top_n)
+    values = reports.knobs(min_matches, top_n)
+    for name, df in built.items():
+        report = reports.REPORTS[name]
+        expected = conn.query_df(report.sql, reports.bind(report, values))
+        assert_same_report(df, expected)
+
+
+def test_cache_is_independent_of_knobs(base):
+    cache = {}
+    engine.build_reports(base, engine.REPORTS, 1, 1, cache)
+    for name, df in engine.build_reports(base, engine.REPORTS, 3, 7, cache).items():
+        pd.testing.assert_frame_equal(df, engine.build_reports(base, [name], 3, 7)[name])
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+
+openpyxl = pytest.importorskip("openpyxl")
+
+COLUMNS = [f"c{i}" for i in range(30)]
+
+
+def frame(start, rows):
+    df = pd.DataFrame(np.arange(start * 30, (start + rows) * 30).reshape(rows, 30), columns=COLUMNS)
+    df["c29"] = df["c29"].astype(float)
+    df.loc[df.index[0], "c29"] = np.nan
+    return df
+
+
+def test_sheets_split_at_the_row_limit(tmp_path, monkeypatch):
+    # 3 data rows per sheet (+ header)
+    monkeypatch.setattr(analytics, "EXCEL_MAX_ROWS", 4)
+    chunks = (frame(start, rows) for start, rows in [(0, 4), (4, 4), (8, 2)])
+    csv = tmp_path / "small.csv"
+    frame(0, 2).to_csv(csv, index=False)
+    path = analytics.export_to_excel({"a very long sheet name, cut at 31 chars": chunks, "csv": str(csv),
+                                      "empty": pd.DataFrame(columns=["x"])}, "out.xlsx", str(tmp_path))
+
+    wb = openpyxl.load_workbook(path)
+    stem = "a very long sheet name, cut at 31 chars"
+    parts = [stem[:31], stem[:27] + " (2)", stem[:27] + " (3)", stem[:27] + " (4)"]
+    assert wb.sheetnames == parts + ["csv", "empty"]
+    values = []
+    for name, rows in zip(parts, [3, 3, 3, 1]):
+        ws = wb[name]
+        got = list(ws.values)
+        assert list(got[0]) == COLUMNS and len(got) == rows + 1
+        assert ws.freeze_panes == "B2"
+        assert ws["A1"].font.bold
+        # ranges past column Z (the old chr(64 + n) broke there)
+        assert ws.auto_filter.ref == f"A1:AD{rows + 1}"
+        values += got[1:]
+    expected = pd.concat([frame(0, 4), frame(4, 4), frame(8, 2)]).astype(object)
+    expected = expected.where(expected.notna(), None)
+    assert values == list(expected.itertuples(index=False, name=None))
+
+    assert len(list(wb["csv"].values)) == 3
+    assert list(wb["empty"].values) == [("x",)]
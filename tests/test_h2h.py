@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+import h2h
+from main import run_query
+
+
+@pytest.fixture
+def pairs(conn):
+    return run_query(conn, h2h.SQL_PAIRS)
+
+
+@pytest.fixture
+def matrix(conn, pairs, tmp_path):
+    m = h2h.HeadToHead.from_frames(pairs, run_query(conn, h2h.SQL_IDS))
+    m.save(str(tmp_path))
+    return h2h.HeadToHead.load(str(tmp_path))
+
+
+def test_vs_matches_pairs(matrix, pairs):
+    for row in pairs.sample(200, random_state=1).itertuples(index=False):
+        assert matrix.vs(row.player, row.enemy) == (int(row.kills), int(row.deaths))
+    players = sorted(set(pairs["player"]))
+    met = set(zip(pairs["player"], pairs["enemy"]))
+    strangers = [(p, e) for p in players[:20] for e in players[-20:] if (p, e) not in met]
+    for p, e in strangers[:20]:
+        assert matrix.vs(p, e) == (0, 0)
+    with pytest.raises(KeyError):
+        matrix.vs("no such player", players[0])
+
+
+def test_rows_follow_player_ids(conn, matrix):
+    ids = run_query(conn, h2h.SQL_IDS)
+    for row in ids.sample(20, random_state=2).itertuples(index=False):
+        if row.player in set(matrix.names.tolist()):
+            assert matrix.row(row.player) == matrix.row_of_id(row.player_id)
+    assert (np.diff(matrix.player_ids) > 0).all()
+
+
+def test_top_k_matches_groupby(matrix, pairs):
+    k = 3
+    got = matrix.top_k(k, by="deaths")
+    expected = pairs.assign(row=[matrix.row(p) for p in pairs["enemy"]]) \
+        .sort_values(["player", "deaths", "row"], ascending=[True, False, True], kind="mergesort") \
+        .groupby("player").head(k)
+    merged = got.merge(expected, left_on=["player", "enemy"], right_on=["player", "enemy"], how="outer",
+                       validate="1:1", indicator=True)
+    assert (merged["_merge"] == "both").all()
+    assert (merged["deaths_from_enemy"] == merged["deaths"]).all()
+    assert matrix.nemeses(pairs["player"].iloc[0], k) == [
+        (r.enemy, r.kills_on_enemy, r.deaths_from_enemy)
+        for r in got[got["player"] == pairs["player"].iloc[0]].itertuples(index=False)]
+
+
+def test_top_pairs_is_nemesis_report(conn, matrix):
+    import reports
+
+    report = reports.REPORTS["nemesis"]
+    sql = conn.query_df(report.sql, reports.bind(report, reports.knobs(2, 15)))
+    got = matrix.top_pairs(15)
+    assert list(got.columns) == list(sql.columns)
+    assert got["deaths_from_enemy"].tolist() == sql["deaths_from_enemy"].tolist()
+    # pairs tied with the last one may be cut differently
+    above = [df[df["deaths_from_enemy"] > df["deaths_from_enemy"].iloc[-1]] for df in (got, sql)]
+    assert set(zip(above[0]["player"], above[0]["enemy"])) == set(zip(above[1]["player"], above[1]["enemy"]))
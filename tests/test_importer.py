@@ -0,0 +1,25 @@
+import pandas as pd
+
+from importer import _to_time
+
+
+def times(values):
+    out = _to_time(pd.Series(values, dtype=object))
+    assert len(out) == len(values)
+    return [None if pd.isna(v) else v for v in out]
+
+
+def test_to_time_formats():
+    assert times(["12:34", "1:02:03", " 0:59 ", None]) == ["00:12:34", "01:02:03", "00:00:59", None]
+
+
+def test_to_time_only_minutes_seconds():
+    assert times(["10:00", "bad"]) == ["00:10:00", None]
+
+
+def test_to_time_all_null_chunk():
+    assert times([None, None]) == [None, None]
+
+
+def test_to_time_chunk_without_colon():
+    assert times(["42", "x"]) == [None, None]
@@ -0,0 +1,111 @@
+import sys
+import time
+import types
+
+import pandas as pd
+import pytest
+
+import main
+
+
+class FakePool:
+    def __init__(self, log, **kwargs):
+        log.append(("pool", kwargs["password"]))
+        self.log = log
+
+    def get_connection(self):
+        return types.SimpleNamespace(connection_id=1, close=lambda: None)
+
+
+def test_pool_prompts_for_a_missing_password(monkeypatch, tmp_path):
+    log = []
+    pooling = types.SimpleNamespace(MySQLConnectionPool=lambda **kw: FakePool(log, **kw))
+    connector = types.ModuleType("mysql.connector")
+    connector.pooling = pooling
+    monkeypatch.setitem(sys.modules, "mysql", types.ModuleType("mysql"))
+    monkeypatch.setitem(sys.modules, "mysql.connector", connector)
+    monkeypatch.setitem(sys.modules, "mysql.connector.pooling", pooling)
+    monkeypatch.setattr(main.getpass, "getpass", lambda prompt: log.append(("prompt",)) or "secret")
+    monkeypatch.setattr(main, "set_timeout", lambda conn, seconds: None)
+    monkeypatch.setattr(main, "run_query", lambda conn, sql, params=None: pd.DataFrame({"x": [1]}))
+
+    # --no-cache --jobs 2: the pool is the first connection of the run
+    args = main.parse_args(["--no-cache", "--jobs", "2", "--outdir", str(tmp_path)])
+    work = [("a", "SELECT 1", (), None), ("b", "SELECT 2", (), None)]
+    main.run_parallel(args, main.LazyConn(lambda: None), work, str(tmp_path), 2, None)
+    assert log == [("prompt",), ("pool", "secret")]
+
+
+class FakeQueries:
+    """Pooled connections whose queries wait on an event; KILL QUERY sets it and fails the query."""
+
+    def __init__(self, monkeypatch):
+        self.events = {}
+        self.killed = []
+        self.ids = iter(range(1, 1000))
+        monkeypatch.setattr(main, "get_pool", lambda args, size: self)
+        monkeypatch.setattr(main, "set_timeout", lambda conn, seconds: None)
+        monkeypatch.setattr(main, "kill_query", self.kill)
+        monkeypatch.setattr(main, "fetch", self.fetch)
+        monkeypatch.setattr(main, "show_df", lambda *a: None)
+        monkeypatch.setattr(main, "show_timeout", lambda *a: None)
+
+    def get_connection(self):
+        return types.SimpleNamespace(connection_id=next(self.ids), close=lambda: None)
+
+    def kill(self, conn, connection_id):
+        self.killed.append(connection_id)
+        self.events[connection_id].set()
+
+    def fetch(self, cache, probe, sql, params, connect):
+        import threading
+
+        c = connect()
+        event = self.events.setdefault(c.connection_id, threading.Event())
+        if sql == "fail":
+            raise ValueError("broken report")
+        if event.wait(float(sql)):
+            error = Exception("Query execution was interrupted")
+            error.errno = 1317
+            raise error
+        return pd.DataFrame({"x": [1]})
+
+
+def run(tmp_path, work, jobs, timeout):
+    args = main.parse_args(["--outdir", str(tmp_path)])
+    written = {}
+    started = time.monotonic()
+    main.run_parallel(args, main.LazyConn(lambda: None), work, str(tmp_path), jobs, timeout, written=written)
+    return written, time.monotonic() - started
+
+
+def test_watchdog_kills_a_slow_report(monkeypatch, tmp_path):
+    fake = FakeQueries(monkeypatch)
+    # "a" is under the limit (timeout + 1 s of grace), "b" is not
+    written, elapsed = run(tmp_path, [("a", "1", (), None), ("b", "30", (), None)], 2, 0.5)
+    assert written["a"] is not None and written["b"] is None
+    assert fake.killed == [2]
+    assert elapsed < 5
+
+
+def test_error_kills_the_running_reports(monkeypatch, tmp_path):
+    fake = FakeQueries(monkeypatch)
+    started = time.monotonic()
+    with pytest.raises(ValueError):
+        run(tmp_path, [("a", "fail", (), None), ("b", "30", (), None), ("c", "30", (), None)], 2, None)
+    assert time.monotonic() - started < 5
+    assert fake.killed
+
+
+def test_watchdog_leaves_a_returned_connection_alone(monkeypatch, tmp_path):
+    fake = FakeQueries(monkeypatch)
+
+    def slow_write(df, out_root, out_name, fmt):
+        time.sleep(2)
+        return "x"
+
+    # the query is done, the file is still being written: nothing may be killed
+    monkeypatch.setattr(main, "write_df", slow_write)
+    written, _ = run(tmp_path, [("a", "0", (), None)], 1, 0.5)
+    assert written["a"] is not None
+    assert fake.killed == []
@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+
+import manifest
+
+DF = pd.DataFrame({"player": ["a", "b"], "kd": [1.5, 0.75]})
+
+
+def save(outdir, name, params, fmt="csv", **run):
+    out_root = os.path.join(outdir, name)
+    os.makedirs(out_root)
+    path = os.path.join(out_root, "global_kd" + manifest.EXTENSIONS[fmt])
+    if fmt == "csv":
+        DF.to_csv(path, index=False)
+    else:
+        DF.to_parquet(path, index=False)
+    manifest.write(out_root, dict(run, format=fmt), [manifest.entry("global", "global_kd", params, DF, path, None)])
+    return path
+
+
+def test_latest_picks_the_newest_matching_run(tmp_path):
+    outdir = str(tmp_path)
+    first = save(outdir, "r1", {"min_matches": 2, "top_n": 10}, fmt="parquet")
+    second = save(outdir, "r2", {"min_matches": 3, "top_n": 10})
+    approx = save(outdir, "r3", {"min_matches": 3, "top_n": 10}, approx_matches={"precision": 12})
+    with open(os.path.join(outdir, manifest.RUNS), "a", encoding="utf-8") as f:
+        f.write('{"dir": "r4", "repo')  # a run cut off by a crash
+
+    assert manifest.latest(outdir, "global") == second
+    assert manifest.latest(outdir, "global", approx=True) == approx
+    assert manifest.latest(outdir, "global", {"min_matches": 2}) == first
+    assert manifest.latest(outdir, "global", fmt="parquet") == first
+    # a knob the report does not take matches any value
+    assert manifest.latest(outdir, "global", {"min_matches": 3, "specialists_k": 5}) == second
+    assert manifest.latest(outdir, "global", {"min_matches": 4}) is None
+    assert manifest.latest(outdir, "per_map") is None
+
+    with open(second, "a", encoding="utf-8") as f:
+        f.write("c,1.0\n")
+    assert manifest.latest(outdir, "global") == second
+    assert manifest.latest(outdir, "global", verify=True) == first
+    os.remove(first)
+    assert manifest.latest(outdir, "global", fmt="parquet") is None
+
+
+def test_runs_index_and_column_reads(tmp_path):
+    path = save(str(tmp_path), "r1", {"min_matches": 2}, fmt="parquet", versions={"kills": "v1"})
+    run = next(manifest.runs(str(tmp_path)))
+    assert run["versions"] == {"kills": "v1"} and run["reports"]["global_kd"]["file"] == "global_kd.parquet"
+    pd.testing.assert_frame_equal(manifest.read(path, ["kd"]), DF[["kd"]])
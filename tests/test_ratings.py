@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+import ratings
+from main import run_query
+
+
+@pytest.fixture
+def maps(conn):
+    df = run_query(conn, ratings.SQL_MAPS, (0,))
+    assert len(df) > 100
+    return df
+
+
+@pytest.fixture
+def known(conn):
+    ids = run_query(conn, ratings.SQL_TEAM_IDS)
+    return dict(zip(ids["team"].astype(str), ids["team_id"].astype("int64")))
+
+
+def replay(maps, known, k=ratings.DEFAULT_K):
+    """Map by map, the plain way: what levels() batching must reproduce."""
+    r = ratings.Ratings.empty(k)
+    r.add_teams(ratings._unique(maps["team_a"], maps["team_b"]), known)
+    r.add_maps(ratings._unique(maps["map"]))
+    team = {n: i for i, n in enumerate(r.names.tolist())}
+    row = {n: i + 1 for i, n in enumerate(r.maps.tolist())}
+    for m in maps.itertuples(index=False):
+        a, b = team[str(m.team_a)], team[str(m.team_b)]
+        for rr in (0, row[str(m.map)]):
+            d = ratings.elo_delta(np.array([r.ratings[rr, a]]), np.array([r.ratings[rr, b]]),
+                                  np.array([m.score_a]), np.array([m.score_b]), k)[0]
+            r.ratings[rr, a] += d
+            r.ratings[rr, b] -= d
+    return r
+
+
+def test_levels_never_repeat_a_team_and_keep_its_order():
+    a = np.array([0, 2, 0, 1, 3, 2])
+    b = np.array([1, 3, 2, 3, 0, 1])
+    seen = {}
+    for level, idx in enumerate(ratings.levels(a, b)):
+        teams = np.concatenate([a[idx], b[idx]])
+        assert len(set(teams.tolist())) == len(teams)
+        for i in idx.tolist():
+            for t in (a[i], b[i]):
+                assert seen.get(t, -1) < i
+                seen[t] = i
+    assert sorted(np.concatenate(ratings.levels(a, b)).tolist()) == list(range(len(a)))
+
+
+def test_batched_update_equals_sequential_replay(maps, known):
+    batched = ratings.Ratings.empty()
+    assert batched.apply(maps, known) == len(maps)
+    expected = replay(maps, known)
+    assert batched.names.tolist() == expected.names.tolist()
+    assert np.allclose(batched.ratings, expected.ratings)
+    # zero-sum per row
+    assert np.allclose(batched.ratings.sum(axis=1), ratings.BASE_RATING * len(batched.names))
+
+
+def test_extending_a_checkpoint_equals_one_pass(maps, known, tmp_path):
+    whole = ratings.Ratings.empty()
+    whole.apply(maps, known)
+    cut = len(maps) // 2
+    first = ratings.Ratings.empty()
+    first.apply(maps.iloc[:cut], known)
+    first.save(str(tmp_path))
+    resumed = ratings.Ratings.load(str(tmp_path))
+    resumed.apply(maps[maps["game_id"] > resumed.last_game_id], known)
+    assert resumed.last_game_id == whole.last_game_id
+    # teams and maps first seen after the checkpoint are appended, so compare by name
+    for table in ("table", "map_table"):
+        got, expected = getattr(resumed, table)(), getattr(whole, table)()
+        keys = ["map", "team"] if table == "map_table" else ["team"]
+        got, expected = (df.sort_values(keys).reset_index(drop=True) for df in (got, expected))
+        assert got.drop(columns="rank", errors="ignore").equals(expected.drop(columns="rank", errors="ignore"))
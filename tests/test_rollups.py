@@ -0,0 +1,127 @@
+import pytest
+
+import rollups
+
+
+class FakeCursor:
+    """Records statements; SELECTs answer from `answers` (first matching substring wins)."""
+
+    def __init__(self, log, answers):
+        self.log = log
+        self.answers = answers
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        self.log.append((" ".join(sql.split()), tuple(params)))
+        self.rows = next((rows for key, rows in self.answers if key in sql), [(0,)])
+
+    def executemany(self, sql, rows):
+        self.log.append((" ".join(sql.split()), [tuple(row) for row in rows]))
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    def __init__(self, answers):
+        self.log = []
+        self.answers = answers
+        self.committed = False
+
+    def cursor(self):
+        return FakeCursor(self.log, self.answers)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+
+def refresh(answers, **kwargs):
+    conn = FakeConn([("column_name = 'unit_id'", [(1,)])] + answers)
+    changed = rollups.refresh_rollups(conn, **kwargs)
+    assert conn.committed
+    return changed, conn.log
+
+
+def units_scans(log):
+    return [(sql, params) for sql, params in log if "FROM kills" in sql and "INSERT INTO rollup_units" in sql]
+
+
+LOGGED = [
+    ("SHOW TABLES LIKE 'import_partitions'", [("import_partitions",)]),
+    ("MAX(seq)", [(12,)]),
+    ("FROM rollup_state", [(10,)]),
+]
+
+
+def test_no_new_imports_skip_the_scan():
+    changed, log = refresh(LOGGED + [("SELECT part FROM import_partitions", [])])
+    assert changed == 0
+    assert units_scans(log) == []
+    assert ("REPLACE INTO rollup_state (source, last_seq) VALUES ('kills', %s)", (12,)) in log
+
+
+def test_units_are_grouped_once_for_the_imported_tournaments():
+    changed, log = refresh(LOGGED + [
+        ("SELECT part FROM import_partitions", [("Masters Toronto",), ("",)]),
+        ("COUNT(*) FROM rollup_changed", [(3,)]),
+        ("FROM rollup_samples", []),
+    ])
+    assert changed == 3
+    (scan,) = units_scans(log)
+    assert "`Tournament` IN (%s)" in scan[0] and "`Tournament` IS NULL" in scan[0]
+    assert scan[1] == ("Masters Toronto",)
+    (removed,) = [entry for entry in log if entry[0].startswith("INSERT INTO rollup_changed") and "0, 0" in entry[0]]
+    assert "w.tournament IN (%s, %s)" in removed[0]
+    assert removed[1] == ("", "Masters Toronto")
+
+
+def test_whole_table_imports_and_full_checks_scan_everything():
+    _, log = refresh(LOGGED + [("SELECT part FROM import_partitions", [(None,), ("Masters Toronto",)])])
+    (scan,) = units_scans(log)
+    assert "`Tournament` IN" not in scan[0] and scan[1] == ()
+
+    _, log = refresh(LOGGED + [("SELECT part FROM import_partitions", [])], full=True)
+    (scan,) = units_scans(log)
+    assert scan[1] == ()
+
+
+def test_first_refresh_without_an_import_log_scans_everything():
+    changed, log = refresh([("SHOW TABLES LIKE 'import_partitions'", [])])
+    assert len(units_scans(log)) == 1
+    assert not any("rollup_state (source" in sql for sql, _ in log)
+
+
+def test_moments_are_updated_from_the_samples_of_the_changed_matches():
+    changed, log = refresh(LOGGED + [
+        ("SELECT part FROM import_partitions", [("Masters Toronto",)]),
+        ("COUNT(*) FROM rollup_changed", [(1,)]),
+        ("GROUP BY scope, scope_key, player, sign", [
+            ("all", "", "p1", -1, 1, 10.0, 0.0),
+            ("all", "", "p1", 1, 1, 14.0, 0.0),
+            ("map", "Bind", "p1", -1, 1, 10.0, 0.0),
+        ]),
+        ("FROM rollup_player_moments m", [("all", "", "p1", 3, 12.0, 8.0), ("map", "Bind", "p1", 1, 10.0, 0.0)]),
+    ])
+    statements = [sql for sql, _ in log]
+    samples = [i for i, sql in enumerate(statements) if sql.startswith("INSERT INTO rollup_samples")]
+    back_out = statements.index("DELETE u FROM rollup_unit_player u JOIN rollup_changed c ON c.old_id = u.unit_id")
+    apply = next(i for i, sql in enumerate(statements) if sql.startswith("INSERT INTO rollup_unit_player"))
+    assert [i < back_out for i in samples] == [True] * 3 + [False] * 3
+    assert all(i > apply for i in samples[3:])
+    assert not any("rollup_player_match" in sql and "rollup_player_moments" in sql for sql in statements)
+
+    (_, gone), (_, kept) = [entry for entry in log if "rollup_player_moments (scope" in entry[0] or
+                            entry[0].startswith("DELETE FROM rollup_player_moments")]
+    assert gone == [("map", "Bind", "p1")]
+    # {10, 12, 14} with 10 replaced by 14: {12, 14, 14}
+    ((*key, mean, m2),) = kept
+    assert key == ["all", "", "p1", 3] and (mean, m2) == pytest.approx((40 / 3, 8 / 3))
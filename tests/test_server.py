@@ -0,0 +1,92 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import engine
+import reports
+import server
+from main import run_query
+
+from .test_engine import assert_same_report
+
+
+@pytest.fixture(scope="module")
+def cube(synth_dir):
+    import snapshot
+
+    conn = snapshot.connect(synth_dir)
+    try:
+        return server.Cube(run_query(conn, engine.BASE_SQL), run_query(conn, server.SQL_PAIRS), {})
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("min_matches, top_n", [(2, 10), (1, 7)])
+def test_report_matches_sql(cube, conn, min_matches, top_n):
+    values = reports.knobs(min_matches, top_n)
+    for name in list(engine.REPORTS) + ["nemesis"]:
+        report = reports.REPORTS[name]
+        expected = conn.query_df(report.sql, reports.bind(report, values))
+        got = cube.report(name, min_matches, top_n)
+        if name != "nemesis":
+            assert_same_report(got, expected)
+            continue
+        # nemesis orders by deaths_from_enemy only: which tied pairs make the cut is unspecified
+        assert list(got.columns) == list(expected.columns)
+        assert got["deaths_from_enemy"].tolist() == expected["deaths_from_enemy"].tolist()
+        pairs = conn.query_df(server.SQL_PAIRS)
+        found = got.astype(object).merge(pairs.astype(object), how="left", indicator=True)
+        assert (found["_merge"] == "both").all()
+
+
+@pytest.mark.parametrize("min_matches, top_n", [(2, 0), (2, -5), (-1, 10)])
+def test_report_rejects_bad_knobs(cube, min_matches, top_n):
+    with pytest.raises(ValueError):
+        cube.report("global", min_matches, top_n)
+    with pytest.raises(ValueError):
+        cube.report("nemesis", min_matches, top_n)
+
+
+@pytest.fixture
+def http(cube, synth_dir):
+    args = server.parse_args(["--backend", "snapshot", "--snapshot-dir", synth_dir])
+    srv = server.ReportServer(("127.0.0.1", 0), args, lambda: cube)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+
+    def call(path, method="GET"):
+        url = f"http://127.0.0.1:{srv.server_address[1]}{path}"
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, method=method), timeout=10) as resp:
+                return resp.status, json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    yield call
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.mark.parametrize("query", ["top_n=0", "min_matches=-1", "top_n=ten", "min-matches=1.5"])
+def test_handler_rejects_bad_knobs(http, query):
+    status, body = http(f"/report/global?{query}")
+    assert status == 400 and "error" in body
+
+
+def test_handler_unknown_report_is_404(http):
+    status, body = http("/report/no_such_report")
+    assert status == 404 and "no_such_report" in body["error"]
+    assert http("/nowhere")[0] == 404
+
+
+def test_refresh_clears_the_memo(http):
+    status, body = http("/report/global?top_n=3&min-matches=1")
+    assert status == 200 and body["rows"] == 3 and body["params"]["top_n"] == 3
+    assert http("/report/global?top_n=3&min_matches=1")[1] == body
+    assert http("/health")[1]["memoised"] == 1
+    status, refreshed = http("/refresh", method="POST")
+    assert status == 200 and refreshed["reloaded"]
+    assert http("/health")[1]["memoised"] == 0
@@ -0,0 +1,121 @@
+import os
+import time
+
+import pandas as pd
+
+import engine
+import shards
+import sketches
+import snapshot
+from main import run_query
+
+from .test_engine import assert_same_report
+
+NAMES = [name for name in engine.REPORTS]
+
+
+def tournament_partials(base, precision=None):
+    return [shards.partials(rows, precision) for _, rows in base.groupby("tournament", dropna=False, sort=True)]
+
+
+KEYS = {
+    "per_player": ["player"],
+    "per_map": ["map_name", "player"],
+    "per_match": ["match_name", "player"],
+    "per_team": ["Team"],
+    "per_team_map": ["map_name", "team"],
+    "per_tournament": ["tournament", "player"],
+}
+
+
+def by_keys(df, keys):
+    return df.sort_values(keys).reset_index(drop=True)
+
+
+def test_merge_equals_scan(base):
+    cache = shards.merge(tournament_partials(base))
+    scan_cache = {}
+    engine.build_reports(base, NAMES, 1, 1, scan_cache)
+    for name, keys in KEYS.items():
+        pd.testing.assert_frame_equal(by_keys(cache[name], keys), by_keys(scan_cache[name], keys)[cache[name].columns],
+                                      check_dtype=False)
+    for min_matches, top_n in [(2, 10), (1, 5)]:
+        merged = engine.build_reports(base, NAMES, min_matches, top_n, cache)
+        scanned = engine.build_reports(base, NAMES, min_matches, top_n)
+        for name in NAMES:
+            assert_same_report(merged[name], scanned[name], ties=["player"])
+
+
+def test_sketched_merge_is_close_and_keeps_exact_columns(base):
+    exact = shards.merge(tournament_partials(base))
+    approx = shards.merge(tournament_partials(base, sketches.DEFAULT_PRECISION), sketches.DEFAULT_PRECISION)
+    both = exact["per_map"].merge(approx["per_map"], on=["map_name", "player"], suffixes=("", "_approx"),
+                                  validate="1:1")
+    assert len(both) == len(exact["per_map"]) == len(approx["per_map"])
+    assert (both["kills_total"] == both["kills_total_approx"]).all()
+    assert (both["deaths_total"] == both["deaths_total_approx"]).all()
+    err = (both["matches_played_approx"] - both["matches_played"]).abs() / both["matches_played"]
+    # a few matches per group: linear counting, off by a collision at most
+    assert err.mean() < 0.01
+    assert (both["matches_played_approx"] - both["matches_played"]).abs().max() <= 2
+    # per-player counts come from the exact player_match partials
+    for name in ["per_player", "per_match", "per_team", "per_team_map", "per_tournament"]:
+        pd.testing.assert_frame_equal(approx[name], exact[name])
+
+
+def test_store_reuses_unchanged_tournaments(synth_dir, tmp_path, capsys):
+    args = shards.parse_args(["--backend", "snapshot", "--snapshot-dir", synth_dir, "--shard-dir", str(tmp_path)])
+    first = shards.load_intermediates(args)
+    assert "aggregating" in capsys.readouterr().out
+    second = shards.load_intermediates(args)
+    assert "up to date" in capsys.readouterr().out
+    for name in first:
+        pd.testing.assert_frame_equal(second[name], first[name])
+
+
+def copy_snapshot(synth_dir, out_dir):
+    import shutil
+
+    os.makedirs(out_dir)
+    for name in os.listdir(synth_dir):
+        shutil.copy(os.path.join(synth_dir, name), out_dir)
+    return str(out_dir)
+
+
+def test_store_picks_up_rows_corrected_in_place(synth_dir, tmp_path, capsys):
+    snap = copy_snapshot(synth_dir, tmp_path / "snap")
+    args = shards.parse_args(["--backend", "snapshot", "--snapshot-dir", snap, "--shard-dir", str(tmp_path / "shards")])
+    shards.load_intermediates(args)
+    capsys.readouterr()
+
+    # same row count, kills and deaths: only the content checksum changes
+    path = snapshot.table_path(snap, "kills")
+    kills = pd.read_parquet(path)
+    kills.loc[0, "Player"] = "renamed player"
+    kills.to_parquet(path, index=False)
+    os.utime(path, (time.time() + 5, time.time() + 5))
+
+    cache = shards.load_intermediates(args)
+    assert "aggregating 1 of" in capsys.readouterr().out
+    assert "renamed player" in set(cache["per_player"]["player"])
+
+
+def test_null_and_blank_tournaments_share_a_shard(synth_dir, tmp_path, capsys):
+    snap = copy_snapshot(synth_dir, tmp_path / "snap")
+    path = snapshot.table_path(snap, "kills")
+    kills = pd.read_parquet(path)
+    kills.loc[:9, "Tournament"] = ""
+    kills.loc[10:19, "Tournament"] = None
+    kills.to_parquet(path, index=False)
+    args = shards.parse_args(["--backend", "snapshot", "--snapshot-dir", snap, "--shard-dir", str(tmp_path / "shards")])
+
+    cache = shards.load_intermediates(args)
+    conn = snapshot.connect(snap)
+    try:
+        expected = engine.build_reports(run_query(conn, engine.BASE_SQL), ["global"], 1, 1, {})
+        rows = conn.query_df("SELECT COUNT(*) AS n, SUM(`Player Kills`) AS k FROM kills")
+    finally:
+        conn.close()
+    assert cache["per_player"]["kills_total"].sum() == rows["k"].iloc[0]
+    assert expected["global"]["player"].tolist() == \
+        engine.build_reports(None, ["global"], 1, 1, cache)["global"]["player"].tolist()
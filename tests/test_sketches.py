@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+import engine
+import sketches
+
+
+def test_union_of_sketches_is_sketch_of_union(base):
+    whole = sketches.MatchSketches.from_base(base, 10)
+    parts = sketches.MatchSketches.concat(
+        [sketches.MatchSketches.from_base(rows, 10) for _, rows in base.groupby("tournament", sort=True)])
+    for by in (["player"], ["map_name", "player"]):
+        pd.testing.assert_frame_equal(parts.totals(by), whole.totals(by))
+
+
+def test_estimate_close_to_exact(base):
+    approx = sketches.approximate_intermediates(base, sketches.DEFAULT_PRECISION)
+    exact = engine._group(base, ["player"])
+    both = exact.merge(approx["per_player"], on="player", suffixes=("", "_approx"), validate="1:1")
+    assert len(both) == len(exact)
+    assert (both["kills_total"] == both["kills_total_approx"]).all()
+    err = (both["matches_played_approx"] - both["matches_played"]).abs() / both["matches_played"]
+    assert err.mean() < 0.01
+
+
+def test_estimate_large_cardinality():
+    # past the linear-counting range: within a few standard errors
+    precision = 10
+    values = pd.Series([f"match {i}" for i in range(50_000)])
+    base = pd.DataFrame({"tournament": "t", "map_name": "m", "player": "p", "match_name": values,
+                         "kills": 1, "deaths": 1})
+    got = sketches.MatchSketches.from_base(base, precision).totals(["player"])["matches_played"].iloc[0]
+    assert abs(got - 50_000) / 50_000 < 4 * 1.04 / np.sqrt(1 << precision)
+
+
+def test_null_match_names_are_not_counted():
+    base = pd.DataFrame({"tournament": "t", "map_name": "m", "player": ["p", "p", "p"],
+                         "match_name": ["a", None, "b"], "kills": 1, "deaths": 0})
+    out = sketches.MatchSketches.from_base(base, 8).totals(["player"])
+    assert out["matches_played"].tolist() == [2]
+    assert out["kills_total"].tolist() == [3]